@@ -1,6 +1,5 @@
 from ema.cli import app
-from ema.cli_app import import_commands
 
 if __name__ == "__main__":
-    import_commands()
+    # Command modules are imported on demand, see ema.cli_app.import_commands
     app()
@@ -12,6 +12,8 @@ from sqlalchemy import text
 import ema.env as env
 import ema.db as db
 from ema.interfaces import Interface
+from ema.lazy import Lazy
+from ema.retrieval import HybridRetriever, RetrievalFilters
 from ema.tools import sql_schema
 from ema.utils import format_dt
 
@@ -47,15 +49,23 @@ def extract_xml_tag(text: str) -> tuple[str, str] | None:
     return None, None
 
 
+retriever: HybridRetriever = Lazy(HybridRetriever)
+"""Shared by answer() calls, so retrieval results are cached across questions"""
+
+
 def answer(
     question: str,
     user: str,
     ctx_vars: dict = None,
     interface: Interface = Interface.UNKNOWN,
+    filters: RetrievalFilters = None,
 ) -> str:
     ctx_vars = ctx_vars or {
         "time": format_dt(datetime.now()),
     }
+    similar_documents = retriever.search(question, filters)
+    if retriever.cache:
+        print(ui.gray(f"Retrieval cache: {retriever.cache.stats()}"))
     history = [
         mc.SysMsg(
             mc.tpl(
@@ -66,7 +76,7 @@ def answer(
                 sql_schema=sql_schema(),
                 ctx_vars=ctx_vars,
                 interface=interface,
-                similar_documents=mc.texts.search("issues", question, n_results=10),
+                similar_documents=similar_documents,
                 indent=textwrap.indent,
             )
         ),
@@ -0,0 +1,119 @@
+"""
+Resumable import checkpoints.
+"""
+import json
+import threading
+from collections import deque
+
+from sqlalchemy import Connection, text
+
+import ema.db as db
+from ema.utils import format_dt
+
+CHECKPOINTS_TABLE = "import_checkpoints"
+
+
+class ImportCheckpoint:
+    """
+    Tracks import progress page by page.
+
+    Each page registered with `register` waits until all its issues are reported `done`.
+    The partition cursor then moves past the page, but only when all preceding pages
+    of the partition are done too, so the stored cursor never skips unprocessed issues.
+    `save` is meant to be called in the transaction of each DB batch:
+    the checkpoint is committed atomically with the rows it covers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        updated_after: str,
+        partitions: dict[str, dict],
+        cursors: dict[str, str] = None,
+        finished: list[str] = None,
+        high_water_mark: str = None,
+        started_at: str = None,
+    ):
+        self.name = name
+        self.updated_after = updated_after
+        self.partitions = partitions
+        self.cursors = dict(cursors or {})
+        self.finished = set(finished or [])
+        self.high_water_mark = high_water_mark
+        """Max `updatedAt` of the durably processed issues"""
+        self.started_at = started_at
+        self._pages: dict[int, list] = {}
+        self._queues: dict[str, deque] = {key: deque() for key in partitions}
+        self._next_token = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining_partitions(self) -> dict[str, dict]:
+        return {k: v for k, v in self.partitions.items() if k not in self.finished}
+
+    def register(self, page) -> int:
+        """
+        Registers a fetched page (`IssuePage`), returns the token to report its issues `done` with.
+        """
+        updated = [format_dt(i["updatedAt"]) for i in page if i.get("updatedAt")]
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._pages[token] = [
+                page.partition,
+                len(page),
+                page.cursor,
+                page.has_next_page,
+                max(updated, default=None),
+            ]
+            self._queues.setdefault(page.partition, deque()).append(token)
+            self._advance(page.partition)
+        return token
+
+    def done(self, token: int):
+        """Marks one issue of the page as stored and indexed"""
+        with self._lock:
+            page = self._pages[token]
+            page[1] -= 1
+            self._advance(page[0])
+
+    def _advance(self, partition: str):
+        queue = self._queues[partition]
+        while queue and self._pages[queue[0]][1] <= 0:
+            _, _, cursor, has_next_page, max_updated = self._pages.pop(queue.popleft())
+            self.cursors[partition] = cursor
+            if not has_next_page:
+                self.finished.add(partition)
+            if max_updated and (not self.high_water_mark or max_updated > self.high_water_mark):
+                self.high_water_mark = max_updated
+
+    def state(self) -> dict:
+        with self._lock:
+            return dict(
+                updated_after=self.updated_after,
+                partitions=self.partitions,
+                cursors=dict(self.cursors),
+                finished=sorted(self.finished),
+                high_water_mark=self.high_water_mark,
+                started_at=self.started_at,
+            )
+
+    def save(self, conn: Connection):
+        conn.execute(
+            text(
+                f"INSERT INTO {CHECKPOINTS_TABLE} (name, state) VALUES (:name, :state) "
+                "ON DUPLICATE KEY UPDATE state = VALUES(state)"
+            ),
+            dict(name=self.name, state=json.dumps(self.state())),
+        )
+
+    @classmethod
+    def load(cls, name: str) -> "ImportCheckpoint | None":
+        rows = db.sql(f"SELECT state FROM {CHECKPOINTS_TABLE} WHERE name = :name", dict(name=name))
+        if not rows:
+            return None
+        return cls(name, **json.loads(rows[0]["state"]))
+
+    @staticmethod
+    def delete(name: str):
+        db.sql(f"DELETE FROM {CHECKPOINTS_TABLE} WHERE name = :name", dict(name=name))
@@ -0,0 +1,72 @@
+"""
+Chroma embedding DB creating collections with configured HNSW parameters.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from microcore.embedding_db import SearchResult, SearchResults
+from microcore.embedding_db.chromadb import ChromaEmbeddingDB
+
+from ema.vector_store import VectorStoreConfig
+
+
+@dataclass
+class ChromaDB(ChromaEmbeddingDB):
+    """
+    HNSW parameters (`VECTOR_STORE_HNSW_*`) apply to new collections only:
+    Chroma fixes them at creation, re-run index-vec to rebuild the collection.
+    """
+
+    settings: VectorStoreConfig = None
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.settings = self.settings or VectorStoreConfig()
+
+    def _get_collection(self, name: str, create: bool = False):
+        existing = super()._get_collection(name)
+        if existing is not None or not create:
+            return existing
+        return self.client.get_or_create_collection(
+            name=name,
+            embedding_function=self.embedding_function,
+            metadata=self.settings.hnsw_metadata() or None,
+        )
+
+    def update_metadata(self, collection: str, ids: list[str], metadatas: list[dict]):
+        """Replaces metadata of the documents, keeping their embeddings"""
+        chroma_collection = self._get_collection(collection)
+        if chroma_collection is not None:
+            chroma_collection.update(ids=ids, metadatas=metadatas)
+
+    def search_by_vector(
+        self, collection: str, vector: list[float], n_results: int = 5, where: dict = None
+    ) -> list[SearchResult]:
+        """Like `search`, with the query embedding computed by the caller"""
+        chroma_collection = self._get_collection(collection)
+        if chroma_collection is None:
+            return SearchResults([])
+        d = chroma_collection.query(
+            query_embeddings=[list(vector)], n_results=n_results, where=where
+        )
+        return (
+            self._wrap_results(d)
+            if d and d.get("documents") and d["documents"][0]
+            else SearchResults([])
+        )
+
+    def embeddings(self, collection: str, page_size: int = 5000) -> tuple[list[dict], np.ndarray]:
+        """Metadata and embeddings of all documents"""
+        chroma_collection = self._get_collection(collection)
+        metadatas, vectors = [], []
+        total = chroma_collection.count() if chroma_collection else 0
+        for offset in range(0, total, page_size):
+            page = chroma_collection.get(
+                include=["embeddings", "metadatas"], limit=page_size, offset=offset
+            )
+            metadatas += [m or {} for m in page["metadatas"]]
+            vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+        if not vectors:
+            return [], np.zeros((0, 0), np.float32)
+        return metadatas, np.concatenate(vectors)
@@ -1,9 +1,9 @@
 import os
 
+import typer
 from rich.pretty import pprint
 import ema.env as env
 from ema.cli_app import app
-from ema.agent import answer
 
 
 @app.command(name="team")
@@ -14,7 +14,9 @@ def get_team(name_or_key: str):
 
 
 @app.command(name="teams")
-def get_teams():
+def get_teams(refresh: bool = False):
+    if refresh:
+        env.linear_api.reference.invalidate()
     teams = env.linear_api.teams()
     pprint(teams)
 
@@ -43,16 +45,32 @@ def get_issue(identifier: str):
 
 
 @app.command(name="schema")
-def schema():
-    res = env.linear_api.schema()
+def schema(refresh: bool = False):
+    res = env.linear_api.schema(refresh=refresh)
     pprint(res)
 
 
 @app.command(name="ask")
-def ask(question: str):
+def ask(
+    question: str,
+    team: str = typer.Option(None, help="Retrieve context only from issues of this team"),
+    state: str = typer.Option(None, help="Retrieve context only from issues in this state"),
+    since: str = typer.Option(None, help="Retrieve context only from issues updated since (ISO date)"),
+):
+    from ema.agent import answer
+    from ema.retrieval import RetrievalFilters
+
+    if state:
+        state = env.linear_api.find_state(state, team)["name"]
+    if team:
+        team = env.linear_api.find_team(team).name
     user = os.getenv("CLI_USER")
     print("Asking question:", question)
-    answer(question=question, user=user)
+    answer(
+        question=question,
+        user=user,
+        filters=RetrievalFilters(team=team, state=state, since=since),
+    )
 
 
 @app.command(name="gql")
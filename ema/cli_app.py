@@ -1,24 +1,108 @@
+import ast
+import os
 import sys
+from functools import lru_cache
 from importlib import import_module
-import pkgutil
 
+import click
 import typer
+from typer.core import TyperGroup
 
 import ema.env as env
 
+COMMANDS_DIR = os.path.join(os.path.dirname(__file__), "commands")
+
+
+@lru_cache
+def command_index() -> dict[str, dict]:
+    """
+    Finds commands declared in ema/commands modules without importing them.
+
+    Returns:
+        {command name: {"module": ..., "help": ..., "hidden": ...}}
+    """
+    index = {}
+    for file in sorted(os.listdir(COMMANDS_DIR)):
+        if not file.endswith(".py") or file.startswith("_"):
+            continue
+        module = f"ema.commands.{file[:-3]}"
+        with open(os.path.join(COMMANDS_DIR, file), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.FunctionDef):
+                continue
+            for decorator in node.decorator_list:
+                if not (
+                    isinstance(decorator, ast.Call)
+                    and isinstance(decorator.func, ast.Attribute)
+                    and decorator.func.attr == "command"
+                ):
+                    continue
+                kwargs = {
+                    k.arg: k.value.value
+                    for k in decorator.keywords
+                    if isinstance(k.value, ast.Constant)
+                }
+                name = kwargs.get("name")
+                if decorator.args and isinstance(decorator.args[0], ast.Constant):
+                    name = decorator.args[0].value
+                docstring = (ast.get_docstring(node) or "").strip().split("\n")[0]
+                index[name or typer.main.get_command_name(node.name)] = dict(
+                    module=module,
+                    help=kwargs.get("help") or docstring,
+                    hidden=bool(kwargs.get("hidden")),
+                )
+    return index
+
+
+class LazyCommandsGroup(TyperGroup):
+    """
+    Lists commands of not imported ema/commands modules in the help output.
+    """
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(command_index()))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        command = super().get_command(ctx, cmd_name)
+        if command is None and (info := command_index().get(cmd_name)):
+            # Placeholder for the help output, the module is imported before dispatching
+            command = click.Command(cmd_name, help=info["help"], hidden=info["hidden"])
+        return command
+
 
 class CliApp(typer.Typer):
     def __call__(self, *args, **kwargs):
-        cli_bootstrap()
+        self.prepare()
         super().__call__(*args, **kwargs)
 
+    def prepare(self):
+        """Bootstraps the environment and imports only the module of the requested command"""
+        cli_bootstrap()
+        if command := requested_command():
+            import_commands(command)
+
+
+app = CliApp(cls=LazyCommandsGroup)
+
 
-app = CliApp()
+def requested_command(args: list[str] = None) -> str | None:
+    """Name of the command to run from CLI arguments, None if not specified (e.g. --help)"""
+    args = sys.argv[1:] if args is None else args
+    return next((arg for arg in args if not arg.startswith("-")), None)
 
 
-def import_commands():
-    for _, name, _ in pkgutil.iter_modules(["ema/commands"]):
-        import_module(f"ema.commands.{name}")
+def import_commands(command: str = None):
+    """
+    Imports the module declaring the command, or all command modules if `command` is omitted.
+    """
+    index = command_index()
+    if command:
+        if command in index:
+            import_module(index[command]["module"])
+        return
+    for module in sorted({info["module"] for info in index.values()}):
+        import_module(module)
 
 
 def cli_bootstrap():
@@ -0,0 +1,76 @@
+from time import time
+
+import microcore as mc
+import numpy as np
+from microcore import ui
+
+from ema.cli import app
+import ema.env as env
+from ema.duplicates import (
+    DUPLICATES_INFO_FILE,
+    DuplicatesConfig,
+    find_duplicates,
+    save_duplicates,
+    stored_counterparts,
+)
+
+
+@app.command("find-duplicates", help="Detect near-duplicate issues by embedding similarity")
+def find_duplicates_command(
+    full: bool = False,
+    threshold: float = None,
+    top_k: int = None,
+):
+    """
+    Stores candidate duplicate pairs in the issue_duplicates table.
+    By default only issues updated since the previous run are checked against the whole corpus.
+    """
+    start = time()
+    config = DuplicatesConfig()
+    if threshold is not None:
+        config.threshold = threshold
+    if top_k is not None:
+        config.top_k = top_k
+
+    print("Loading issue embeddings...")
+    metadatas, vectors = env.vector_db().embeddings("issues")
+    keep = [i for i, m in enumerate(metadatas) if m.get("issue_id")]
+    if not keep:
+        print(ui.red("No indexed issues"))
+        raise SystemExit(1)
+    if len(keep) < len(metadatas):
+        vectors = vectors[keep]
+    issue_ids = [metadatas[i]["issue_id"] for i in keep]
+    updated = np.array([metadatas[i].get("updated_ts") or 0 for i in keep], dtype=np.int64)
+
+    info = mc.storage.read_json(DUPLICATES_INFO_FILE, {})
+    last_checked = 0 if full else info.get("last_checked_ts", 0)
+    # Same-second updates may have been imported after the previous run
+    check_rows = np.flatnonzero(updated >= last_checked) if last_checked else np.arange(len(issue_ids))
+    checked = [issue_ids[r] for r in check_rows]
+    if last_checked:
+        # Pairs of the checked issues found from the other side only are re-found from there
+        rows = {issue_id: row for row, issue_id in enumerate(issue_ids)}
+        counterparts = [rows[i] for i in stored_counterparts(checked) if i in rows]
+        check_rows = np.union1d(check_rows, counterparts).astype(np.int64)
+    print(
+        f"Checking {ui.green(len(check_rows))} of {len(issue_ids)} issues "
+        f"(threshold {config.threshold}, top {config.top_k})..."
+    )
+    pairs = find_duplicates(issue_ids, vectors, check_rows.tolist(), config)
+    save_duplicates(pairs, checked if last_checked else None)
+
+    mc.storage.write_json(
+        DUPLICATES_INFO_FILE,
+        dict(
+            last_checked_ts=int(updated.max()),
+            checked=len(check_rows),
+            pairs=len(pairs),
+            threshold=config.threshold,
+            duration=time() - start,
+        ),
+        backup_existing=False,
+    )
+    for a, b, score in sorted(pairs, key=lambda p: -p[2])[:20]:
+        print(f"  {ui.green(a)} ~ {ui.green(b)}: {score}")
+    print(f"Found {ui.green(len(pairs))} candidate pairs in {time() - start:.2f} seconds.")
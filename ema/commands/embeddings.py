@@ -0,0 +1,82 @@
+from dataclasses import replace
+from time import time
+
+import numpy as np
+import typer
+from microcore import ui
+
+from ema.cli import app
+import ema.db as db
+from ema.embedding_server import EmbeddingServer, is_listening
+from ema.embeddings import (
+    EmbeddingBackend,
+    EmbeddingConfig,
+    LocalEmbeddingFunction,
+    cosine_drift,
+    create_embedding_function,
+)
+
+
+@app.command("embedding-parity", help="Compare embedding backend with the fp32 PyTorch baseline")
+def embedding_parity(backend: EmbeddingBackend = None, sample: int = 200):
+    config = EmbeddingConfig()
+    candidate_config = replace(config, backend=backend or config.backend)
+    texts = [
+        r["all_content"]
+        for r in db.sql(
+            "SELECT all_content FROM issues WHERE all_content IS NOT NULL ORDER BY RAND() LIMIT :n",
+            dict(n=sample),
+        )
+    ]
+    if not texts:
+        print(ui.red("No indexed issues to compare on"))
+        raise SystemExit(1)
+
+    results = {}
+    for name, cfg in (
+        ("baseline", replace(config, backend=EmbeddingBackend.TORCH)),
+        ("candidate", candidate_config),
+    ):
+        fn = LocalEmbeddingFunction(cfg)
+        fn.encode(texts[:1])  # warm-up
+        start = time()
+        results[name] = fn.encode(texts)
+        duration = time() - start
+        print(f"{fn.name}: {ui.green(f'{len(texts) / duration:.1f}')} texts/s")
+
+    drift = cosine_drift(results["baseline"], results["candidate"])
+    print(
+        f"Cosine similarity to baseline on {len(texts)} texts: "
+        f"mean {ui.green(round(drift['mean_cosine'], 5))}, "
+        f"min {ui.yellow(round(drift['min_cosine'], 5))}, "
+        f"max drift {ui.yellow(round(drift['max_drift'], 5))}"
+    )
+
+
+@app.command("embedding-server", help="Serve embeddings to other processes over a Unix socket")
+def embedding_server(
+    socket_path: str = typer.Option(None, "--socket", help="EMBEDDING_SERVER_SOCKET by default"),
+):
+    config = EmbeddingConfig()
+    socket_path = socket_path or config.server_socket
+    if not socket_path:
+        print(ui.red("EMBEDDING_SERVER_SOCKET is not configured"))
+        raise SystemExit(1)
+    if is_listening(socket_path):
+        print(ui.red(f"Embedding server is already running on {socket_path}"))
+        raise SystemExit(1)
+    fn = create_embedding_function(replace(config, server_socket=""))
+    fn(["warm-up"])
+    server = EmbeddingServer(
+        socket_path,
+        lambda texts: np.asarray(fn(texts), dtype=np.float32),
+        max_batch=config.server_max_batch,
+        max_wait=config.server_max_wait,
+    )
+    print(f"Serving {ui.green(config.model)} embeddings on {ui.green(socket_path)}...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
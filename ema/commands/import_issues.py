@@ -1,7 +1,9 @@
-import textwrap
-from datetime import datetime
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
 from time import time
 from enum import Enum
+from typing import Iterator
 
 from rich.progress import (
     Progress,
@@ -12,50 +14,122 @@ from rich.progress import (
     SpinnerColumn,
     TimeElapsedColumn,
 )
-from sqlalchemy import Table, text, update
-from sqlalchemy.dialects.mysql import insert
+import typer
+from sqlalchemy import text
 import microcore as mc
 from microcore import ui
 
 from ema.cli import app
 import ema.env as env
 import ema.db as db
+from ema.checkpoint import ImportCheckpoint
+from ema.indexing import (
+    INDEX_INFO_FILE,
+    VectorIndexer,
+    bump_index_version,
+    content_hash,
+    row_hash,
+    vector_metadata,
+)
 from ema.linear.issue import issue_view
-from ema.utils import format_dt, format_dt_human
+from ema.pipeline import Pipeline, Stage
+from ema.utils import format_dt
 
 
-@app.command("index-all-content")
-def index_all_content():
-    start = time()
-    mc.texts.clear("issues")
-    with db.session() as ses:
-        result = ses.execute(text("SELECT * FROM issues"))
-        rows = result.mappings().all()
-        issues_table = Table("issues", db.db_metadata, autoload_with=db.db_engine)
-
-        with Progress() as progress:
-            task = progress.add_task("[cyan]Indexing issues...", total=len(rows))
-            for row in rows:
-                issue = dict(row)
-                rendered = mc.tpl(
-                    "issue_view.j2",
-                    issue=row,
-                    indent=textwrap.indent,
-                    date_format=format_dt_human,
-                )
-                mc.texts.save("issues", rendered, {"issue_id": issue["id"]})
-                ses.execute(
-                    update(issues_table)
-                    .where(issues_table.c.id == issue["id"])
-                    .values(all_content=rendered)
-                )
+def init_worker():
+    """Configures MicroCore (templates) in render worker processes"""
+    env.configure(use_logging=False)
 
-                progress.update(task, advance=1)
 
-        ses.commit()
+def render_issue(row: dict) -> dict:
+    """Re-renders `all_content` of a stored issue row, recomputing its `content_hash`"""
+    row = {**row, "all_content": issue_view(row)}
+    return dict(
+        uuid=row["uuid"],
+        id=row["id"],
+        all_content=row["all_content"],
+        content_hash=row_hash(row),
+        metadata=vector_metadata(row),
+    )
+
+
+def stream_issues(batch_size: int) -> Iterator[dict]:
+    """Streams rows of the issues table using a server-side cursor"""
+    with db.engine().connect().execution_options(yield_per=batch_size) as conn:
+        for row in conn.execute(text("SELECT * FROM issues")).mappings():
+            yield dict(row)
+
+
+@app.command("index-all-content", help="Re-render all_content of stored issues and re-index them")
+def index_all_content(
+    clear: bool = typer.Option(False, help="Clear the vector collection before indexing"),
+    batch_size: int = typer.Option(500, envvar="IMPORT_BATCH_SIZE", help="Rows per DB write"),
+    embed_batch_size: int = typer.Option(
+        64, envvar="IMPORT_EMBED_BATCH_SIZE", help="Documents per embedding call"
+    ),
+    render_workers: int = typer.Option(
+        4, envvar="IMPORT_RENDER_WORKERS", help="Workers rendering issues"
+    ),
+    render_processes: bool = typer.Option(
+        True, envvar="IMPORT_RENDER_PROCESSES", help="Render in a process pool instead of threads"
+    ),
+):
+    start = time()
+    if clear:
+        mc.texts.clear("issues")
+    total = db.sql("SELECT COUNT(*) AS qty FROM issues")[0]["qty"]
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.completed}/{task.total}"),
+        TextColumn("{task.fields[rate]}"),
+        TimeElapsedColumn(),
+    ) as progress, db.BulkUpdater(
+        "issues", key="uuid", batch_size=batch_size
+    ) as writer, VectorIndexer(
+        "issues", embed_batch_size, before_flush=writer.flush
+    ) as indexer:
+
+        def write_row(row: dict) -> dict:
+            writer.add(
+                dict(
+                    uuid=row["uuid"],
+                    all_content=row["all_content"],
+                    content_hash=row["content_hash"],
+                )
+            )
+            return row
+
+        def index_row(row: dict):
+            indexer.add(row["id"], row["all_content"], row["metadata"])
+
+        counts = Pipeline(
+            [
+                Stage(
+                    "Render",
+                    render_issue,
+                    workers=render_workers,
+                    processes=render_processes,
+                    initializer=init_worker,
+                ),
+                Stage("DB write", write_row),
+                Stage("Embed", index_row),
+            ],
+            progress=progress,
+            total=total,
+            source_name="Read",
+        ).run(stream_issues(batch_size))
+        writer.flush()
+        indexer.flush()
 
     duration = time() - start
-    print(mc.ui.green(f"\n✅ Done: {len(rows)} issues updated."))
+    print(mc.ui.green(f"\n✅ Done: {counts['DB write']} issues updated."))
+    print(
+        f"Vector index: {indexer.saved} embedded, {indexer.updated} metadata updated, "
+        f"{indexer.skipped} unchanged"
+    )
     print(mc.ui.green(f"🕒 Took {duration:.2f} seconds."))
 
 
@@ -68,11 +142,21 @@ def index_vec():
 
     print("Querying RDBMS...")
     with db.session() as ses:
-        result = ses.execute(text("SELECT id, all_content FROM issues"))
+        result = ses.execute(text("SELECT id, all_content, team, state, updated_at FROM issues"))
         rows = result.mappings().all()
 
     print("Preparing data for vector db...")
-    data = [[row["all_content"], {"issue_id": row["id"]}] for row in rows]
+    data = [
+        [
+            row["all_content"],
+            {
+                **vector_metadata(row),
+                "issue_id": row["id"],
+                "content_hash": content_hash(row["all_content"]),
+            },
+        ]
+        for row in rows
+    ]
 
     chunk_size = 100
     total_chunks = (len(data) + chunk_size - 1) // chunk_size
@@ -91,6 +175,7 @@ def index_vec():
             chunk = data[i: i + chunk_size]
             mc.texts.save_many(collection, chunk)
             progress.update(task, advance=1)
+    bump_index_version()
 
     print(f"Done in {time() - start:.2f} seconds.")
 
@@ -178,12 +263,13 @@ def historical_assignees(task):
     items += [user_view(i["fromAssignee"]) for i in nodes if i["fromAssignee"]]
     if task["assignee"]:
         items += [user_view(task["assignee"])]
-    return ", ".join(set(items))
-
+    return ", ".join(sorted(set(items)))
 
-def process_task(task):
-    issues_table = Table("issues", db.db_metadata, autoload_with=db.db_engine)
 
+def map_issue(task: dict) -> dict:
+    """
+    Maps Linear issue to the `issues` table row, including rendered `all_content`
+    """
     task["history"]["nodes"].sort(key=lambda x: x["createdAt"])
     task["comments"]["nodes"].sort(key=lambda x: x["createdAt"])
 
@@ -240,26 +326,106 @@ def process_task(task):
         updated_at=format_dt(task["updatedAt"]),
     )
     data["all_content"] = issue_view(data)
-    with db.session() as ses:
-        stmt = insert(issues_table).values(data)
-        stmt = stmt.on_duplicate_key_update(**{k: stmt.inserted[k] for k in data.keys()})
-        # For PostgreSQL
-        # stmt = stmt.on_conflict_do_update(index_elements=['uuid'],  set_={k: stmt.excluded[k] for k in data.keys()})
-        ses.execute(stmt)
-        ses.commit()
-    mc.texts.delete("issues", what={"issue_id": data["id"]})
-    mc.texts.save("issues", data["all_content"], {"issue_id": data["id"]})
+    data["content_hash"] = row_hash(data)
+    return data
+
+
+def load_content_hashes() -> dict[str, str]:
+    """Returns {uuid: content_hash} of all stored issues"""
+    return {
+        r["uuid"]: r["content_hash"] for r in db.sql("SELECT uuid, content_hash FROM issues")
+    }
+
+
+def process_task(task, writer: db.BulkUpserter = None, indexer: VectorIndexer = None):
+    """
+    Stores Linear issue in the database and the vector index.
+
+    Args:
+        task: Linear issue
+        writer: Batched writer to buffer the row in; the row is written immediately if omitted.
+        indexer: Batched vector indexer to buffer the content in; indexed immediately if omitted.
+
+    A row equal to the stored one is not rewritten, but still passed to the indexer.
+    """
+    data = map_issue(task)
+    if writer:
+        writer.add(data)
+    else:
+        stored = db.sql("SELECT content_hash FROM issues WHERE uuid = :uuid", dict(uuid=data["uuid"]))
+        if not stored or stored[0]["content_hash"] != data["content_hash"]:
+            with db.BulkUpserter("issues") as single_writer:
+                single_writer.add(data)
+    if indexer:
+        indexer.add(data["id"], data["all_content"], vector_metadata(data))
+    else:
+        with VectorIndexer("issues", batch_size=1) as single_indexer:
+            single_indexer.add(data["id"], data["all_content"], vector_metadata(data))
+
+
+def hours_since(value: str, now: datetime = None) -> float:
+    """Hours since the time stored as a naive UTC string (`last_indexed`)"""
+    since = datetime.fromisoformat(value)
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return ((now or datetime.now(timezone.utc)) - since).total_seconds() / 3600
+
+
+def estimate_issue_qty(idx_info: dict, last_indexed: str, full: bool, now: datetime = None) -> int:
+    """
+    Estimates the number of issues to import from the previous run stats,
+    so the progress bar does not need a separate counting scan.
+    """
+    if full:
+        return idx_info.get("total_issues") or 0
+    rate = idx_info.get("updates_per_hour")
+    if not rate:
+        return 0
+    return max(round(rate * hours_since(last_indexed, now)), 1)
+
+
+CHECKPOINT_NAME = "linear_issues"
+
+
+def transform(item: tuple[int, dict]) -> tuple[int, dict]:
+    """Maps (checkpoint token, Linear issue) to (checkpoint token, `issues` row)"""
+    token, task = item
+    return token, map_issue(task)
 
 
 @app.command("index-issues", help="Import issues from Linear")
 @app.command("index_issues", hidden=True)
 @app.command("import_issues", hidden=True)
 @app.command("import-issues", hidden=True)
-def index_issues(force: bool = False, fast: bool = False):
+def index_issues(
+    force: bool = False,
+    resume: bool = typer.Option(
+        False, help="Continue an interrupted import from its last durable checkpoint"
+    ),
+    exact_count: bool = typer.Option(
+        False, help="Count matching issues before import for an exact progress bar"
+    ),
+    parallel: int = None,
+    batch_size: int = typer.Option(200, envvar="IMPORT_BATCH_SIZE", help="Rows per DB write"),
+    flush_interval: float = typer.Option(
+        5.0, envvar="IMPORT_FLUSH_INTERVAL", help="Max seconds between DB writes"
+    ),
+    embed_batch_size: int = typer.Option(
+        64, envvar="IMPORT_EMBED_BATCH_SIZE", help="Documents per embedding call"
+    ),
+    render_workers: int = typer.Option(
+        4, envvar="IMPORT_RENDER_WORKERS", help="Workers mapping and rendering issues"
+    ),
+    render_processes: bool = typer.Option(
+        True, envvar="IMPORT_RENDER_PROCESSES", help="Render in a process pool instead of threads"
+    ),
+    fast: bool = typer.Option(False, hidden=True, help="Deprecated, estimation is the default"),
+):
     print(ui.magenta("--==[[ Linear Issues Indexing ]]==--"))
     EPOCH_START = "1970-01-01"
-    idx_info_file = "idx_info/linear_issues.json"
-    last_indexed = mc.storage.read_json(idx_info_file, {}).get("last_indexed", EPOCH_START)
+    idx_info_file = INDEX_INFO_FILE
+    prev_idx_info = mc.storage.read_json(idx_info_file, {})
+    last_indexed = prev_idx_info.get("last_indexed", EPOCH_START)
 
     if force:
         last_indexed = EPOCH_START
@@ -267,54 +433,147 @@ def index_issues(force: bool = False, fast: bool = False):
         db.sql("DELETE FROM issues WHERE true")
         mc.texts.clear("issues")
         mc.storage.delete(idx_info_file)
-
-    if fast:
-        mc.ui.warning(
-            "--fast: True", mc.ui.red("progress will not reflect the actual number of issues")
+        ImportCheckpoint.delete(CHECKPOINT_NAME)
+
+    checkpoint = None if force else ImportCheckpoint.load(CHECKPOINT_NAME)
+    if checkpoint and resume:
+        last_indexed = checkpoint.updated_after
+        print(
+            f"Resuming import started at {ui.green(checkpoint.started_at)}, "
+            f"{len(checkpoint.finished)}/{len(checkpoint.partitions)} partitions done"
         )
-        issue_qty = 20  # arbitrary small start
     else:
+        if resume:
+            mc.ui.warning("No interrupted import to resume, starting a new one")
+        elif checkpoint:
+            mc.ui.warning("Previous import was interrupted, use --resume to continue it")
+        checkpoint = ImportCheckpoint(
+            CHECKPOINT_NAME,
+            updated_after=last_indexed,
+            partitions=env.linear_api.issue_partitions(parallel or env.linear_api.config.parallelism),
+            started_at=format_dt(datetime.now(timezone.utc)),
+        )
+
+    if exact_count:
         print("Calculating number of issues to index...")
         issue_qty = env.linear_api.fetch_issue_qty(updated_after=last_indexed)
         print(f"Total issues to index: {issue_qty}")
+    else:
+        issue_qty = estimate_issue_qty(prev_idx_info, last_indexed, last_indexed == EPOCH_START)
+        print(f"Estimated issues to index: {issue_qty or 'unknown'}")
 
     print(
         f"Last indexed: "
         f"{mc.ui.green(last_indexed) if last_indexed != EPOCH_START else mc.ui.red('never')}"
     )
 
-    records = []
-    t = time()
+    known_hashes = {} if last_indexed == EPOCH_START else load_content_hashes()
+    # Tokens of the issues waiting for the vector index flush, by issue id
+    pending: dict[str, list[int]] = defaultdict(list)
+    pending_lock = threading.Lock()
+
+    def on_indexed(issue_ids: list[str]):
+        with pending_lock:
+            tokens = [t for i in issue_ids for t in pending.pop(i, [])]
+        for token in tokens:
+            checkpoint.done(token)
+
+    def source():
+        for page in env.linear_api.iter_issues(
+            updated_after=last_indexed,
+            parallel=parallel,
+            pages=True,
+            partitions=checkpoint.remaining_partitions,
+            cursors=checkpoint.cursors,
+        ):
+            token = checkpoint.register(page)
+            for issue in page:
+                yield token, issue
 
+    t = time()
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         "[progress.percentage]{task.percentage:>3.1f}%",
         "•",
-        TextColumn("Imported: {task.completed}/{task.total}"),
+        TextColumn("{task.completed}/{task.total}"),
+        TextColumn("{task.fields[rate]}"),
         TimeElapsedColumn(),
-    ) as progress:
-
-        task_id = progress.add_task("[cyan]Indexing issues...", total=issue_qty)
-
-        def progress_callback(issue):
-            process_task(issue)
-            records.append(issue)
-
-            # Dynamically increase total in fast mode
-            if fast and progress.tasks[task_id].completed >= progress.tasks[task_id].total:
-                progress.update(task_id, total=progress.tasks[task_id].total * 5)
-
-            progress.advance(task_id)
-
-        env.linear_api.fetch_all_issues(callback=progress_callback, updated_after=last_indexed)
+    ) as progress, db.BulkUpserter(
+        "issues", batch_size, flush_interval, on_flush=checkpoint.save
+    ) as writer, VectorIndexer(
+        "issues", embed_batch_size, on_flush=on_indexed, before_flush=writer.flush
+    ) as indexer:
+
+        def detect_change(item: tuple[int, dict]) -> tuple[int, dict, bool]:
+            token, row = item
+            # Unchanged rows still go to the indexer, which skips already indexed texts:
+            # their vectors may be missing if a previous run failed after the DB write
+            return token, row, known_hashes.get(row["uuid"]) != row["content_hash"]
+
+        def write_row(item: tuple[int, dict, bool]) -> tuple[int, dict, bool]:
+            token, row, changed = item
+            if changed:
+                writer.add(row)
+            return item
+
+        def index_row(item: tuple[int, dict, bool]):
+            token, row, _ = item
+            with pending_lock:
+                pending[row["id"]].append(token)
+            indexer.add(row["id"], row["all_content"], vector_metadata(row))
+            writer.flush_if_due()
+
+        pipeline = Pipeline(
+            [
+                Stage(
+                    "Transform",
+                    transform,
+                    workers=render_workers,
+                    processes=render_processes,
+                    initializer=init_worker,
+                ),
+                Stage("Detect changes", detect_change),
+                Stage("DB write", write_row),
+                Stage("Embed", index_row),
+            ],
+            progress=progress,
+            total=issue_qty or None,
+            source_name="Fetch",
+        )
+        counts = pipeline.run(source())
+        writer.flush()
+        indexer.flush()
+        # Store the final checkpoint
+        writer.flush()
+    updated_records = counts["Fetch"]
+    changed_records = writer.written
 
     duration = time() - t
+    print(
+        f"Fetched {updated_records} updated issues: "
+        f"{ui.green(changed_records)} changed, {ui.yellow(updated_records - changed_records)} skipped"
+    )
+    print(
+        f"Vector index: {indexer.saved} embedded, {indexer.updated} metadata updated, "
+        f"{indexer.skipped} unchanged"
+    )
 
+    # Issues updated while the import was running may have been fetched before the update,
+    # so the next run starts not later than the start of this one
+    if checkpoint.high_water_mark:
+        last_indexed_now = min(checkpoint.high_water_mark, checkpoint.started_at)
+    else:
+        last_indexed_now = last_indexed
+    hours = hours_since(last_indexed)
     idx_info = {
-        "last_indexed": format_dt(datetime.now()),
+        "last_indexed": last_indexed_now,
         "duration": duration,
-        "updated_records": len(records),
+        "updated_records": updated_records,
+        "changed_records": changed_records,
+        "updates_per_hour": updated_records / hours if last_indexed != EPOCH_START else None,
+        "total_issues": db.sql("SELECT COUNT(*) AS qty FROM issues")[0]["qty"],
     }
     mc.storage.write_json(idx_info_file, idx_info, backup_existing=False)
+    ImportCheckpoint.delete(CHECKPOINT_NAME)
@@ -5,11 +5,11 @@ import textwrap
 import microcore as mc
 import typer
 from microcore import ui
-from slack_bolt import App
 
 from ema.cli import app
 import ema.db as db
 from ema.commands.slack import SlackConfig
+from ema.duplicates import issue_duplicates
 from ema.utils import format_dt, first_name, nick_name, full_name
 
 
@@ -51,6 +51,7 @@ def review(
     )
 
     qty_with_proposals = 0
+    qty_with_duplicates = 0
     qty_new = 0
     for issue in issues:
         print(mc.utils.dedent(
@@ -68,9 +69,14 @@ def review(
         res["proposals"] = [p for p in res["proposals"] if p.get("replace_from")]
         have_proposals = len(res["proposals"])
         print(ui.yellow(len(res["proposals"])) + " proposals" if have_proposals else ui.green("ok"))
+        duplicates = issue_duplicates(issue["id"])
+        if duplicates:
+            print(ui.yellow(f"  possible duplicates: {', '.join(d['duplicate_id'] for d in duplicates)}"))
+            res["duplicates"] = [dict(id=d["duplicate_id"], similarity=d["similarity"]) for d in duplicates]
         data[issue["id"]] = {"review_date": format_dt(datetime.now())}
-        if have_proposals:
-            qty_with_proposals += 1
+        qty_with_proposals += bool(have_proposals)
+        qty_with_duplicates += bool(duplicates)
+        if have_proposals or duplicates:
             data[issue["id"]] = {
                 **data[issue["id"]],
                 "id": issue["id"],
@@ -81,13 +87,18 @@ def review(
             }
         mc.storage.write_json("issue_reviews.json", data, backup_existing=False)
     print(f"Review completed in {ui.green(round(time()-t,2))} seconds.")
-    print(f"Analyzed {ui.green(qty_new)} new Linear issues, made proposals to {qty_with_proposals} of them.")
-    if notify and qty_with_proposals:
+    print(
+        f"Analyzed {ui.green(qty_new)} new Linear issues, made proposals to {qty_with_proposals} of them, "
+        f"found possible duplicates of {qty_with_duplicates}."
+    )
+    if notify and (qty_with_proposals or qty_with_duplicates):
         send_issue_reviews()
 
 
 @app.command()
 def send_issue_reviews():
+    from slack_bolt import App
+
     print(ui.magenta("---==[[Send issue reviews]]==---"))
     config = SlackConfig()
     slack_app = App(token=config.bot_token, signing_secret=config.signing_secret)
@@ -106,7 +117,7 @@ def send_issue_reviews():
         return None
 
     for issue_id, issue in data.items():
-        if not issue or issue.get("notified") or not issue.get("proposals"):
+        if not issue or issue.get("notified") or not (issue.get("proposals") or issue.get("duplicates")):
             continue  # Skip already notified or irrelevant issues
 
 
@@ -2,8 +2,6 @@ import logging
 from dataclasses import field, dataclass
 
 from microcore import ui
-from slack_bolt import App as SlackApp
-from slack_bolt.adapter.socket_mode import SocketModeHandler
 
 from ema.agent import answer
 from ema.interfaces import Interface
@@ -89,6 +87,9 @@ def message_handler(body, say, logger, slack_app):
 @cli_app.command()
 def slack():
     """CLI command to start the Slack bot."""
+    from slack_bolt import App as SlackApp
+    from slack_bolt.adapter.socket_mode import SocketModeHandler
+
     config = SlackConfig()
     slack_app = SlackApp(token=config.bot_token, signing_secret=config.signing_secret)
 
@@ -0,0 +1,175 @@
+from time import perf_counter
+
+import microcore as mc
+import numpy as np
+import typer
+from microcore import ui
+
+from ema.cli import app
+import ema.db as db
+from ema.vector_store import NumpyEmbeddingDB, VectorStoreConfig
+
+
+@app.command("vector-compact", help="Compact the numpy vector store collection (drop deleted rows)")
+def vector_compact(collection: str = "issues"):
+    store = NumpyEmbeddingDB(mc.env().config, VectorStoreConfig())
+    before = len(store._collection(collection).ids)
+    store.compact(collection)
+    print(f"Rows: {before} -> {ui.green(len(store._collection(collection).ids))}")
+
+
+@app.command("vector-benchmark", help="Compare numpy vector store with Chroma: recall and latency")
+def vector_benchmark(
+    queries: int = 100,
+    k: int = 10,
+    collection: str = "issues",
+    populate: bool = typer.Option(False, help="Copy Chroma documents to the numpy store first"),
+):
+    from ema.chroma import ChromaDB
+
+    config = mc.env().config
+    stores = {}
+    for name, create in (
+        ("chroma", lambda: ChromaDB(config)),
+        ("numpy", lambda: NumpyEmbeddingDB(config, VectorStoreConfig())),
+    ):
+        start = perf_counter()
+        stores[name] = create()
+        count = stores[name].count(collection)
+        print(f"{name}: {count} documents, opened in {ui.green(f'{perf_counter() - start:.3f}')}s")
+
+    if populate:
+        stores["numpy"].clear(collection)
+        docs = stores["chroma"].get_all(collection)
+        for i in range(0, len(docs), 500):
+            stores["numpy"].save_many(collection, [(d, d.metadata) for d in docs[i: i + 500]])
+        print(f"Copied {ui.green(len(docs))} documents to the numpy store")
+
+    texts = [
+        r["title"]
+        for r in db.sql("SELECT title FROM issues ORDER BY RAND() LIMIT :n", dict(n=queries))
+    ]
+    if not texts:
+        print(ui.red("No issues to take queries from"))
+        raise SystemExit(1)
+    # Warm-up: query embeddings get cached, so timings below measure the search itself
+    for text in texts:
+        config.EMBEDDING_DB_FUNCTION([text])
+
+    found, latency = {}, {}
+    for name, store in stores.items():
+        found[name], latency[name] = [], []
+        for text in texts:
+            start = perf_counter()
+            results = store.search(collection, text, n_results=k)
+            latency[name].append(perf_counter() - start)
+            found[name].append({r.metadata.get("issue_id") for r in results})
+        ms = np.array(latency[name]) * 1000
+        print(
+            f"{name}: p50 {ui.green(f'{np.percentile(ms, 50):.2f}')} ms, "
+            f"p95 {ui.yellow(f'{np.percentile(ms, 95):.2f}')} ms"
+        )
+
+    # numpy store search is exact, so it is the reference
+    recall = np.mean(
+        [len(c & e) / len(e) for c, e in zip(found["chroma"], found["numpy"]) if e]
+    )
+    print(f"Chroma recall@{k} against exact search: {ui.green(f'{recall:.3f}')}")
+
+
+@app.command("tune-index", help="Sweep HNSW parameters over a Chroma collection: recall, latency, memory")
+def tune_index(
+    collection: str = "issues",
+    queries: int = 100,
+    k: int = 10,
+    space: str = typer.Option(None, help="l2 / cosine / ip, VECTOR_STORE_HNSW_SPACE or l2 by default"),
+    m: str = typer.Option("8,16,32", help="Comma-separated values of hnsw:M"),
+    construction_ef: str = typer.Option("100,200", help="Comma-separated values of hnsw:construction_ef"),
+    search_ef: str = typer.Option("10,50,100,200", help="Comma-separated values of hnsw:search_ef"),
+    target_recall: float = 0.95,
+    report: str = "reports/tune_index.md",
+):
+    import shutil
+    import tempfile
+
+    import chromadb
+    from chromadb.config import Settings
+
+    from ema.chroma import ChromaDB
+    from ema.index_tuning import (
+        estimated_index_mb,
+        exact_top_k,
+        parameter_grid,
+        parse_values,
+        recall_at_k,
+        render_report,
+        rss_mb,
+    )
+
+    config = mc.env().config
+    settings = VectorStoreConfig()
+    space = space or settings.hnsw_space or "l2"
+    source = ChromaDB(config, settings)._get_collection(collection)
+    if source is None:
+        print(ui.red(f"Collection {collection} does not exist"))
+        raise SystemExit(1)
+    vectors = np.asarray(source.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+    texts = [
+        r["title"]
+        for r in db.sql("SELECT title FROM issues ORDER BY RAND() LIMIT :n", dict(n=queries))
+    ]
+    if not len(vectors) or not texts:
+        print(ui.red("No indexed documents or issues to take queries from"))
+        raise SystemExit(1)
+    query_vectors = np.asarray(config.EMBEDDING_DB_FUNCTION(texts), dtype=np.float32)
+    exact = exact_top_k(vectors, query_vectors, k, space)
+    print(f"{len(vectors)} vectors, {len(texts)} queries, exact top-{k} computed")
+
+    results = []
+    path = tempfile.mkdtemp(prefix="ema_tune_index_")
+    client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+    batch_size = client.get_max_batch_size()
+    try:
+        grid = parameter_grid(
+            space, parse_values(m), parse_values(construction_ef), parse_values(search_ef)
+        )
+        for params in grid:
+            rss_before = rss_mb()
+            start = perf_counter()
+            col = client.create_collection("tune_index", metadata=params, embedding_function=None)
+            for i in range(0, len(vectors), batch_size):
+                batch = vectors[i: i + batch_size]
+                col.add(ids=[str(j) for j in range(i, i + len(batch))], embeddings=batch.tolist())
+            build = perf_counter() - start
+            found, latency = [], []
+            for q in query_vectors:
+                start = perf_counter()
+                res = col.query(query_embeddings=[q.tolist()], n_results=k, include=[])
+                latency.append(perf_counter() - start)
+                found.append([int(i) for i in res["ids"][0]])
+            rss_after = rss_mb()
+            ms = np.array(latency) * 1000
+            result = dict(
+                params,
+                recall=recall_at_k(found, exact),
+                p50_ms=float(np.percentile(ms, 50)),
+                p95_ms=float(np.percentile(ms, 95)),
+                build_s=build,
+                index_mb=estimated_index_mb(len(vectors), vectors.shape[1], params["hnsw:M"]),
+                rss_mb=None if rss_before is None else rss_after - rss_before,
+            )
+            results.append(result)
+            print(
+                f"M={params['hnsw:M']} construction_ef={params['hnsw:construction_ef']} "
+                f"search_ef={params['hnsw:search_ef']}: recall@{k} {ui.green(round(result['recall'], 3))}, "
+                f"p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms"
+            )
+            client.delete_collection("tune_index")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    info = dict(collection=collection, vectors=len(vectors), queries=len(texts), k=k)
+    text = render_report(results, info, target_recall)
+    mc.storage.write(report, text, backup_existing=False)
+    print(text)
+    print(f"Report: {ui.green(mc.storage.abs_path(report))}")
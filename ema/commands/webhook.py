@@ -0,0 +1,112 @@
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+
+import microcore as mc
+from microcore import ui
+
+from ema.cli import app
+import ema.env as env
+import ema.db as db
+from ema.commands.import_issues import process_task
+from ema.indexing import bump_index_version
+from ema.linear.webhooks import STICKY_ACTIONS, CoalescingQueue, WebhookServer, replay_events
+from ema.utils import update_object_from_env
+
+
+@dataclass
+class WebhookConfig:
+    secret: str = field(default="")
+    host: str = field(default="0.0.0.0")
+    port: int = field(default=3000)
+    debounce: float = field(default=2.0)
+    """Seconds to wait for more events of the same issue before syncing it"""
+    max_delay: float = field(default=30.0)
+    max_age: float = field(default=60.0)
+    """Max allowed age of webhookTimestamp, seconds"""
+
+    def __post_init__(self):
+        update_object_from_env(self, prefixes=["LINEAR_WEBHOOK_"])
+
+
+def remove_issue(uuid: str):
+    rows = db.sql("SELECT id FROM issues WHERE uuid = :uuid", dict(uuid=uuid))
+    if rows:
+        mc.texts.delete("issues", what={"issue_id": rows[0]["id"]})
+    db.sql("DELETE FROM issues WHERE uuid = :uuid", dict(uuid=uuid))
+
+
+def sync_issues(changes: dict[str, str]):
+    """
+    Applies coalesced changes: {issue uuid: "upsert" | "remove"}
+    """
+    removed = [uuid for uuid, action in changes.items() if action == "remove"]
+    upserted = [uuid for uuid, action in changes.items() if action != "remove"]
+    for uuid in removed:
+        try:
+            remove_issue(uuid)
+            print(f"{ui.green('✓')} removed {uuid}")
+        except Exception as e:
+            logging.exception(e)
+            print(ui.red(f"Failed to remove issue {uuid}: {e}"))
+    if removed:
+        bump_index_version()  # Cached search results may include removed issues
+    if not upserted:
+        return
+    try:
+        issues = env.linear_api.issues_by_ids(upserted)
+    except Exception as e:
+        logging.exception(e)
+        print(ui.red(f"Failed to fetch {len(upserted)} issues: {e}"))
+        return
+    for issue in issues:
+        try:
+            process_task(issue)
+            print(f"{ui.green('✓')} updated {issue['identifier']}")
+        except Exception as e:
+            logging.exception(e)
+            print(ui.red(f"Failed to update issue {issue['identifier']}: {e}"))
+    # Full-text results change with DB rows even if vectors are unchanged
+    bump_index_version()
+
+
+def sync_worker(queue: CoalescingQueue, stop: threading.Event):
+    while not stop.is_set():
+        if changes := queue.get_ready(timeout=1):
+            sync_issues(changes)
+
+
+@app.command(help="Receive Linear webhooks and keep indexed issues up to date")
+def webhook():
+    config = WebhookConfig()
+    if not config.secret:
+        print(ui.red("LINEAR_WEBHOOK_SECRET is not configured"))
+        raise SystemExit(1)
+    queue = CoalescingQueue(
+        delay=config.debounce, max_delay=config.max_delay, sticky=STICKY_ACTIONS
+    )
+    server = WebhookServer((config.host, config.port), config.secret, queue, config.max_age)
+    stop = threading.Event()
+    worker = threading.Thread(target=sync_worker, args=(queue, stop), daemon=True)
+    worker.start()
+    print(f"Listening for Linear webhooks on {ui.green(f'{config.host}:{config.port}')}...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stop.set()
+        worker.join()
+        if changes := queue.get_ready(timeout=0):
+            sync_issues(changes)
+
+
+@app.command("webhook-replay", help="Send recorded Linear webhook events (JSON lines) to receiver")
+def webhook_replay(file: str, url: str = "http://localhost:3000/"):
+    config = WebhookConfig()
+    with open(file, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    statuses = replay_events(events, url, config.secret)
+    print(f"Sent {len(statuses)} events, statuses: {ui.green(statuses)}")
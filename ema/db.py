@@ -1,26 +1,46 @@
 import os
+import threading
+from time import time
+from typing import Callable
 
-from sqlalchemy import Engine, MetaData, create_engine
+from sqlalchemy import Connection, Engine, MetaData, Table, bindparam, create_engine, update
+from sqlalchemy.dialects.mysql import insert
 from sqlalchemy.exc import OperationalError
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy import text
 from microcore import ui
 
-session: sessionmaker
-db_engine: Engine
-db_metadata: MetaData
+session_factory: sessionmaker = None
+db_engine: Engine = None
+db_metadata: MetaData = None
+_init_lock = threading.Lock()
 
 
 def init_db(verbose=False):
-    global session, db_engine, db_metadata
+    global session_factory, db_engine, db_metadata
 
     db_engine = create_engine(os.getenv("DB_URL"), echo=verbose, future=True)
-    session = sessionmaker(bind=db_engine)
+    session_factory = sessionmaker(bind=db_engine)
     db_metadata = MetaData()
     # logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     # check_db_connection()
 
 
+def engine() -> Engine:
+    """Returns the DB engine, initializing it on first use"""
+    if db_engine is None:
+        with _init_lock:
+            if db_engine is None:
+                init_db()
+    return db_engine
+
+
+def session() -> Session:
+    """Opens a new ORM session"""
+    engine()
+    return session_factory()
+
+
 def check_db_connection():
     print("Checking database connection... ", end="")
     try:
@@ -33,7 +53,6 @@ def check_db_connection():
 
 
 def sql(query: str, params: dict = None):
-    global session
     with session() as ses:
         stmt = text(query)
         result = ses.execute(stmt, params or {})
@@ -44,3 +63,108 @@ def sql(query: str, params: dict = None):
             rows = None
         ses.commit()
     return rows
+
+
+def table(name: str) -> Table:
+    """Returns table metadata, reflecting it from the database only once"""
+    engine()
+    if name not in db_metadata.tables:
+        Table(name, db_metadata, autoload_with=db_engine)
+    return db_metadata.tables[name]
+
+
+class BulkUpserter:
+    """
+    Buffers rows and writes them as multi-row `INSERT ... ON DUPLICATE KEY UPDATE`,
+    one transaction per batch.
+
+    A batch is flushed when it reaches `batch_size` rows or when a row is added
+    more than `flush_interval` seconds after the previous flush.
+    Use as a context manager to flush the remaining rows on exit.
+
+    `on_flush(conn)`, if given, is called within the transaction of each batch
+    (e.g. to store a checkpoint atomically with the rows).
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        batch_size: int = 200,
+        flush_interval: float = 5.0,
+        on_flush: Callable[[Connection], None] = None,
+    ):
+        self.table = table(table_name)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.rows: list[dict] = []
+        self.written = 0
+        self._last_flush = time()
+        self._lock = threading.Lock()
+
+    def add(self, row: dict):
+        with self._lock:
+            self.rows.append(row)
+            if (
+                len(self.rows) >= self.batch_size
+                or time() - self._last_flush >= self.flush_interval
+            ):
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def flush_if_due(self):
+        """Flushes if `flush_interval` has passed, even with no rows buffered (to run `on_flush`)"""
+        with self._lock:
+            if time() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        self._last_flush = time()
+        if not self.rows and not self.on_flush:
+            return
+        rows, self.rows = self.rows, []
+        with engine().begin() as conn:
+            if rows:
+                self._write(conn, rows)
+            if self.on_flush:
+                self.on_flush(conn)
+        self.written += len(rows)
+
+    def _write(self, conn: Connection, rows: list[dict]):
+        stmt = insert(self.table).values(rows)
+        stmt = stmt.on_duplicate_key_update(**{k: stmt.inserted[k] for k in rows[0].keys()})
+        # For PostgreSQL
+        # stmt = stmt.on_conflict_do_update(
+        #     index_elements=['uuid'], set_={k: stmt.excluded[k] for k in rows[0].keys()}
+        # )
+        conn.execute(stmt)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+
+class BulkUpdater(BulkUpserter):
+    """
+    Buffers partial rows and writes them as batched (executemany) `UPDATE ... WHERE key = ...`.
+
+    Rows must contain the `key` column and the same set of updated columns.
+    """
+
+    def __init__(self, table_name: str, key: str = "uuid", **kwargs):
+        super().__init__(table_name, **kwargs)
+        self.key = key
+
+    def _write(self, conn: Connection, rows: list[dict]):
+        columns = [k for k in rows[0] if k != self.key]
+        stmt = (
+            update(self.table)
+            .where(self.table.c[self.key] == bindparam(f"_{self.key}"))
+            .values({c: bindparam(c) for c in columns})
+        )
+        conn.execute(stmt, [{**row, f"_{self.key}": row[self.key]} for row in rows])
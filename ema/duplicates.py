@@ -0,0 +1,148 @@
+"""
+Near-duplicate issue detection by blocked cosine similarity of issue embeddings.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+from sqlalchemy import bindparam, text
+
+import ema.db as db
+from ema.utils import update_object_from_env
+from ema.vector_store import normalize
+
+DUPLICATES_TABLE = "issue_duplicates"
+DUPLICATES_INFO_FILE = "idx_info/duplicates.json"
+"""`last_checked_ts`: max `updated_ts` of the issues already checked"""
+
+
+@dataclass
+class DuplicatesConfig:
+    threshold: float = field(default=0.92)
+    """Min cosine similarity of duplicate candidates"""
+    top_k: int = field(default=5)
+    """Max candidates per issue"""
+    block_size: int = field(default=4096)
+    """Corpus rows per similarity block; memory: query_block_size * block_size floats"""
+    query_block_size: int = field(default=1024)
+
+    def __post_init__(self):
+        update_object_from_env(self, prefixes=["DUPLICATES_"])
+
+
+def top_k_similar(
+    queries: np.ndarray,
+    corpus: np.ndarray,
+    k: int,
+    query_rows: np.ndarray = None,
+    block_size: int = 4096,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k cosine similarity of each query to the corpus, block by block.
+    `query_rows` (corpus row of each query) excludes self-matches.
+
+    Returns:
+        (corpus rows, similarities), both of shape (len(queries), k), best first;
+        missing entries have row -1 and similarity -inf.
+    """
+    queries = normalize(np.asarray(queries, dtype=np.float32))
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_rows = np.full((len(queries), k), -1, dtype=np.int64)
+    for start in range(0, len(corpus), block_size):
+        block = normalize(np.asarray(corpus[start: start + block_size], dtype=np.float32))
+        scores = queries @ block.T
+        if query_rows is not None:
+            own = (query_rows >= start) & (query_rows < start + len(block))
+            scores[np.flatnonzero(own), query_rows[own] - start] = -np.inf
+        rows = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        rows = np.concatenate([best_rows, rows], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_rows = np.take_along_axis(rows, top, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+def find_duplicates(
+    issue_ids: list[str],
+    vectors: np.ndarray,
+    check_rows: list[int],
+    config: DuplicatesConfig,
+) -> list[tuple[str, str, float]]:
+    """
+    Candidate duplicate pairs of the issues in `check_rows` against the whole corpus.
+
+    Returns:
+        [(issue_id, duplicate_id, similarity), ...], each pair once with issue_id < duplicate_id.
+    """
+    pairs = {}
+    check_rows = np.asarray(check_rows, dtype=np.int64)
+    k = min(config.top_k, len(issue_ids) - 1)
+    if k < 1:
+        return []
+    for start in range(0, len(check_rows), config.query_block_size):
+        rows = check_rows[start: start + config.query_block_size]
+        found, scores = top_k_similar(vectors[rows], vectors, k, rows, config.block_size)
+        for row, row_found, row_scores in zip(rows, found, scores):
+            for other, score in zip(row_found, row_scores):
+                if score < config.threshold:
+                    break
+                pair = tuple(sorted((issue_ids[row], issue_ids[other])))
+                if pair[0] != pair[1]:
+                    pairs[pair] = max(pairs.get(pair, -1.0), round(float(score), 4))
+    return [(a, b, score) for (a, b), score in pairs.items()]
+
+
+def stored_counterparts(issue_ids: list[str]) -> list[str]:
+    """
+    Other issues stored as duplicates of the given ones.
+    An incremental check re-checks them too: `save_duplicates` drops all pairs of the checked
+    issues, including pairs found only from the counterpart side (top-k is not symmetric).
+    """
+    stmt = text(
+        f"SELECT DISTINCT issue_id FROM {DUPLICATES_TABLE} WHERE duplicate_id IN :ids"
+    ).bindparams(bindparam("ids", expanding=True))
+    found = set()
+    with db.engine().connect() as conn:
+        for i in range(0, len(issue_ids), 1000):
+            found.update(r[0] for r in conn.execute(stmt, dict(ids=issue_ids[i: i + 1000])))
+    return sorted(found - set(issue_ids))
+
+
+def save_duplicates(pairs: list[tuple[str, str, float]], checked: list[str] = None):
+    """
+    Stores pairs in both directions, replacing pairs of the `checked` issues
+    (all pairs if `checked` is None) in one transaction.
+    `pairs` of an incremental check must include pairs of their `stored_counterparts`.
+    """
+    with db.engine().begin() as conn:
+        if checked is None:
+            conn.execute(text(f"DELETE FROM {DUPLICATES_TABLE}"))
+        else:
+            stmt = text(
+                f"DELETE FROM {DUPLICATES_TABLE} WHERE issue_id IN :ids OR duplicate_id IN :ids"
+            ).bindparams(bindparam("ids", expanding=True))
+            for i in range(0, len(checked), 1000):
+                conn.execute(stmt, dict(ids=checked[i: i + 1000]))
+        rows = [
+            dict(issue_id=x, duplicate_id=y, similarity=score)
+            for a, b, score in pairs
+            for x, y in ((a, b), (b, a))
+        ]
+        if rows:
+            conn.execute(
+                text(
+                    f"REPLACE INTO {DUPLICATES_TABLE} (issue_id, duplicate_id, similarity) "
+                    "VALUES (:issue_id, :duplicate_id, :similarity)"
+                ),
+                rows,
+            )
+
+
+def issue_duplicates(issue_id: str) -> list[dict]:
+    """Stored duplicate candidates of the issue, most similar first"""
+    return db.sql(
+        f"SELECT duplicate_id, similarity FROM {DUPLICATES_TABLE} "
+        "WHERE issue_id = :id ORDER BY similarity DESC",
+        dict(id=issue_id),
+    )
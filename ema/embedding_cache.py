@@ -0,0 +1,177 @@
+"""
+Persistent embedding cache in memory-mapped files.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process locking
+    fcntl = None
+
+KEY_SIZE = 20  # sha1 digest
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Size-bounded LRU cache of embeddings of one model, keyed by text hash.
+
+    Stored in `<path>/<model>/` as fixed-size memory-mapped arrays:
+    `keys.bin` (text hashes), `ticks.bin` (last access, 0 for free slots)
+    and `vectors.bin` (float32 embeddings), so opening the cache does not read
+    the vectors and updates touch only the changed slots.
+    When full, least recently used entries are evicted.
+    Files are created on the first `put_many`, when the embedding dimension is known.
+
+    The files may be shared by several processes: writers hold an exclusive file lock
+    and reload the slot index before allocating slots, readers hold a shared one
+    and check that the slot still holds the requested key.
+    The access clock is synced between processes on writes only, so their LRU order is approximate.
+    """
+
+    def __init__(self, path: str, model: str, capacity: int = 200_000):
+        self.path = os.path.join(path, re.sub(r"[^\w.-]+", "_", model))
+        self.model = model
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.keys = self.ticks = self.vectors = None
+        self._slots: dict[bytes, int] = {}
+        self._tick = 0
+        self._lock = threading.RLock()
+        if os.path.exists(self._file("meta.json")):
+            with self._locked():
+                self._open()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        with self._lock:
+            if fcntl is None or not os.path.isdir(self.path):
+                yield
+                return
+            with open(self._file(".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open(self, dim: int = None):
+        meta_file = self._file("meta.json")
+        if dim is None:
+            with open(meta_file, encoding="utf-8") as f:
+                meta = json.load(f)
+            dim, self.capacity, mode = meta["dim"], meta["capacity"], "r+"
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            with open(meta_file, "w", encoding="utf-8") as f:
+                json.dump(dict(model=self.model, dim=dim, capacity=self.capacity), f)
+            mode = "w+"
+        self.keys = np.memmap(
+            self._file("keys.bin"), np.uint8, mode, shape=(self.capacity, KEY_SIZE)
+        )
+        self.ticks = np.memmap(self._file("ticks.bin"), np.int64, mode, shape=(self.capacity,))
+        self.vectors = np.memmap(
+            self._file("vectors.bin"), np.float32, mode, shape=(self.capacity, dim)
+        )
+        self._load_slots()
+
+    def _load_slots(self):
+        """Rebuilds the slot index from the files, which other processes may have changed"""
+        used = np.flatnonzero(self.ticks)
+        keys = self.keys[used]
+        self._slots = {keys[i].tobytes(): int(slot) for i, slot in enumerate(used)}
+        self._tick = max(self._tick, int(self.ticks.max()) if len(used) else 0)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        """Returns cached embeddings, None for misses"""
+        with self._locked():
+            if self.vectors is None and os.path.exists(self._file("meta.json")):
+                self._open()
+            result = []
+            for text in texts:
+                key = text_key(text)
+                slot = self._slots.get(key)
+                if slot is not None and self.keys[slot].tobytes() != key:
+                    # Evicted and reused by another process
+                    del self._slots[key]
+                    slot = None
+                if slot is None:
+                    self.misses += 1
+                    result.append(None)
+                    continue
+                self.hits += 1
+                self._tick += 1
+                self.ticks[slot] = self._tick
+                result.append(np.array(self.vectors[slot]))
+            return result
+
+    def put_many(self, texts: list[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        os.makedirs(self.path, exist_ok=True)
+        with self._locked(exclusive=True):
+            if self.vectors is None:
+                # Another process may have created the files meanwhile
+                self._open(None if os.path.exists(self._file("meta.json")) else vectors.shape[1])
+            else:
+                self._load_slots()
+            new = {}
+            for text, vector in zip(texts, vectors):
+                key = text_key(text)
+                if key in self._slots:
+                    self._write(self._slots[key], vector)
+                else:
+                    new[key] = vector
+            for slot, (key, vector) in zip(self._free_slots(len(new)), new.items()):
+                self._slots[key] = slot
+                self.keys[slot] = np.frombuffer(key, np.uint8)
+                self._write(slot, vector)
+            self._flush()
+
+    def _write(self, slot: int, vector: np.ndarray):
+        self.vectors[slot] = vector
+        self._tick += 1
+        self.ticks[slot] = self._tick
+
+    def _free_slots(self, qty: int) -> list[int]:
+        """Returns `qty` free slots (at most capacity), evicting least recently used entries"""
+        qty = min(qty, self.capacity)
+        if not qty:
+            return []
+        free = np.flatnonzero(self.ticks == 0)[:qty].tolist()
+        if need := qty - len(free):
+            # All free slots are taken already, evict the least recently used of the rest
+            used_ticks = np.where(self.ticks == 0, np.iinfo(np.int64).max, self.ticks)
+            evicted = np.argpartition(used_ticks, need - 1)[:need].tolist()
+            for slot in evicted:
+                key = self.keys[slot].tobytes()
+                if self._slots.get(key) == slot:
+                    del self._slots[key]
+                self.ticks[slot] = 0
+            free += evicted
+        return free
+
+    def flush(self):
+        with self._locked():
+            self._flush()
+
+    def _flush(self):
+        for array in (self.keys, self.ticks, self.vectors):
+            if array is not None:
+                array.flush()
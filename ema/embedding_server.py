@@ -0,0 +1,260 @@
+"""
+Local embedding service: one loaded model shared by processes over a Unix socket.
+
+Wire format (both directions): 4-byte big-endian length + JSON header,
+responses are followed by the float32 embeddings (n * dim values).
+"""
+import errno
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from concurrent.futures import Future
+from queue import Empty, Queue
+from time import monotonic
+from typing import Callable
+
+import numpy as np
+
+_LENGTH = struct.Struct(">I")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b""):
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(data)) + data + payload)
+
+
+def recv_header(sock: socket.socket) -> dict:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+class MicroBatcher:
+    """
+    Collects texts of concurrent requests into batches for one embedding call.
+
+    A batch is processed when it reaches `max_batch` texts
+    or `max_wait` seconds after its first request.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list[str]], np.ndarray],
+        max_batch: int = 64,
+        max_wait: float = 0.01,
+    ):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self._queue: Queue[tuple[list[str], Future]] = Queue()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: list[str]) -> Future:
+        future = Future()
+        self._queue.put((texts, future))
+        return future
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def _collect(self) -> list[tuple[list[str], Future]]:
+        try:
+            requests = [self._queue.get(timeout=0.2)]
+        except Empty:
+            return []
+        size = len(requests[0][0])
+        deadline = monotonic() + self.max_wait
+        while size < self.max_batch and (timeout := deadline - monotonic()) > 0:
+            try:
+                request = self._queue.get(timeout=timeout)
+            except Empty:
+                break
+            requests.append(request)
+            size += len(request[0])
+        return requests
+
+    def _run(self):
+        while not self._stop.is_set():
+            requests = self._collect()
+            if not requests:
+                continue
+            texts = [t for request_texts, _ in requests for t in request_texts]
+            try:
+                vectors = np.asarray(self.fn(texts), dtype=np.float32)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            offset = 0
+            for request_texts, future in requests:
+                future.set_result(vectors[offset: offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def close(self):
+        self._stop.set()
+        self._worker.join()
+
+
+class EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    server: "EmbeddingServer"
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_header(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                vectors = self.server.batcher.embed(request["texts"])
+            except Exception as e:
+                logging.exception(e)
+                send_message(self.request, {"error": str(e)})
+                continue
+            send_message(
+                self.request,
+                {"n": len(vectors), "dim": vectors.shape[1] if len(vectors) else 0},
+                vectors.tobytes(),
+            )
+
+
+def is_listening(socket_path: str) -> bool:
+    """Whether a server accepts connections on the socket"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+        return True
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Serves embeddings of `fn` over a Unix socket, micro-batching concurrent requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str,
+        fn: Callable[[list[str]], np.ndarray],
+        max_batch: int = 64,
+        max_wait: float = 0.01,
+    ):
+        if os.path.exists(socket_path):
+            if is_listening(socket_path):
+                raise OSError(errno.EADDRINUSE, f"Embedding server is already running at {socket_path}")
+            os.unlink(socket_path)  # Stale socket of a stopped server
+        super().__init__(socket_path, EmbeddingRequestHandler)
+        self.socket_path = socket_path
+        self.batcher = MicroBatcher(fn, max_batch, max_wait)
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class EmbeddingClient:
+    """
+    Client of the `EmbeddingServer`, keeps one connection per thread.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 60):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def close(self):
+        if sock := getattr(self._local, "sock", None):
+            sock.close()
+            self._local.sock = None
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        sock = self._connection()
+        try:
+            send_message(sock, {"texts": list(texts)})
+            header = recv_header(sock)
+            if "error" in header:
+                raise RuntimeError(f"Embedding server error: {header['error']}")
+            payload = _recv_exact(sock, header["n"] * header["dim"] * 4)
+        except (OSError, RuntimeError):
+            self.close()
+            raise
+        return np.frombuffer(payload, dtype=np.float32).reshape(header["n"], header["dim"])
+
+
+class RemoteEmbeddingFunction:
+    """
+    Embedding function using the local embedding server,
+    falls back to in-process inference (created by `fallback` on first need) when it is down
+    or fails to embed.
+    The server is retried after `retry_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        fallback: Callable[[], Callable],
+        name: str = "",
+        timeout: float = 60,
+        retry_interval: float = 30,
+    ):
+        self.client = EmbeddingClient(socket_path, timeout)
+        self.name = name
+        self.retry_interval = retry_interval
+        self._fallback_factory = fallback
+        self._fallback = None
+        self._server_down_at = None
+        self._lock = threading.Lock()
+
+    def fallback(self) -> Callable:
+        with self._lock:
+            if self._fallback is None:
+                self._fallback = self._fallback_factory()
+            return self._fallback
+
+    def __call__(self, input):
+        texts = list(input)
+        if self._server_down_at is None or monotonic() - self._server_down_at > self.retry_interval:
+            try:
+                vectors = self.client.embed(texts)
+                self._server_down_at = None
+                return vectors.tolist()
+            except (OSError, RuntimeError) as e:
+                if self._server_down_at is None:
+                    logging.warning(f"Embedding server unavailable ({e}), embedding in-process")
+                self._server_down_at = monotonic()
+        return self.fallback()(texts)
@@ -0,0 +1,160 @@
+"""
+Local embedding function with selectable CPU inference backend.
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from ema.embedding_cache import EmbeddingCache
+from ema.embedding_server import RemoteEmbeddingFunction
+from ema.utils import update_object_from_env
+
+
+class EmbeddingBackend(str, Enum):
+    TORCH = "torch"
+    """PyTorch fp32 (baseline)"""
+    ONNX = "onnx"
+    """ONNX Runtime"""
+    INT8 = "int8"
+    """PyTorch with linear layers dynamically quantized to int8"""
+
+
+@dataclass
+class EmbeddingConfig:
+    model: str = field(default="paraphrase-multilingual-MiniLM-L12-v2")
+    backend: EmbeddingBackend = field(default=EmbeddingBackend.TORCH)
+    batch_size: int = field(default=32)
+    threads: int = field(default=0)
+    """Number of CPU threads used for inference, 0: library default"""
+    onnx_file: str = field(default="")
+    """ONNX model file within the model repository (e.g. onnx/model_qint8_avx512.onnx), exported if empty"""
+    device: str = field(default="cpu")
+    cache_dir: str = field(default="storage/embedding_cache")
+    """Persistent embedding cache location, empty to disable"""
+    cache_size: int = field(default=200_000)
+    """Max number of cached embeddings"""
+    server_socket: str = field(default="")
+    """Unix socket of the shared embedding server (`ema embedding-server`), empty: embed in-process"""
+    server_max_batch: int = field(default=64)
+    server_max_wait: float = field(default=0.01)
+    """Seconds the server waits for more concurrent requests to batch them together"""
+
+    _ENV_PREFIXES = ["EMBEDDING_"]
+
+    def __post_init__(self):
+        update_object_from_env(self, prefixes=self._ENV_PREFIXES)
+        self.backend = EmbeddingBackend(self.backend)
+
+
+def model_name(config: EmbeddingConfig) -> str:
+    return f"{config.model}:{config.backend.value}"
+
+
+def load_model(config: EmbeddingConfig):
+    """Loads SentenceTransformer model for the configured backend"""
+    from sentence_transformers import SentenceTransformer
+
+    if config.backend == EmbeddingBackend.ONNX:
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        if config.onnx_file:
+            model_kwargs["file_name"] = config.onnx_file
+        if config.threads:
+            import onnxruntime
+
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = config.threads
+            model_kwargs["session_options"] = session_options
+        return SentenceTransformer(
+            config.model, device="cpu", backend="onnx", model_kwargs=model_kwargs
+        )
+
+    import torch
+
+    if config.threads:
+        torch.set_num_threads(config.threads)
+    model = SentenceTransformer(config.model, device=config.device)
+    if config.backend == EmbeddingBackend.INT8:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+class LocalEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function computing sentence-transformers embeddings in-process.
+    """
+
+    def __init__(self, config: EmbeddingConfig = None):
+        self.config = config or EmbeddingConfig()
+        self.model = load_model(self.config)
+
+    @property
+    def name(self) -> str:
+        return model_name(self.config)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            list(texts), batch_size=self.config.batch_size, convert_to_numpy=True
+        ).astype(np.float32)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.encode(input).tolist()
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Wraps embedding function with the persistent `EmbeddingCache`:
+    only texts missing in the cache are embedded.
+    """
+
+    def __init__(self, fn: EmbeddingFunction, cache: EmbeddingCache):
+        self.fn = fn
+        self.cache = cache
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            embedded = np.asarray(self.fn([texts[i] for i in missing]), dtype=np.float32)
+            self.cache.put_many([texts[i] for i in missing], embedded)
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+        return [v.tolist() for v in vectors]
+
+
+def create_embedding_function(config: EmbeddingConfig = None) -> EmbeddingFunction:
+    """
+    Creates the configured embedding function.
+    With the embedding server configured, the server is used (it keeps the embedding cache)
+    and the model is loaded in-process only if the server is unavailable.
+    """
+    config = config or EmbeddingConfig()
+    if config.server_socket:
+        return RemoteEmbeddingFunction(
+            config.server_socket,
+            fallback=lambda: LocalEmbeddingFunction(config),
+            name=model_name(config),
+        )
+    fn = LocalEmbeddingFunction(config)
+    if not config.cache_dir:
+        return fn
+    return CachedEmbeddingFunction(fn, EmbeddingCache(config.cache_dir, fn.name, config.cache_size))
+
+
+def cosine_drift(baseline: np.ndarray, candidate: np.ndarray) -> dict:
+    """
+    Compares embeddings of the same texts row by row.
+
+    Returns:
+        dict: mean / min cosine similarity and max drift (1 - cosine).
+    """
+    baseline = baseline / np.linalg.norm(baseline, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosine = np.sum(baseline * candidate, axis=1)
+    return dict(
+        mean_cosine=float(cosine.mean()),
+        min_cosine=float(cosine.min()),
+        max_drift=float(1 - cosine.min()),
+    )
@@ -2,12 +2,12 @@ import sys
 
 import dotenv
 import microcore as mc
-from chromadb.utils import embedding_functions
 from microcore import ui
+from microcore._env import Env
 from colorama import Fore, Style
 
 import ema
-from ema.db import init_db
+from ema.lazy import Lazy, LazyEmbeddingFunction
 from ema.linear_api import LinearApi, LinearConfig
 
 
@@ -15,6 +15,39 @@ DEFAULT_ENV_FILE = ".env.mi"
 linear_api: LinearApi
 
 
+class EmaEnv(Env):
+    """MicroCore environment connecting the vector DB (selected by VECTOR_STORE_BACKEND) on first use"""
+
+    def init_similarity_search(self):
+        def connect():
+            from ema.vector_store import NumpyEmbeddingDB, VectorBackend, VectorStoreConfig
+
+            settings = VectorStoreConfig()
+            if settings.backend == VectorBackend.NUMPY:
+                return NumpyEmbeddingDB(self.config, settings)
+
+            from ema.chroma import ChromaDB
+
+            return ChromaDB(self.config, settings=settings)
+
+        self.texts = Lazy(connect)
+
+
+def vector_db():
+    """
+    The configured vector DB backend.
+    Use it for backend methods missing in `AbstractEmbeddingDB`, such as `embeddings()`,
+    `update_metadata()` and `search_by_vector()`: `mc.texts` forwards only the abstract interface.
+    """
+    return mc.env().texts
+
+
+def embedding_function():
+    from ema.embeddings import create_embedding_function
+
+    return create_embedding_function()
+
+
 def print_logo():
     green = Fore.GREEN  # For borders
     bright = Style.BRIGHT
@@ -52,11 +85,19 @@ def bootstrap(env_file: str = DEFAULT_ENV_FILE):
         print(f"\t{ui.gray('env override: ')}{ui.green('.env.win_override')}")
 
     linear_api = LinearApi(LinearConfig())
-    mc.configure(
-        USE_DOT_ENV=False,
-        USE_LOGGING=True,
-        EMBEDDING_DB_FUNCTION=embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="paraphrase-multilingual-MiniLM-L12-v2"
-        ),
+    configure()
+
+
+def configure(use_logging: bool = True):
+    """
+    Configures MicroCore from the environment variables, without printing anything;
+    also used to initialize worker processes, which inherit the environment of the parent.
+    """
+    # Embedding model, vector DB and DB connection are initialized on first use
+    EmaEnv(
+        mc.Config(
+            USE_DOT_ENV=False,
+            USE_LOGGING=use_logging,
+            EMBEDDING_DB_FUNCTION=LazyEmbeddingFunction(embedding_function),
+        )
     )
-    init_db()
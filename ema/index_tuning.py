@@ -0,0 +1,91 @@
+"""
+Helpers of `ema tune-index`: exact search baseline, recall and the report.
+"""
+import itertools
+import os
+
+import numpy as np
+
+from ema.vector_store import normalize
+
+
+def parse_values(values: str) -> list[int]:
+    return [int(v) for v in values.split(",") if v.strip()]
+
+
+def parameter_grid(space: str, m: list[int], construction_ef: list[int], search_ef: list[int]):
+    """HNSW collection metadata for each parameter combination"""
+    return [
+        {"hnsw:space": space, "hnsw:M": m_, "hnsw:construction_ef": c, "hnsw:search_ef": s}
+        for m_, c, s in itertools.product(m, construction_ef, search_ef)
+    ]
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, space: str = "l2") -> np.ndarray:
+    """Brute-force nearest rows of `vectors` for each query by the HNSW space distance"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    if space == "cosine":
+        vectors, queries = normalize(vectors), normalize(queries)
+    if space == "l2":
+        # |q - v|^2 without |q|^2, which is the same for all rows
+        distances = np.sum(vectors**2, axis=1)[None, :] - 2 * queries @ vectors.T
+    else:
+        distances = -(queries @ vectors.T)
+    k = min(k, len(vectors))
+    top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(distances, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(found: list[list[int]], exact: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(e.tolist())) / len(e) for f, e in zip(found, exact)]))
+
+
+def estimated_index_mb(rows: int, dim: int, m: int) -> float:
+    """hnswlib base layer: vector, 2*M links, link count and label per element"""
+    return rows * (dim * 4 + 2 * m * 4 + 4 + 8) / 2**20
+
+
+def rss_mb() -> float | None:
+    """Current resident memory of the process (Linux only)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def recommend(results: list[dict], target_recall: float) -> dict | None:
+    """Fastest (p50) parameter set reaching the target recall"""
+    good = [r for r in results if r["recall"] >= target_recall]
+    return min(good, key=lambda r: r["p50_ms"]) if good else None
+
+
+def render_report(results: list[dict], info: dict, target_recall: float) -> str:
+    lines = [
+        "# HNSW parameter sweep",
+        "",
+        ", ".join(f"{k}: {v}" for k, v in info.items()),
+        "",
+        "| space | M | construction_ef | search_ef | recall@k | p50 ms | p95 ms "
+        "| build s | index MB (est.) | RSS +MB |",
+        "|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        rss = "n/a" if r["rss_mb"] is None else f"{r['rss_mb']:.1f}"
+        lines.append(
+            f"| {r['hnsw:space']} | {r['hnsw:M']} | {r['hnsw:construction_ef']} "
+            f"| {r['hnsw:search_ef']} | {r['recall']:.3f} | {r['p50_ms']:.2f} | {r['p95_ms']:.2f} "
+            f"| {r['build_s']:.1f} | {r['index_mb']:.1f} | {rss} |"
+        )
+    best = recommend(results, target_recall)
+    lines += ["", f"Fastest with recall >= {target_recall}: "]
+    if best:
+        lines[-1] += ", ".join(
+            f"VECTOR_STORE_HNSW_{key.split(':')[1].upper()}={best[key]}"
+            for key in ("hnsw:space", "hnsw:M", "hnsw:construction_ef", "hnsw:search_ef")
+        )
+    else:
+        lines[-1] += "none"
+    return "\n".join(lines) + "\n"
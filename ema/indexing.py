@@ -0,0 +1,149 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from time import time_ns
+from typing import Callable
+
+import microcore as mc
+
+import ema.env as env
+
+
+INDEX_INFO_FILE = "idx_info/linear_issues.json"
+"""Import stats in the storage, `last_indexed` marks the version of the index"""
+
+VECTOR_INDEX_VERSION_FILE = "idx_info/vector_index_version.txt"
+"""Rewritten on every change of the indexed issues, invalidates cached search results"""
+
+ROW_HASH_IGNORED_FIELDS = ("content_hash", "updated_at")
+"""`updated_at` moves on changes of fields we don't store, so it is not a part of row hash"""
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def row_hash(row: dict) -> str:
+    """Hash of the mapped `issues` row (including rendered all_content)"""
+    return content_hash(
+        json.dumps(
+            {k: v for k, v in row.items() if k not in ROW_HASH_IGNORED_FIELDS},
+            sort_keys=True,
+            default=str,
+        )
+    )
+
+
+def vector_metadata(row: dict) -> dict:
+    """Filterable metadata of the issue document in the vector collection"""
+    updated_at = row.get("updated_at")
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    if updated_at and updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)  # Stored in UTC
+    return {
+        "team": row.get("team") or "",
+        "state": row.get("state") or "",
+        "updated_ts": int(updated_at.timestamp()) if updated_at else 0,
+    }
+
+
+def bump_index_version():
+    """Marks a change of the indexed issues, see `ema.retrieval.index_version`"""
+    mc.storage.write(VECTOR_INDEX_VERSION_FILE, str(time_ns()), backup_existing=False)
+
+
+def read_index_version() -> str | None:
+    return mc.storage.read(VECTOR_INDEX_VERSION_FILE, default=None)
+
+
+class VectorIndexer:
+    """
+    Buffers issue texts and writes them to the vector collection in batches.
+
+    Each flush embeds the whole batch in one `save_many` call and skips texts
+    whose hash matches the `content_hash` metadata already stored for the issue;
+    if only other metadata changed, it is updated without re-embedding
+    (re-saved if the backend has no `update_metadata()`).
+    Use as a context manager to flush the remaining texts on exit.
+
+    `before_flush()`, if given, is called before a batch is written,
+    e.g. to commit the DB rows of the batch first, so vectors never outlive a failed DB write.
+    `on_flush(issue_ids)`, if given, is called after each flush with the ids
+    that are now indexed (saved or already up to date).
+    """
+
+    def __init__(
+        self,
+        collection: str = "issues",
+        batch_size: int = 64,
+        on_flush: Callable[[list[str]], None] = None,
+        before_flush: Callable[[], None] = None,
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.before_flush = before_flush
+        self.items: dict[str, tuple[str, dict]] = {}
+        self.saved = 0
+        self.updated = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def add(self, issue_id: str, text: str, metadata: dict = None):
+        with self._lock:
+            self.items[issue_id] = (text, metadata or {})
+            if len(self.items) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self.items:
+            return
+        if self.before_flush:
+            self.before_flush()
+        items, self.items = self.items, {}
+        ids = list(items)
+        indexed = {
+            doc.metadata.get("issue_id"): doc
+            for doc in mc.texts.get(self.collection, where={"issue_id": {"$in": ids}})
+        }
+        changed, updated = [], {}
+        for issue_id, (text, metadata) in items.items():
+            text_hash = content_hash(text)
+            metadata = {**metadata, "issue_id": issue_id, "content_hash": text_hash}
+            stored = indexed.get(issue_id)
+            if stored is None or stored.metadata.get("content_hash") != text_hash:
+                changed.append((text, metadata))
+            elif any(stored.metadata.get(k) != v for k, v in metadata.items()):
+                updated[stored.id] = (text, metadata)
+            else:
+                self.skipped += 1
+        if updated:
+            backend = env.vector_db()
+            if hasattr(backend, "update_metadata"):
+                metadatas = [metadata for _, metadata in updated.values()]
+                backend.update_metadata(self.collection, list(updated), metadatas)
+                self.updated += len(updated)
+            else:
+                changed += updated.values()
+        if changed:
+            stale = [m["issue_id"] for _, m in changed if m["issue_id"] in indexed]
+            if stale:
+                mc.texts.delete(self.collection, {"issue_id": {"$in": stale}})
+            mc.texts.save_many(self.collection, changed)
+            self.saved += len(changed)
+        if changed or updated:
+            bump_index_version()
+        if self.on_flush:
+            self.on_flush(ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
@@ -0,0 +1,41 @@
+"""
+Proxies deferring creation of heavy resources (and imports they need) until first use.
+"""
+import threading
+from typing import Callable
+
+
+class Lazy:
+    """
+    Proxy creating the wrapped object by `factory` on first attribute access.
+    """
+
+    def __init__(self, factory: Callable):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def instance(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    object.__setattr__(self, "_instance", self._factory())
+        return self._instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.instance, name)
+
+
+class LazyEmbeddingFunction(Lazy):
+    """
+    Embedding function loading the model on the first call.
+    The call signature matches chromadb `EmbeddingFunction` protocol.
+    """
+
+    def __call__(self, input):
+        return self.instance(input)
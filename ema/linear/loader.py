@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ema.linear_api import LinearApi
+
+
+class IssueLoader:
+    """
+    Coalesces single-issue lookups (DataLoader-style).
+
+    Lookups made within `window` seconds are collected and resolved
+    by one `LinearApi.issues_by_ids` request; a batch reaching `max_batch`
+    is dispatched immediately. Repeated ids within a batch share one future.
+    """
+
+    def __init__(self, api: "LinearApi", window: float = 0.01, max_batch: int = 50):
+        self.api = api
+        self.window = window
+        self.max_batch = max_batch
+        self._batch: dict[str, Future] = {}
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def load(self, uuid: str) -> Future:
+        """Schedules issue lookup, returns future resolving to the issue dict"""
+        with self._lock:
+            if uuid in self._batch:
+                return self._batch[uuid]
+            future = self._batch[uuid] = Future()
+            if len(self._batch) >= self.max_batch:
+                batch = self._take_batch()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self.dispatch)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._resolve(batch)
+        return future
+
+    def load_many(self, uuids: list[str]) -> list[Future]:
+        return [self.load(uuid) for uuid in uuids]
+
+    def get(self, uuid: str) -> dict:
+        return self.load(uuid).result()
+
+    def dispatch(self):
+        """Resolves the pending batch now"""
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self._resolve(batch)
+
+    def _take_batch(self) -> dict[str, Future]:
+        batch, self._batch = self._batch, {}
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _resolve(self, batch: dict[str, Future]):
+        try:
+            issues = {issue["id"]: issue for issue in self.api.issues_by_ids(list(batch))}
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+            return
+        for uuid, future in batch.items():
+            if uuid in issues:
+                future.set_result(issues[uuid])
+            else:
+                future.set_exception(KeyError(f"Issue not found: {uuid}"))
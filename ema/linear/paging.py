@@ -0,0 +1,50 @@
+import threading
+
+
+class AdaptivePageSize:
+    """
+    Page size of a paginated Linear query, adjusted to the reported query complexity.
+
+    Linear computes complexity from the requested page size, so the cost of one node
+    is learned from `X-Complexity` of previous pages and the next page is sized
+    to fit `target_complexity` (and the remaining complexity budget).
+    Light queries grow up to `max_size`, heavy ones shrink; a page rejected as too
+    complex halves the size and caps further growth at the halved size.
+    Shared between threads paginating the same query.
+    """
+
+    def __init__(
+        self, initial: int, target_complexity: int, min_size: int = 1, max_size: int = 250
+    ):
+        self.size = max(min_size, min(initial, max_size))
+        self.target_complexity = target_complexity
+        self.min_size = min_size
+        self.max_size = max_size
+        self.node_cost: float | None = None
+        self._lock = threading.Lock()
+
+    def record(self, requested: int, complexity: int | None, budget_remaining: int = None):
+        """Learns node cost from a successful page of `requested` size"""
+        if not complexity or not requested:
+            return
+        with self._lock:
+            cost = complexity / requested
+            self.node_cost = cost if self.node_cost is None else 0.7 * self.node_cost + 0.3 * cost
+            target = self.target_complexity
+            if budget_remaining is not None:
+                target = min(target, budget_remaining)
+            self.size = max(self.min_size, min(self.max_size, int(target / self.node_cost)))
+
+    def shrink(self, rejected: int) -> bool:
+        """
+        Handles a page of `rejected` size failed for complexity.
+
+        Returns:
+            False if the page size can't be reduced any further.
+        """
+        with self._lock:
+            if rejected <= self.min_size:
+                return False
+            self.max_size = max(self.min_size, min(self.max_size, rejected // 2))
+            self.size = min(self.size, self.max_size)
+            return True
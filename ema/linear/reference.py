@@ -0,0 +1,142 @@
+import threading
+from time import time
+from typing import TYPE_CHECKING
+
+import microcore as mc
+
+if TYPE_CHECKING:
+    from ema.linear_api import LinearApi
+
+REFERENCE_FIELDS = {
+    "teams": "id name key",
+    "workflowStates": "id name type team { id }",
+    "users": "id name displayName active",
+    "cycles": "id name number startsAt endsAt team { id }",
+    "projects": "id name url",
+}
+"""
+Reference-data connections and the fields fetched for them.
+Personal data not needed for lookups (e.g. user emails) is not fetched, since the cache may be persisted.
+"""
+
+
+class ReferenceCache:
+    """
+    Cache of rarely changing Linear entities (see `REFERENCE_FIELDS`).
+
+    Each kind is fetched as a whole on first use, kept for `ttl` seconds
+    and indexed by id, key and lowercase name / display name.
+    A lookup miss refreshes the kind at most once per `miss_refresh_interval` seconds.
+    When `storage_file` is set, the cache is persisted via microcore storage,
+    so next CLI invocations start warm.
+    """
+
+    def __init__(
+        self,
+        api: "LinearApi",
+        ttl: int = 3600,
+        storage_file: str = None,
+        miss_refresh_interval: float = 60,
+    ):
+        self.api = api
+        self.ttl = ttl
+        self.storage_file = storage_file
+        self.miss_refresh_interval = miss_refresh_interval
+        self._miss_refreshed_at: dict[str, float] = {}
+        self._data: dict[str, dict] = {}
+        self._indexes: dict[str, dict[str, dict]] = {}
+        self._lock = threading.RLock()
+        self._loaded_from_storage = False
+
+    def _load_storage(self):
+        if self._loaded_from_storage or not self.storage_file:
+            return
+        self._loaded_from_storage = True
+        stored = mc.storage.read_json(self.storage_file, {})
+        for kind, entry in stored.items():
+            if kind in REFERENCE_FIELDS and kind not in self._data:
+                self._set(kind, entry["items"], entry["fetched_at"])
+
+    def _save_storage(self):
+        if not self.storage_file:
+            return
+        mc.storage.write_json(self.storage_file, self._data, backup_existing=False)
+
+    def _set(self, kind: str, items: list[dict], fetched_at: float):
+        self._data[kind] = {"items": items, "fetched_at": fetched_at}
+        index = {}
+        for item in items:
+            index[item["id"]] = item
+            if item.get("key"):
+                index[item["key"]] = item
+            for name in (item.get("name"), item.get("displayName")):
+                if name:
+                    index.setdefault(name.lower(), item)
+        self._indexes[kind] = index
+
+    def _is_fresh(self, kind: str) -> bool:
+        entry = self._data.get(kind)
+        return bool(entry) and time() - entry["fetched_at"] < self.ttl
+
+    def get(self, kind: str) -> list[dict]:
+        """Returns all cached entities of the given kind, fetching them if missing or expired"""
+        if kind not in REFERENCE_FIELDS:
+            raise ValueError(f"Unknown reference data kind: {kind}")
+        with self._lock:
+            self._load_storage()
+            if not self._is_fresh(kind):
+                items = [
+                    node
+                    for page in self.api.paginate(kind, REFERENCE_FIELDS[kind])
+                    for node in page
+                ]
+                self._set(kind, items, time())
+                self._save_storage()
+            return self._data[kind]["items"]
+
+    def _match(self, kind: str, value: str, team_id: str = None) -> dict | None:
+        if not team_id:
+            index = self._indexes[kind]
+            return index.get(value) or index.get(value.lower())
+        # Names of team-scoped entities (e.g. workflow states) repeat across teams
+        for item in self._data[kind]["items"]:
+            if (item.get("team") or {}).get("id") == team_id and (
+                value in (item["id"], item.get("key"))
+                or (item.get("name") or "").lower() == value.lower()
+            ):
+                return item
+        return None
+
+    def find(self, kind: str, value: str, team_id: str = None) -> dict | None:
+        """
+        Finds entity by id, key or name (case-insensitive),
+        optionally among entities of the given team only.
+        A miss triggers a refresh, since the entity may be new,
+        unless the kind was fetched or refreshed on a miss recently.
+        """
+        if not value:
+            return None
+        for attempt in range(2):
+            self.get(kind)
+            with self._lock:
+                if item := self._match(kind, value, team_id):
+                    return item
+                now = time()
+                if (
+                    attempt == 0
+                    and now - self._data[kind]["fetched_at"] > 1
+                    and now - self._miss_refreshed_at.get(kind, 0) >= self.miss_refresh_interval
+                ):
+                    self._miss_refreshed_at[kind] = now
+                    self.invalidate(kind)
+                    continue
+            return None
+
+    def invalidate(self, kind: str = None):
+        """Drops cached entities of the given kind, or the whole cache"""
+        with self._lock:
+            self._load_storage()
+            for k in [kind] if kind else list(self._data):
+                self._data.pop(k, None)
+                self._indexes.pop(k, None)
+            self._save_storage()
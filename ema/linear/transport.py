@@ -0,0 +1,227 @@
+import random
+import threading
+from dataclasses import dataclass
+from time import sleep, time
+
+import requests
+from requests.adapters import HTTPAdapter
+from microcore import ui
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LinearApiError(Exception):
+    """
+    Linear API request failed (HTTP or GraphQL level).
+
+    Attributes:
+        status_code (int | None): HTTP status code, None for network errors
+        gql_errors (list[dict]): GraphQL errors returned by the API
+    """
+
+    def __init__(self, message: str, status_code: int = None, gql_errors: list[dict] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.gql_errors = gql_errors or []
+
+    @property
+    def codes(self) -> list[str]:
+        return [(e.get("extensions") or {}).get("code", "") for e in self.gql_errors]
+
+    @property
+    def is_too_complex(self) -> bool:
+        return any("complex" in e.get("message", "").lower() for e in self.gql_errors)
+
+    @property
+    def is_rate_limited(self) -> bool:
+        return self.status_code == 429 or "RATELIMITED" in self.codes
+
+
+def _header_int(headers, name: str) -> int | None:
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class RateLimitState:
+    """
+    Rate-limit budgets reported by Linear in response headers.
+    Reset values are unix timestamps in seconds.
+    """
+
+    requests_limit: int | None = None
+    requests_remaining: int | None = None
+    requests_reset: float | None = None
+    complexity_limit: int | None = None
+    complexity_remaining: int | None = None
+    complexity_reset: float | None = None
+    last_complexity: int | None = None
+
+    def update(self, headers):
+        def reset(name):
+            # Linear reports reset time as epoch milliseconds
+            value = _header_int(headers, name)
+            return value / 1000 if value and value > 10**11 else value
+
+        if (v := _header_int(headers, "X-RateLimit-Requests-Limit")) is not None:
+            self.requests_limit = v
+        if (v := _header_int(headers, "X-RateLimit-Requests-Remaining")) is not None:
+            self.requests_remaining = v
+        if (v := reset("X-RateLimit-Requests-Reset")) is not None:
+            self.requests_reset = v
+        if (v := _header_int(headers, "X-RateLimit-Complexity-Limit")) is not None:
+            self.complexity_limit = v
+        if (v := _header_int(headers, "X-RateLimit-Complexity-Remaining")) is not None:
+            self.complexity_remaining = v
+        if (v := reset("X-RateLimit-Complexity-Reset")) is not None:
+            self.complexity_reset = v
+        if (v := _header_int(headers, "X-Complexity")) is not None:
+            self.last_complexity = v
+
+    def pacing_delay(self, reserve: float, now: float = None) -> float:
+        """
+        Seconds to wait before the next request to stay within the budgets.
+
+        When a budget is nearly exhausted, waits until its reset.
+        When it drops below `reserve` share of the limit, spreads the rest evenly until reset.
+        """
+        now = now or time()
+        delays = [0.0]
+        budgets = [
+            (self.requests_remaining, self.requests_limit, self.requests_reset, 1),
+            (
+                self.complexity_remaining,
+                self.complexity_limit,
+                self.complexity_reset,
+                self.last_complexity or 1,
+            ),
+        ]
+        for remaining, limit, reset, cost in budgets:
+            if remaining is None or not reset or reset <= now:
+                continue
+            if remaining < cost:
+                delays.append(reset - now)
+            elif limit and remaining < limit * reserve:
+                delays.append((reset - now) / max(remaining // cost, 1))
+        return max(delays)
+
+
+@dataclass
+class LinearResponse:
+    data: dict | None
+    complexity: int | None = None
+
+
+class LinearTransport:
+    """
+    Pooled HTTP transport for Linear GraphQL API.
+
+    Keeps connections alive between requests, retries transient failures
+    with exponential backoff and jitter, and paces requests according to the
+    rate-limit headers so throttling is avoided rather than recovered from.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        headers: dict,
+        pool_size: int = 10,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60,
+        timeout: float = 60,
+        rate_limit_reserve: float = 0.1,
+    ):
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.rate_limit_reserve = rate_limit_reserve
+        self.rate_limit = RateLimitState()
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _retry_delay(self, attempt: int, response: requests.Response | None) -> float:
+        if response is not None:
+            if retry_after := _header_int(response.headers, "Retry-After"):
+                return min(retry_after, self.backoff_max)
+            with self._lock:
+                resets = [
+                    r
+                    for r in (self.rate_limit.requests_reset, self.rate_limit.complexity_reset)
+                    if r and r > time()
+                ]
+            if resets and response.status_code in (400, 429):
+                return min(min(resets) - time(), self.backoff_max)
+        return self.backoff(attempt)
+
+    def post(self, query: str, variables: dict = None) -> LinearResponse:
+        attempt = 0
+        while True:
+            with self._lock:
+                delay = self.rate_limit.pacing_delay(self.rate_limit_reserve)
+            if delay > 0:
+                print(ui.yellow(f"⏳ Linear rate limit is close, waiting {delay:.1f}s..."))
+                sleep(delay)
+
+            response = None
+            try:
+                response = self.session.post(
+                    self.api_url,
+                    json={"query": query, "variables": variables},
+                    timeout=self.timeout,
+                )
+                with self._lock:
+                    self.rate_limit.update(response.headers)
+                error = self._check(response)
+                if error is None:
+                    return LinearResponse(
+                        data=response.json().get("data"),
+                        complexity=_header_int(response.headers, "X-Complexity"),
+                    )
+                retryable = error.is_rate_limited or error.status_code in RETRYABLE_STATUS_CODES
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, retryable = LinearApiError(f"Linear API is unreachable: {e}"), True
+
+            if not retryable or attempt >= self.max_retries:
+                raise error
+            delay = self._retry_delay(attempt, response)
+            attempt += 1
+            print(
+                ui.yellow(
+                    f"⚠ {error} (attempt {attempt}/{self.max_retries}), retrying in {delay:.1f}s..."
+                )
+            )
+            sleep(delay)
+
+    @staticmethod
+    def _check(response: requests.Response) -> LinearApiError | None:
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        errors = payload.get("errors") if isinstance(payload, dict) else None
+        if response.ok and (not errors or payload.get("data")):
+            return None
+        message = (
+            "; ".join(e.get("message", "") for e in errors)
+            if errors
+            else f"HTTP {response.status_code} {response.reason}"
+        )
+        return LinearApiError(
+            f"Linear API error: {message}", status_code=response.status_code, gql_errors=errors
+        )
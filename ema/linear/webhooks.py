@@ -0,0 +1,167 @@
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, time
+
+import requests
+from microcore import ui
+
+SIGNATURE_HEADER = "Linear-Signature"
+
+
+def sign(body: bytes, secret: str) -> str:
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: str, secret: str) -> bool:
+    return bool(signature) and hmac.compare_digest(sign(body, secret), signature)
+
+
+def affected_issue(event: dict) -> tuple[str, str] | None:
+    """
+    Resolves the issue affected by a Linear webhook event.
+
+    Returns:
+        (issue uuid, "upsert" | "remove") or None for events not related to issues.
+    """
+    data = event.get("data") or {}
+    if event.get("type") == "Issue" and data.get("id"):
+        return data["id"], "remove" if event.get("action") == "remove" else "upsert"
+    if event.get("type") in ("Comment", "Attachment", "IssueLabel", "Reaction"):
+        issue_id = data.get("issueId") or (data.get("issue") or {}).get("id")
+        if issue_id:
+            return issue_id, "upsert"
+    return None
+
+
+STICKY_ACTIONS = ("remove",)
+"""Issue actions not overridden by later events for the same issue within a coalescing window"""
+
+
+class CoalescingQueue:
+    """
+    Queue of keyed items where bursts of puts for the same key collapse into one.
+
+    An item becomes ready `delay` seconds after the last put for its key,
+    but not later than `max_delay` seconds after the first one.
+    The latest value wins, except that pending `sticky` values are not replaced
+    (e.g. an issue removal followed by late comment events is still a removal).
+    """
+
+    def __init__(self, delay: float = 2.0, max_delay: float = 30.0, sticky: tuple = ()):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.sticky = sticky
+        self._pending: dict[str, tuple[float, float, object]] = {}
+        self._cond = threading.Condition()
+
+    def put(self, key: str, value=None):
+        with self._cond:
+            now = monotonic()
+            first = now
+            if key in self._pending:
+                first, _, pending_value = self._pending[key]
+                if pending_value in self.sticky:
+                    value = pending_value
+            ready_at = min(now + self.delay, first + self.max_delay)
+            self._pending[key] = (first, ready_at, value)
+            self._cond.notify()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def get_ready(self, timeout: float = None) -> dict[str, object]:
+        """
+        Waits until some items are ready (or timeout) and pops all ready items.
+        """
+        deadline = monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                now = monotonic()
+                ready = {k: v for k, (_, ready_at, v) in self._pending.items() if ready_at <= now}
+                if ready:
+                    for k in ready:
+                        del self._pending[k]
+                    return ready
+                waits = [ready_at - now for _, ready_at, _ in self._pending.values()]
+                if deadline is not None:
+                    if now >= deadline:
+                        return {}
+                    waits.append(deadline - now)
+                self._cond.wait(min(waits) if waits else None)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """
+    HTTP server receiving Linear webhooks.
+
+    Verifies `Linear-Signature` and `webhookTimestamp` of each request
+    and puts the affected issues into the coalescing queue.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        secret: str,
+        queue: CoalescingQueue,
+        max_age: float = 60,
+    ):
+        super().__init__(address, WebhookRequestHandler)
+        self.secret = secret
+        self.queue = queue
+        self.max_age = max_age
+
+    def accept(self, body: bytes, signature: str) -> tuple[int, str]:
+        if self.secret and not verify_signature(body, signature, self.secret):
+            return 401, "Invalid signature"
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return 400, "Invalid JSON"
+        timestamp = event.get("webhookTimestamp")
+        if self.max_age and timestamp and abs(time() - timestamp / 1000) > self.max_age:
+            return 401, "Stale webhook"
+        if target := affected_issue(event):
+            self.queue.put(*target)
+            return 200, "Queued"
+        return 200, "Ignored"
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    server: WebhookServer
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        status, message = self.server.accept(body, self.headers.get(SIGNATURE_HEADER, ""))
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.end_headers()
+        self.wfile.write(message.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        print(ui.gray(f"[webhook] {self.address_string()} {format % args}"))
+
+
+def replay_events(events: list[dict], url: str, secret: str) -> list[int]:
+    """
+    Posts recorded webhook events to the receiver, signed and with fresh timestamps.
+
+    Returns:
+        list[int]: HTTP status codes of the responses.
+    """
+    statuses = []
+    with requests.Session() as session:
+        for event in events:
+            body = json.dumps({**event, "webhookTimestamp": int(time() * 1000)}).encode("utf-8")
+            response = session.post(
+                url,
+                data=body,
+                headers={"Content-Type": "application/json", SIGNATURE_HEADER: sign(body, secret)},
+            )
+            statuses.append(response.status_code)
+    return statuses
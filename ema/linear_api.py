@@ -1,14 +1,24 @@
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from queue import Full, Queue
+from time import time
+from typing import Callable, Iterator
 
-import requests
 from rich.pretty import pprint
 import microcore as mc
 from microcore import ui
 
-from ema.utils import update_object_from_env
+from ema.linear.loader import IssueLoader
+from ema.linear.paging import AdaptivePageSize
+from ema.linear.reference import ReferenceCache
+from ema.linear.transport import LinearApiError, LinearTransport
+from ema.utils import format_dt, update_object_from_env
 
-ISSUE_FRAGMENT = """
+ISSUE_LIGHT_FRAGMENT = """
 fragment IssueFields on Issue {
     id
     identifier
@@ -17,13 +27,6 @@ fragment IssueFields on Issue {
     state { name }
     assignee { displayName, name }
     creator { displayName, name }
-    comments {
-        nodes {
-            user { displayName, name }
-            body
-            createdAt
-        }
-    }
     projectMilestone { name }
     createdAt
     completedAt
@@ -32,23 +35,6 @@ fragment IssueFields on Issue {
     addedToProjectAt
     addedToTeamAt
     archivedAt
-    attachments {
-        nodes {
-            id
-            title
-            url
-            creator {
-                name
-                displayName
-            }
-            createdAt
-        }
-    }
-    children {
-        nodes {
-            identifier
-        }
-    }
     cycle {
         id
         name
@@ -60,39 +46,6 @@ fragment IssueFields on Issue {
     }
     dueDate
     estimate
-    history {
-        nodes {
-            actor { name displayName }
-            archived
-            archivedAt
-            attachment {
-                id
-                title
-                url
-            }
-            autoArchived
-            autoClosed
-            createdAt
-            descriptionUpdatedBy { name displayName }
-            fromAssignee { name displayName }
-            fromCycle { id name number }
-            fromEstimate
-            fromPriority
-            fromState { name }
-            fromTitle
-            fromDueDate
-            toAssignee { name displayName }
-            toCycle { id name number }
-            toEstimate
-            toPriority
-            toState { name }
-            toTitle
-            toDueDate
-            trashed
-            addedLabels { name }
-            removedLabels { name }
-        }
-    }
     labels {
         nodes {
             name
@@ -113,9 +66,6 @@ fragment IssueFields on Issue {
     snoozedUntilAt
     startedAt
     startedTriageAt
-    subscribers {
-        nodes { displayName name }
-    }
     team { name }
     trashed
     triagedAt
@@ -123,6 +73,86 @@ fragment IssueFields on Issue {
     url
 }
 """
+"""Issue fields without heavy nested connections (see ISSUE_CONNECTIONS)"""
+
+ISSUE_CONNECTIONS = {
+    "comments": """
+        user { displayName, name }
+        body
+        createdAt
+    """,
+    "attachments": """
+        id
+        title
+        url
+        creator {
+            name
+            displayName
+        }
+        createdAt
+    """,
+    "children": """
+        identifier
+    """,
+    "history": """
+        actor { name displayName }
+        archived
+        archivedAt
+        attachment {
+            id
+            title
+            url
+        }
+        autoArchived
+        autoClosed
+        createdAt
+        descriptionUpdatedBy { name displayName }
+        fromAssignee { name displayName }
+        fromCycle { id name number }
+        fromEstimate
+        fromPriority
+        fromState { name }
+        fromTitle
+        fromDueDate
+        toAssignee { name displayName }
+        toCycle { id name number }
+        toEstimate
+        toPriority
+        toState { name }
+        toTitle
+        toDueDate
+        trashed
+        addedLabels { name }
+        removedLabels { name }
+    """,
+    "subscribers": """
+        displayName
+        name
+    """,
+}
+"""Nested issue connections fetched by follow-up queries, selection of their nodes"""
+
+SCHEMA_FILE = "linear_schema.json"
+SCHEMA_TYPE_FIELDS = """
+    name
+    kind
+    fields { name type { name kind ofType { name kind } } }
+    inputFields { name type { name kind ofType { name kind } } }
+    enumValues { name }
+"""
+"""Reduced introspection selection: no descriptions and shallow ofType nesting"""
+
+
+def is_schema_type_relevant(type_info: dict) -> bool:
+    """Filters out introspection and mutation types"""
+    return not type_info["name"].startswith("__") and type_info["kind"] != "MUTATION"
+
+
+def schema_version(schema: dict) -> str:
+    """Content hash of the schema types, independent of key order"""
+    return hashlib.sha256(
+        json.dumps(schema["types"], sort_keys=True).encode("utf-8")
+    ).hexdigest()
 
 
 @dataclass
@@ -131,6 +161,42 @@ class LinearConfig:
     api_url = "https://api.linear.app/graphql"
     api_key: str = field(default="")
     team_keys: list[str] = field(default_factory=list)
+    pool_size: int = field(default=10)
+    max_retries: int = field(default=5)
+    backoff_base: float = field(default=0.5)
+    backoff_max: float = field(default=60.0)
+    timeout: float = field(default=60.0)
+    rate_limit_reserve: float = field(default=0.1)
+    """Share of the rate-limit budget below which requests are spread evenly until reset"""
+    parallelism: int = field(default=1)
+    """Number of concurrently fetched time windows in fetch_all_issues"""
+    windows_per_worker: int = field(default=4)
+    backfill_start: str = field(default="2019-01-01")
+    """Lower bound of issue creation time used for partitioning"""
+    reference_ttl: int = field(default=3600)
+    """Seconds to keep teams, workflow states, users, cycles and projects cached"""
+    reference_miss_refresh_interval: int = field(default=60)
+    """Min seconds between reference data refreshes caused by lookups of unknown entities"""
+    reference_cache_file: str = field(default="")
+    """
+    Storage file to persist reference data between runs (microcore storage), empty to disable.
+    Opt-in, so LinearApi does not write to storage when used without a configured environment.
+    """
+    schema_ttl: int = field(default=86400)
+    """Seconds after which the cached schema version is re-validated"""
+    schema_batch_size: int = field(default=25)
+    """Types per request when full introspection is rejected"""
+    detail_batch_size: int = field(default=10)
+    """Initial number of issues per follow-up query loading nested connections (comments, ...)"""
+    issues_page_size: int = field(default=50)
+    """Initial page size of issue queries"""
+    ids_chunk_size: int = field(default=50)
+    """Max issue ids per bulk lookup query"""
+    max_page_size: int = field(default=250)
+    page_target_complexity: int = field(default=5000)
+    """Complexity points per request that adaptive page sizes aim for (Linear allows 10000)"""
+    detail_page_size: int = field(default=50)
+    """First page size of nested connections in follow-up queries"""
 
     def __post_init__(self):
         update_object_from_env(self, prefixes=self._ENV_PREFIXES)
@@ -146,35 +212,109 @@ class Team:
         return f"{self.name} ({self.key})"
 
 
+class IssuePage(list):
+    """
+    Page of issues with its position in the cursor chain of its partition.
+    """
+
+    def __init__(
+        self,
+        issues: list[dict] = (),
+        partition: str = "all",
+        cursor: str = None,
+        has_next_page: bool = False,
+    ):
+        super().__init__(issues)
+        self.partition = partition
+        self.cursor = cursor
+        """Cursor after the last issue of the page"""
+        self.has_next_page = has_next_page
+
+
 class LinearApi:
     config: LinearConfig
+    transport: LinearTransport
+    reference: ReferenceCache
+    loader: IssueLoader
 
     def __init__(self, config: LinearConfig):
         self.config = config
+        self.transport = LinearTransport(
+            config.api_url,
+            headers=self.headers,
+            pool_size=config.pool_size,
+            max_retries=config.max_retries,
+            backoff_base=config.backoff_base,
+            backoff_max=config.backoff_max,
+            timeout=config.timeout,
+            rate_limit_reserve=config.rate_limit_reserve,
+        )
+        self._page_sizes: dict[str, AdaptivePageSize] = {}
+        self._page_sizes_lock = threading.Lock()
+        self.loader = IssueLoader(self, max_batch=config.ids_chunk_size)
+        self.reference = ReferenceCache(
+            self,
+            ttl=config.reference_ttl,
+            storage_file=config.reference_cache_file,
+            miss_refresh_interval=config.reference_miss_refresh_interval,
+        )
 
     @property
     def headers(self):
         return {"Authorization": self.config.api_key, "Content-Type": "application/json"}
 
+    @staticmethod
+    def _print_error(e: LinearApiError, query: str, variables: dict = None):
+        print(ui.red("❌  Linear GraphQL Error:"))
+        print(ui.magenta(query.strip()))
+        pprint(variables)
+        pprint(e.gql_errors or str(e))
+
     def request(self, query: str, variables: dict = None) -> dict:
-        response = requests.post(
-            self.config.api_url, headers=self.headers, json={"query": query, "variables": variables}
-        )
         try:
-            response.raise_for_status()
-        except requests.HTTPError as e:
-            try:
-                setattr(e, "gql_errors", response.json()["errors"])
-                print(ui.red("❌  Linear GraphQL Error:"))
-                print(ui.magenta(query.strip()))
-                pprint(variables)
-                pprint(e.gql_errors)
-                exit()
-            finally:
-                ...
+            return self.transport.post(query, variables).data
+        except LinearApiError as e:
+            self._print_error(e, query, variables)
+            raise
+
+    def page_size(self, name: str, initial: int) -> AdaptivePageSize:
+        """Returns the shared adaptive page size of the paginated query kind `name`"""
+        with self._page_sizes_lock:
+            if name not in self._page_sizes:
+                self._page_sizes[name] = AdaptivePageSize(
+                    initial,
+                    target_complexity=self.config.page_target_complexity,
+                    max_size=self.config.max_page_size,
+                )
+            return self._page_sizes[name]
+
+    def request_sized(
+        self, build: Callable[[int], tuple[str, dict]], page_size: AdaptivePageSize
+    ) -> tuple[dict, int]:
+        """
+        Executes a paginated request of adaptive size.
+
+        Args:
+            build: Makes (query, variables) for the given page size.
+            page_size: Adaptive size, updated from the reported complexity;
+                pages rejected as too complex are retried with a smaller size.
 
-        data = response.json()
-        return data["data"]
+        Returns:
+            tuple[dict, int]: Response data and the page size used.
+        """
+        while True:
+            size = page_size.size
+            query, variables = build(size)
+            try:
+                response = self.transport.post(query, variables)
+            except LinearApiError as e:
+                if e.is_too_complex and page_size.shrink(size):
+                    print(ui.yellow(f"⚠ Page of {size} is too complex, retrying with {page_size.size}"))
+                    continue
+                self._print_error(e, query, variables)
+                raise
+            page_size.record(size, response.complexity, self.transport.rate_limit.complexity_remaining)
+            return response.data, size
 
     def issues(self, team: str) -> list[dict]:
         team = self.find_team(team)
@@ -208,140 +348,211 @@ class LinearApi:
         return data["issues"]["nodes"]
 
     def issue(self, uuid: str) -> dict:
-        query = """
-            %s
-            query {
-                issues(filter: { id: { eq: "%s" } }) {
-                    nodes {
-                        ...IssueFields
-                    }
-                }
-            }
-            """ % (
-            ISSUE_FRAGMENT,
-            uuid,
+        """
+        Fetches a single issue.
+        Concurrent lookups are coalesced into bulk requests by `self.loader`.
+        """
+        return self.loader.get(uuid)
+
+    def issues_by_ids(self, ids: list[str]) -> list[dict]:
+        """
+        Fetches issues by their ids using `id: { in: [...] }` filter,
+        LinearConfig.ids_chunk_size ids per query.
+
+        Returns:
+            list[dict]: Found issues in the order of `ids`, missing ones are skipped.
+        """
+        ids = list(dict.fromkeys(ids))
+        chunk_size = self.config.ids_chunk_size
+        found = {}
+        for i in range(0, len(ids), chunk_size):
+            for page in self.paginate_issues({"id": {"in": ids[i: i + chunk_size]}}):
+                found.update((issue["id"], issue) for issue in page)
+        return [found[i] for i in ids if i in found]
+
+    def fetch_issue_connections(self, issues: list[dict]) -> list[dict]:
+        """
+        Loads nested connections (ISSUE_CONNECTIONS) into issues fetched with ISSUE_LIGHT_FRAGMENT.
+
+        Connections of several issues are requested at once via aliased `issue(id:)` fields;
+        only connections having more pages are paginated further, so long comment threads
+        and histories are complete.
+
+        Returns:
+            list[dict]: The same issues, each with {"nodes": [...]} under every connection name;
+                issues deleted (or no longer visible) since they were listed are dropped.
+        """
+        page_size = self.config.detail_page_size
+        selection = " ".join(
+            f"{name}(first: {page_size}) {{ nodes {{ {fields} }} pageInfo {{ hasNextPage endCursor }} }}"
+            for name, fields in ISSUE_CONNECTIONS.items()
         )
-        variables = {}
-        response = self.request(query, variables)
-        return response["issues"]["nodes"][0]
+        batch_size = self.page_size("issue_connections", self.config.detail_batch_size)
+        missing = set()
+        i = 0
+        while i < len(issues):
+            data, size = self.request_sized(
+                lambda size: (
+                    "query { %s }"
+                    % " ".join(
+                        f'i{n}: issue(id: "{issue["id"]}") {{ {selection} }}'
+                        for n, issue in enumerate(issues[i: i + size])
+                    ),
+                    None,
+                ),
+                batch_size,
+            )
+            batch = issues[i: i + size]
+            i += size
+            for n, issue in enumerate(batch):
+                if data.get(f"i{n}") is None:
+                    missing.add(issue["id"])
+                    continue
+                for name, connection in data[f"i{n}"].items():
+                    nodes = connection["nodes"]
+                    if connection["pageInfo"]["hasNextPage"]:
+                        nodes += self._paginate_issue_connection(
+                            issue["id"], name, connection["pageInfo"]["endCursor"]
+                        )
+                    issue[name] = {"nodes": nodes}
+        if missing:
+            print(ui.yellow(f"⚠ {len(missing)} issues disappeared while fetching, skipped"))
+            return [issue for issue in issues if issue["id"] not in missing]
+        return issues
 
-    def teams(self) -> list[Team]:
-        teams = []
+    def _paginate_issue_connection(self, issue_id: str, name: str, cursor: str) -> list[dict]:
+        query = """
+        query ($id: String!, $cursor: String, $first: Int) {
+          issue(id: $id) {
+            %s(first: $first, after: $cursor) {
+              nodes { %s }
+              pageInfo { hasNextPage endCursor }
+            }
+          }
+        }
+        """ % (name, ISSUE_CONNECTIONS[name])
+        page_size = self.page_size(f"issue.{name}", 100)
+        nodes = []
         has_next_page = True
-        cursor = None
-
         while has_next_page:
-            query = """
-            query ($cursor: String) {
-              teams(first: 50, after: $cursor) {
-                nodes { id name key }
-                pageInfo { hasNextPage endCursor }
-              }
-            }
-            """
+            data, _ = self.request_sized(
+                lambda size: (query, {"id": issue_id, "cursor": cursor, "first": size}), page_size
+            )
+            if not data.get("issue"):
+                break  # Deleted meanwhile
+            connection = data["issue"][name]
+            nodes += connection["nodes"]
+            has_next_page = connection["pageInfo"]["hasNextPage"]
+            cursor = connection["pageInfo"]["endCursor"]
+        return nodes
+
+    def paginate(self, connection: str, fields: str, first: int = 50) -> Iterator[list[dict]]:
+        """
+        Walks a root connection (teams, users, ...) page by page.
 
-            variables = {"cursor": cursor}
-            data = self.request(query, variables)
-            nodes = data["teams"]["nodes"]
-            page_info = data["teams"]["pageInfo"]
-            teams.extend(nodes)
+        Args:
+            connection (str): Root connection name.
+            fields (str): GraphQL selection of the node fields.
+            first (int): Initial page size, adapted to the query complexity.
+        """
+        query = """
+        query ($cursor: String, $first: Int) {
+          %s(first: $first, after: $cursor) {
+            nodes { %s }
+            pageInfo { hasNextPage endCursor }
+          }
+        }
+        """ % (connection, fields)
+        page_size = self.page_size(connection, first)
+        cursor = None
+        has_next_page = True
+        while has_next_page:
+            data, _ = self.request_sized(
+                lambda size: (query, {"cursor": cursor, "first": size}), page_size
+            )
+            yield data[connection]["nodes"]
+            page_info = data[connection]["pageInfo"]
             has_next_page = page_info["hasNextPage"]
             cursor = page_info["endCursor"]
-        return [Team(**d) for d in teams]
+
+    def teams(self) -> list[Team]:
+        return [Team(**d) for d in self.reference.get("teams")]
 
     def find_team(self, value: str) -> Team:
-        teams = self.teams()
-        for team in teams:
-            if team.name.lower() == value or team.key == value or team.id == value:
-                return team
+        if team := self.reference.find("teams", value):
+            return Team(**team)
 
         raise ValueError("❌ Team not found!")
 
+    def find_state(self, value: str, team: str = None) -> dict:
+        """Finds workflow state by id or name, within the team (id, key or name) if given"""
+        team_id = self.find_team(team).id if team else None
+        if state := self.reference.find("workflowStates", value, team_id=team_id):
+            return state
+
+        raise ValueError("❌ Workflow state not found!")
+
+    def find_user(self, value: str) -> dict:
+        """Finds user by id, name or display name"""
+        if user := self.reference.find("users", value):
+            return user
+
+        raise ValueError("❌ User not found!")
+
+    def find_project(self, value: str) -> dict:
+        """Finds project by id or name"""
+        if project := self.reference.find("projects", value):
+            return project
+
+        raise ValueError("❌ Project not found!")
+
     def fetch_schema(self):
         """
         Fetches the GraphQL schema from Linear API
         in a reduced form while keeping all necessary fields and filtering methods.
 
+        Uses a single introspection query; if Linear rejects it (e.g. as too complex),
+        falls back to batches of aliased `__type` queries.
+
         Returns:
             dict: The optimized schema.
         """
         print(ui.blue("🔍 Fetching Linear API schema..."))
+        try:
+            data = self.transport.post("{ __schema { types { %s } } }" % SCHEMA_TYPE_FIELDS).data
+            types = [t for t in data["__schema"]["types"] if is_schema_type_relevant(t)]
+        except LinearApiError as e:
+            print(ui.yellow(f"⚠ Full introspection failed ({e}), fetching types in batches..."))
+            types = self._fetch_schema_types_batched()
 
-        # First, get all type names while ignoring introspection types
-        basic_query = """
-        {
-          __schema {
-            types {
-              name
-              kind
-            }
-          }
-        }
-        """
-        basic_schema = self.request(basic_query)
-
-        # Filter out introspection and mutation types
-        type_names = [
-            t["name"]
-            for t in basic_schema["__schema"]["types"]
-            if not t["name"].startswith("__") and t["kind"] != "MUTATION"
-        ]
-
-        print(ui.green(f"✓ Found {len(type_names)} relevant types in schema"))
-
-        # Fetch details for each type but omit descriptions and deeply nested ofType details
-        complete_schema = {"types": {}}
-
-        for i, type_name in enumerate(type_names):
-            if i % 10 == 0:
-                print(ui.blue(f"⏳ Fetching type details... ({i}/{len(type_names)})"))
-
-            type_query = f"""
-            {{
-              __type(name: "{type_name}") {{
-                name
-                kind
-                fields {{
-                  name
-                  type {{
-                    name
-                    kind
-                    ofType {{
-                      name
-                      kind
-                    }}
-                  }}
-                }}
-                inputFields {{
-                  name
-                  type {{
-                    name
-                    kind
-                    ofType {{
-                      name
-                      kind
-                    }}
-                  }}
-                }}
-                enumValues {{
-                  name
-                }}
-              }}
-            }}
-            """
-
-            type_data = self.request(type_query)
-            if type_data and "__type" in type_data:
-                complete_schema["types"][type_name] = type_data["__type"]
-
+        complete_schema = {"types": {t["name"]: t for t in types}}
         print(
             ui.green(
                 f"✓ Schema with {len(complete_schema['types'])} essential types successfully retrieved"
             )
         )
-
         return complete_schema
 
+    def _fetch_schema_types_batched(self) -> list[dict]:
+        basic_schema = self.request("{ __schema { types { name kind } } }")
+        type_names = [
+            t["name"] for t in basic_schema["__schema"]["types"] if is_schema_type_relevant(t)
+        ]
+        print(ui.green(f"✓ Found {len(type_names)} relevant types in schema"))
+
+        types = []
+        batch_size = self.config.schema_batch_size
+        for i in range(0, len(type_names), batch_size):
+            print(ui.blue(f"⏳ Fetching type details... ({i}/{len(type_names)})"))
+            batch = type_names[i: i + batch_size]
+            query = "{ %s }" % " ".join(
+                f't{n}: __type(name: "{name}") {{ {SCHEMA_TYPE_FIELDS} }}'
+                for n, name in enumerate(batch)
+            )
+            data = self.request(query)
+            types.extend(data[f"t{n}"] for n in range(len(batch)) if data.get(f"t{n}"))
+        return types
+
     #
     # def fetch_schema_full(self):
     #     """
@@ -444,82 +655,272 @@ class LinearApi:
     #
     #     return complete_schema
 
-    def schema(self):
-        if mc.storage.exists("linear_schema.json"):
-            return mc.storage.read_json("linear_schema.json")
+    def schema(self, refresh: bool = False) -> dict:
+        """
+        Returns the reduced Linear API schema cached in `linear_schema.json`.
+
+        The cache is versioned with a content hash and re-validated after
+        LinearConfig.schema_ttl seconds (or immediately with refresh=True);
+        since fetching takes a single request, the check is cheap.
+        The file keeps the schema under "schema" next to the cache fields
+        ("version", "fetched_at", "checked_at").
+        """
+        cached = mc.storage.read_json(SCHEMA_FILE, None)
+        if not (cached and cached.get("version") and "schema" in cached):
+            cached = None  # Missing or written in the legacy format
+        if cached and not refresh and time() - cached["checked_at"] < self.config.schema_ttl:
+            return cached["schema"]
+
         schema = self.fetch_schema()
-        mc.storage.write_json("linear_schema.json", schema, backup_existing=False)
-        return schema
+        version = schema_version(schema)
+        if cached and cached["version"] == version:
+            print(ui.green(f"✓ Schema is up to date (version {version[:12]})"))
+            entry = cached
+        else:
+            print(ui.yellow(f"Schema version changed: {ui.green(version[:12])}"))
+            entry = dict(version=version, fetched_at=format_dt(datetime.now()), schema=schema)
+        entry["checked_at"] = time()
+        mc.storage.write_json(SCHEMA_FILE, entry, backup_existing=False)
+        return entry["schema"]
 
-    def fetch_all_issues(
-        self, team: str = None, callback: callable = None, updated_after: datetime | str = None
-    ) -> list[dict]:
+    def issue_filter(self, team: str = None, updated_after: datetime | str = None) -> dict:
         """
-        Fetches all tasks (issues) from the Linear API.
+        Builds IssueFilter criteria for the issue queries.
+        """
+        filter_criteria = {}
+        if team:
+            team_obj = self.find_team(team)
+            filter_criteria["team"] = {"id": {"eq": team_obj.id}}
 
-        Args:
-            team (str, optional): The team name, key, or ID to filter tasks by.
-            callback (callable, optional): A function to apply to each fetched issue.
-            updated_after (datetime, optional): Only return issues updated after this datetime.
+        if updated_after:
+            if isinstance(updated_after, str):
+                updated_after = datetime.fromisoformat(updated_after)
+            filter_criteria["updatedAt"] = {"gt": updated_after.isoformat()}
+        return filter_criteria
 
-        Returns:
-            list[dict]: A list of tasks (issues) with their details.
+    def paginate_issues(
+        self, filter_criteria: dict = None, cursor: str = None, partition: str = "all"
+    ) -> Iterator[IssuePage]:
         """
-        tasks = []
-        has_next_page = True
-        cursor = None
+        Walks one cursor chain of the issues connection, yields pages of complete issues.
 
-        while has_next_page:
-            print(".", end="")
+        Pages are fetched with the lightweight fragment,
+        nested connections are loaded by batched follow-up queries.
 
-            query = (
-                """
-            %s
-            query ($cursor: String, $teamFilter: IssueFilter) {
-              issues(first: 100, after: $cursor, filter: $teamFilter) {
-                nodes {
-                  ...IssueFields
-                }
-                pageInfo {
-                  hasNextPage
-                  endCursor
-                }
-              }
-            }
+        Args:
+            filter_criteria (dict, optional): IssueFilter criteria.
+            cursor (str, optional): Continue after this cursor (resuming an interrupted walk).
+            partition (str): Partition key attached to the yielded pages.
+        """
+        query = (
             """
-                % ISSUE_FRAGMENT
+        %s
+        query ($cursor: String, $first: Int, $teamFilter: IssueFilter) {
+          issues(first: $first, after: $cursor, filter: $teamFilter) {
+            nodes {
+              ...IssueFields
+            }
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+          }
+        }
+        """
+            % ISSUE_LIGHT_FRAGMENT
+        )
+        variables = {"cursor": cursor}
+        if filter_criteria:
+            variables["teamFilter"] = filter_criteria
+        page_size = self.page_size("issues", self.config.issues_page_size)
+
+        has_next_page = True
+        while has_next_page:
+            print(".", end="")
+            data, _ = self.request_sized(
+                lambda size: (query, {**variables, "first": size}), page_size
+            )
+            if not data or "issues" not in data:
+                break
+            page_info = data["issues"]["pageInfo"]
+            has_next_page = page_info["hasNextPage"]
+            variables["cursor"] = page_info["endCursor"] or variables["cursor"]
+            yield IssuePage(
+                self.fetch_issue_connections(data["issues"]["nodes"]),
+                partition=partition,
+                cursor=variables["cursor"],
+                has_next_page=has_next_page,
             )
 
-            variables = {"cursor": cursor}
-            filter_criteria = {}
+    def time_windows(self, parallel: int) -> list[tuple[datetime, datetime]]:
+        """
+        Splits the issue creation time range into windows (UTC) for partitioned fetching.
+        """
+        start = datetime.fromisoformat(self.config.backfill_start)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        end = datetime.now(timezone.utc) + timedelta(days=1)
+        qty = max(parallel * self.config.windows_per_worker, 1)
+        step = (end - start) / qty
+        bounds = [start + step * i for i in range(qty)] + [end]
+        return list(zip(bounds[:-1], bounds[1:]))
 
-            if team:
-                team_obj = self.find_team(team)
-                filter_criteria["team"] = {"id": {"eq": team_obj.id}}
+    def issue_partitions(self, parallel: int) -> dict[str, dict]:
+        """
+        Returns {partition key: IssueFilter criteria} of independently paginated partitions:
+        `createdAt` windows for parallel fetching, a single unbounded partition otherwise.
+        The first window is open at the start and the last one at the end,
+        so issues created outside of the windows range are fetched too.
+        """
+        if parallel <= 1:
+            return {"all": {}}
+        windows = self.time_windows(parallel)
+        partitions = {}
+        for i, (start, end) in enumerate(windows):
+            created = {}
+            if i > 0:
+                created["gte"] = start.isoformat()
+            if i < len(windows) - 1:
+                created["lt"] = end.isoformat()
+            partitions[start.isoformat()] = {"createdAt": created} if created else {}
+        return partitions
 
-            if updated_after:
-                if isinstance(updated_after, str):
-                    updated_after = datetime.fromisoformat(updated_after)
-                iso_time = updated_after.isoformat()
-                filter_criteria["updatedAt"] = {"gt": iso_time}
+    def paginate_issues_partitioned(
+        self,
+        filter_criteria: dict = None,
+        parallel: int = 4,
+        partitions: dict[str, dict] = None,
+        cursors: dict[str, str] = None,
+    ) -> Iterator[IssuePage]:
+        """
+        Paginates partitions (`createdAt` windows by default) concurrently,
+        yields pages in completion order.
+        Issues are de-duplicated by id.
+        """
+        if partitions is None:
+            partitions = self.issue_partitions(parallel)
+        cursors = cursors or {}
+        pages = Queue(maxsize=parallel * 2)
+        stop = threading.Event()
+        done = object()
 
-            if filter_criteria:
-                variables["teamFilter"] = filter_criteria
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return
+                except Full:
+                    continue
 
-            data = self.request(query, variables)
-            if not data or "issues" not in data:
-                break
+        def fetch_partition(key: str):
+            criteria = {**(filter_criteria or {}), **partitions[key]}
+            try:
+                for page in self.paginate_issues(criteria, cursors.get(key), key):
+                    if stop.is_set():
+                        return
+                    put(page)
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
 
-            if callback:
-                for task in data["issues"]["nodes"]:
-                    callback(task)
+        seen = set()
+        with ThreadPoolExecutor(max_workers=max(parallel, 1)) as executor:
+            for key in partitions:
+                executor.submit(fetch_partition, key)
+            try:
+                remaining = len(partitions)
+                while remaining:
+                    item = pages.get()
+                    if item is done:
+                        remaining -= 1
+                        continue
+                    if isinstance(item, Exception):
+                        raise item
+                    # Empty pages are yielded too, they still move the partition cursor
+                    page = IssuePage(
+                        [i for i in item if i["id"] not in seen],
+                        partition=item.partition,
+                        cursor=item.cursor,
+                        has_next_page=item.has_next_page,
+                    )
+                    seen.update(i["id"] for i in page)
+                    yield page
+            finally:
+                stop.set()
 
-            tasks.extend(data["issues"]["nodes"])
-            page_info = data["issues"]["pageInfo"]
-            has_next_page = page_info["hasNextPage"]
-            cursor = page_info["endCursor"]
+    def iter_issues(
+        self,
+        team: str = None,
+        updated_after: datetime | str = None,
+        parallel: int = None,
+        pages: bool = False,
+        partitions: dict[str, dict] = None,
+        cursors: dict[str, str] = None,
+    ) -> Iterator[dict] | Iterator[IssuePage]:
+        """
+        Lazily iterates over issues from the Linear API.
+
+        Next page is requested only when the consumer reaches it
+        (in parallel mode, at most a few pages per worker are buffered),
+        so memory usage does not grow with the size of the workspace.
 
-        return tasks
+        Args:
+            team (str, optional): The team name, key, or ID to filter issues by.
+            updated_after (datetime, optional): Only return issues updated after this datetime.
+            parallel (int, optional): Number of concurrently fetched `createdAt` windows,
+                LinearConfig.parallelism by default; 1 walks a single cursor chain.
+            pages (bool): Yield pages (lists of issues) instead of single issues.
+            partitions (dict, optional): Partitions to walk, see `issue_partitions`
+                (used to resume an interrupted import with its original partitions).
+            cursors (dict, optional): {partition key: cursor} to continue the partitions from.
+        """
+        parallel = parallel or self.config.parallelism
+        filter_criteria = self.issue_filter(team, updated_after)
+        if partitions is None:
+            partitions = self.issue_partitions(parallel)
+        cursors = cursors or {}
+        if len(partitions) == 1 and parallel <= 1:
+            key, criteria = next(iter(partitions.items()))
+            page_iter = self.paginate_issues(
+                {**filter_criteria, **criteria}, cursors.get(key), key
+            )
+        else:
+            page_iter = self.paginate_issues_partitioned(
+                filter_criteria, parallel, partitions, cursors
+            )
+        if pages:
+            yield from page_iter
+            return
+        for page in page_iter:
+            yield from page
+
+    def fetch_all_issues(
+        self,
+        team: str = None,
+        callback: callable = None,
+        updated_after: datetime | str = None,
+        parallel: int = None,
+    ) -> list[dict] | None:
+        """
+        Fetches all tasks (issues) from the Linear API.
+        See `iter_issues` for the streaming version.
+
+        Args:
+            team (str, optional): The team name, key, or ID to filter tasks by.
+            callback (callable, optional): A function to apply to each fetched issue.
+                When provided, issues are not accumulated and None is returned.
+            updated_after (datetime, optional): Only return issues updated after this datetime.
+            parallel (int, optional): Number of concurrently fetched `createdAt` windows.
+
+        Returns:
+            list[dict] | None: A list of tasks (issues) with their details.
+        """
+        issues = self.iter_issues(team=team, updated_after=updated_after, parallel=parallel)
+        if not callback:
+            return list(issues)
+        for issue in issues:
+            callback(issue)
 
     def fetch_issue_qty(self, team: str = None, updated_after: datetime | str = None) -> int:
         """
@@ -535,11 +936,10 @@ class LinearApi:
         """
         count = 0
         has_next_page = True
-        cursor = None
 
         query = """
-        query ($cursor: String, $teamFilter: IssueFilter) {
-          issues(first: 100, after: $cursor, filter: $teamFilter) {
+        query ($cursor: String, $first: Int, $teamFilter: IssueFilter) {
+          issues(first: $first, after: $cursor, filter: $teamFilter) {
             nodes { id }  # just grab the minimal field
             pageInfo {
               hasNextPage
@@ -549,30 +949,22 @@ class LinearApi:
         }
         """
 
-        variables = {"cursor": cursor}
-        filter_criteria = {}
-
-        if team:
-            team_obj = self.find_team(team)
-            filter_criteria["team"] = {"id": {"eq": team_obj.id}}
-
-        if updated_after:
-            if isinstance(updated_after, str):
-                updated_after = datetime.fromisoformat(updated_after)
-            filter_criteria["updatedAt"] = {"gt": updated_after.isoformat()}
-
+        variables = {"cursor": None}
+        filter_criteria = self.issue_filter(team, updated_after)
         if filter_criteria:
             variables["teamFilter"] = filter_criteria
+        page_size = self.page_size("issue_ids", 250)
 
         while has_next_page:
             print(".", end="")
-            variables["cursor"] = cursor
-            data = self.request(query, variables)
+            data, _ = self.request_sized(
+                lambda size: (query, {**variables, "first": size}), page_size
+            )
             nodes = data["issues"]["nodes"]
             count += len(nodes)
             page_info = data["issues"]["pageInfo"]
             has_next_page = page_info["hasNextPage"]
-            cursor = page_info["endCursor"]
+            variables["cursor"] = page_info["endCursor"]
 
         return count
 
@@ -0,0 +1,211 @@
+"""
+Staged concurrent processing with bounded queues between stages.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from queue import Empty, Full, Queue
+from time import time
+from typing import Any, Callable, Iterable
+
+from rich.progress import Progress
+
+_END = object()
+
+
+def _process_context():
+    """
+    Start method of process pool workers: forking a process running threads
+    may copy locks held by other threads and deadlock the child.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+@dataclass
+class Stage:
+    """
+    Pipeline stage.
+
+    Attributes:
+        name: Stage name shown in the progress display
+        fn: Function processing an item; its result is passed to the next stage,
+            None results are dropped
+        workers: Number of concurrent workers
+        processes: Run `fn` in a process pool of `workers` processes (CPU-bound stages);
+            workers are started by "forkserver" ("spawn" where unavailable), never forked
+            from the threaded pipeline, so `fn` must be picklable (module-level)
+        queue_size: Max number of items waiting for this stage
+        initializer: Called once in each worker process before processing items
+    """
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    processes: bool = False
+    queue_size: int = 100
+    initializer: Callable[[], None] = None
+
+
+class Pipeline:
+    """
+    Runs items from a source iterable through stages concurrently.
+
+    Each stage has its own workers and a bounded input queue, so slow stages
+    apply back-pressure to the upstream ones, and the whole pipeline runs
+    at the speed of its slowest stage.
+    Per-stage throughput is reported to a `rich.progress.Progress` if given,
+    tasks show the `rate` field (items/s).
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        progress: Progress = None,
+        total: int = None,
+        source_name: str = "Source",
+    ):
+        self.stages = stages
+        self.progress = progress
+        self.total = total
+        self.source_name = source_name
+        self.counts = {source_name: 0, **{stage.name: 0 for stage in stages}}
+        self.error: BaseException | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._next_workers = {}
+
+    def _put(self, queue: Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                queue.put(item, timeout=0.2)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _get(self, queue: Queue):
+        while not self._stop.is_set():
+            try:
+                return queue.get(timeout=0.2)
+            except Empty:
+                continue
+        return _END
+
+    def _fail(self, e: BaseException):
+        with self._lock:
+            if self.error is None:
+                self.error = e
+        self._stop.set()
+
+    def _advance(self, name: str, started: float):
+        with self._lock:
+            self.counts[name] += 1
+            done = self.counts[name]
+        if self.progress:
+            task_id = self._tasks[name]
+            total = self.progress.tasks[task_id].total
+            if total is None or done > total:
+                total = round(done * 1.25) + 1
+            self.progress.update(
+                task_id,
+                completed=done,
+                total=total,
+                rate=f"{done / max(time() - started, 1e-6):.1f}/s",
+            )
+
+    def _run_source(self, source: Iterable, out: Queue, consumers: int):
+        started = time()
+        try:
+            for item in source:
+                self._advance(self.source_name, started)
+                if not self._put(out, item):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for _ in range(consumers):
+                self._put(out, _END)
+
+    def _run_stage(self, stage: Stage, inp: Queue, out: Queue | None, pool, finished: list):
+        started = time()
+        try:
+            while True:
+                item = self._get(inp)
+                if item is _END:
+                    break
+                result = pool.submit(stage.fn, item).result() if pool else stage.fn(item)
+                self._advance(stage.name, started)
+                if out is not None and result is not None and not self._put(out, result):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            with self._lock:
+                finished.append(1)
+                last = len(finished) == stage.workers
+            # Last worker of the stage signals the end to the next stage
+            if last and out is not None:
+                for _ in range(self._next_workers[stage.name]):
+                    self._put(out, _END)
+
+    def run(self, source: Iterable) -> dict[str, int]:
+        """
+        Processes all items of the source.
+
+        Returns:
+            dict[str, int]: Number of items processed by each stage.
+        """
+        queues = [Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self._next_workers = {
+            stage.name: (self.stages[i + 1].workers if i + 1 < len(self.stages) else 0)
+            for i, stage in enumerate(self.stages)
+        }
+        if self.progress:
+            for name in self.counts:
+                self._tasks[name] = self.progress.add_task(
+                    f"[cyan]{name}", total=self.total, rate="-"
+                )
+        pools = []
+        threads = [
+            threading.Thread(
+                target=self._run_source,
+                args=(source, queues[0], self.stages[0].workers),
+                daemon=True,
+            )
+        ]
+        for i, stage in enumerate(self.stages):
+            pool = None
+            if stage.processes:
+                pool = ProcessPoolExecutor(
+                    stage.workers, mp_context=_process_context(), initializer=stage.initializer
+                )
+                pools.append(pool)
+            finished = []
+            out = queues[i + 1] if i + 1 < len(self.stages) else None
+            threads += [
+                threading.Thread(
+                    target=self._run_stage, args=(stage, queues[i], out, pool, finished), daemon=True
+                )
+                for _ in range(stage.workers)
+            ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.2)
+        except BaseException as e:
+            self._fail(e)
+            raise
+        finally:
+            self._stop.set()
+            for pool in pools:
+                pool.shutdown(cancel_futures=True)
+        if self.error:
+            raise self.error
+        for name, task_id in self._tasks.items():
+            self.progress.update(task_id, total=self.counts[name], completed=self.counts[name])
+        return self.counts
@@ -0,0 +1,266 @@
+"""
+Hybrid issue retrieval: vector search + MySQL FULLTEXT, merged by reciprocal rank fusion.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass, field
+from datetime import datetime, timezone
+
+import microcore as mc
+from sqlalchemy import bindparam, text
+
+import ema.db as db
+import ema.env as env
+from ema.indexing import INDEX_INFO_FILE, read_index_version
+from ema.utils import update_object_from_env
+
+ISSUE_ID_PATTERN = re.compile(r"\b[A-Za-z][A-Za-z0-9]{0,9}-\d+\b")
+
+
+@dataclass
+class RetrievalConfig:
+    limit: int = field(default=6)
+    """Number of documents returned"""
+    candidates: int = field(default=20)
+    """Number of candidates taken from each backend before fusion"""
+    rrf_k: int = field(default=60)
+    cache_size: int = field(default=256)
+    """Max number of cached search results, 0 disables the cache"""
+    embedding_cache_size: int = field(default=1024)
+    """Max number of cached question embeddings, 0 disables the cache"""
+
+    def __post_init__(self):
+        update_object_from_env(self, prefixes=["RETRIEVAL_"])
+
+
+@dataclass
+class RetrievalFilters:
+    team: str = None
+    """Team name"""
+    state: str = None
+    since: datetime | str = None
+    """Only issues updated since this date"""
+
+    @property
+    def since_dt(self) -> datetime | None:
+        since = datetime.fromisoformat(self.since) if isinstance(self.since, str) else self.since
+        if since and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)  # `updated_at` is stored in UTC
+        return since
+
+    def sql(self) -> tuple[str, dict]:
+        """SQL conditions for the issues table (joined by AND, prefixed) and their parameters"""
+        conditions, params = [], {}
+        if self.team:
+            conditions.append("team = :team")
+            params["team"] = self.team
+        if self.state:
+            conditions.append("state = :state")
+            params["state"] = self.state
+        if self.since:
+            conditions.append("updated_at >= :since")
+            params["since"] = self.since_dt
+        return "".join(f" AND {c}" for c in conditions), params
+
+    def where(self) -> dict | None:
+        """Metadata filter for the vector collection (see `ema.indexing.vector_metadata`)"""
+        conditions = []
+        if self.team:
+            conditions.append({"team": self.team})
+        if self.state:
+            conditions.append({"state": self.state})
+        if self.since:
+            conditions.append({"updated_ts": {"$gte": int(self.since_dt.timestamp())}})
+        if len(conditions) > 1:
+            return {"$and": conditions}
+        return conditions[0] if conditions else None
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def index_version() -> tuple:
+    """
+    Changes when an import finishes or indexed issues change otherwise (webhooks):
+    (index info file mtime, `last_indexed`, vector index version marker)
+    """
+    path = mc.storage.abs_path(INDEX_INFO_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    last_indexed = mc.storage.read_json(INDEX_INFO_FILE, {}).get("last_indexed")
+    return mtime, last_indexed, read_index_version()
+
+
+def embedding_model(fn) -> str:
+    """Name of the model behind the embedding function (see `ema.embeddings.model_name`)"""
+    return getattr(fn, "name", None) or repr(fn)
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with hit statistics.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[tuple, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self):
+        pass
+
+    def get(self, key: tuple):
+        with self._lock:
+            self._check_version()
+            if (value := self._items.get(key)) is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / total if total else 0.0,
+            size=len(self._items),
+        )
+
+
+class RetrievalCache(LRUCache):
+    """
+    LRU cache of found issue ids keyed by normalized query, filters and limit.
+    Entries are dropped when the index version changes (see `index_version`).
+    """
+
+    def __init__(self, size: int = 256):
+        super().__init__(size)
+        self.version = None
+
+    def _check_version(self):
+        if (version := index_version()) != self.version:
+            self._items.clear()
+            self.version = version
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[str]:
+    """Merges ranked lists of ids: score(id) = sum of 1 / (k + rank) over the lists"""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0) + 1 / (k + rank)
+    return sorted(scores, key=lambda item: -scores[item])
+
+
+class HybridRetriever:
+    """
+    Retrieves issues relevant to a query.
+
+    The vector query and the `MATCH ... AGAINST` query run concurrently,
+    filters are applied by both backends; issue identifiers mentioned in the query
+    form an additional ranking, so exact references are not missed.
+    Results are cached until the next import (`RetrievalCache`);
+    question embeddings are cached by normalized text and model, regardless of the index version.
+    """
+
+    def __init__(self, config: RetrievalConfig = None, collection: str = "issues"):
+        self.config = config or RetrievalConfig()
+        self.collection = collection
+        self.cache = RetrievalCache(self.config.cache_size) if self.config.cache_size else None
+        self.embedding_cache = (
+            LRUCache(self.config.embedding_cache_size) if self.config.embedding_cache_size else None
+        )
+
+    def query_embedding(self, query: str) -> list[float]:
+        fn = env.vector_db().embedding_function
+        query = normalize_query(query)
+        if not self.embedding_cache:
+            return fn([query])[0]
+        key = (query, embedding_model(fn))
+        if (vector := self.embedding_cache.get(key)) is None:
+            vector = fn([query])[0]
+            self.embedding_cache.put(key, vector)
+        return vector
+
+    def vector_ids(self, query: str, filters: RetrievalFilters, limit: int) -> list[str]:
+        results = env.vector_db().search_by_vector(
+            self.collection, self.query_embedding(query), n_results=limit, where=filters.where()
+        )
+        return [doc.metadata.get("issue_id") for doc in results if doc.metadata.get("issue_id")]
+
+    def fulltext_ids(self, query: str, filters: RetrievalFilters, limit: int) -> list[str]:
+        conditions, params = filters.sql()
+        rows = db.sql(
+            "SELECT id FROM issues "
+            "WHERE MATCH(all_content) AGAINST(:query IN NATURAL LANGUAGE MODE)"
+            f"{conditions} "
+            "ORDER BY MATCH(all_content) AGAINST(:query IN NATURAL LANGUAGE MODE) DESC "
+            "LIMIT :limit",
+            dict(query=query, limit=limit, **params),
+        )
+        return [r["id"] for r in rows]
+
+    def mentioned_ids(self, query: str, filters: RetrievalFilters) -> list[str]:
+        ids = list(dict.fromkeys(m.upper() for m in ISSUE_ID_PATTERN.findall(query)))
+        if not ids:
+            return []
+        conditions, params = filters.sql()
+        stmt = text(f"SELECT id FROM issues WHERE id IN :ids{conditions}").bindparams(
+            bindparam("ids", expanding=True)
+        )
+        with db.session() as ses:
+            found = {r[0] for r in ses.execute(stmt, dict(ids=ids, **params))}
+        return [i for i in ids if i in found]
+
+    def documents(self, ids: list[str]) -> list[str]:
+        if not ids:
+            return []
+        stmt = text("SELECT id, all_content FROM issues WHERE id IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        )
+        with db.session() as ses:
+            content = {r[0]: r[1] for r in ses.execute(stmt, dict(ids=ids))}
+        return [content[i] for i in ids if content.get(i)]
+
+    def search_ids(self, query: str, filters: RetrievalFilters = None, limit: int = None) -> list[str]:
+        filters = filters or RetrievalFilters()
+        candidates = self.config.candidates
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            vector = pool.submit(self.vector_ids, query, filters, candidates)
+            fulltext = pool.submit(self.fulltext_ids, query, filters, candidates)
+            mentioned = self.mentioned_ids(query, filters)
+            rankings = [vector.result(), fulltext.result()]
+        fused = reciprocal_rank_fusion(rankings, self.config.rrf_k)
+        # Explicitly mentioned issues go first
+        ids = mentioned + [i for i in fused if i not in mentioned]
+        return ids[: limit or self.config.limit]
+
+    def search(self, query: str, filters: RetrievalFilters = None, limit: int = None) -> list[str]:
+        """Returns `all_content` of the most relevant issues"""
+        query = normalize_query(query)
+        if not self.cache:
+            return self.documents(self.search_ids(query, filters, limit))
+        filters = filters or RetrievalFilters()
+        key = (query.casefold(), astuple(filters), limit)
+        if (ids := self.cache.get(key)) is None:
+            ids = self.search_ids(query, filters, limit)
+            self.cache.put(key, ids)
+        # Content is read fresh: webhook updates don't change the index version
+        return self.documents(ids)
@@ -68,6 +68,11 @@ def update_object_from_env(obj: T, prefixes: list[str] | None = None) -> T:
             if not value.isdigit():
                 raise ValueError(f"Incorrect ENV variable: {name} is not an integer")
             value = int(value)
+        elif f.type is float:
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError(f"Incorrect ENV variable: {name} is not a number")
         elif f.type is list:
             try:
                 if not value:
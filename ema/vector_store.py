@@ -0,0 +1,472 @@
+"""
+In-process vector store: exact search over a memory-mapped float16 matrix.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+
+import numpy as np
+from microcore.embedding_db import AbstractEmbeddingDB, SearchResult, SearchResults
+
+from ema.utils import update_object_from_env
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process locking
+    fcntl = None
+
+
+class VectorBackend(str, Enum):
+    CHROMA = "chroma"
+    NUMPY = "numpy"
+    """Memory-mapped float16 matrix, exact search (`NumpyEmbeddingDB`)"""
+
+
+@dataclass
+class VectorStoreConfig:
+    backend: VectorBackend = field(default=VectorBackend.CHROMA)
+    path: str = field(default="storage/vector_store")
+    """Location of `numpy` backend collections"""
+    block_size: int = field(default=16384)
+    """Rows multiplied per block when searching"""
+    compact_ratio: float = field(default=0.3)
+    """Deleted rows share triggering compaction"""
+    compact_min_rows: int = field(default=1000)
+    hnsw_space: str = field(default="")
+    """Chroma HNSW parameters of new collections (l2 / cosine / ip), empty / 0: Chroma defaults"""
+    hnsw_m: int = field(default=0)
+    hnsw_construction_ef: int = field(default=0)
+    hnsw_search_ef: int = field(default=0)
+    hnsw_num_threads: int = field(default=0)
+
+    def hnsw_metadata(self) -> dict:
+        """Collection metadata setting the configured HNSW parameters"""
+        values = {
+            "hnsw:space": self.hnsw_space,
+            "hnsw:M": self.hnsw_m,
+            "hnsw:construction_ef": self.hnsw_construction_ef,
+            "hnsw:search_ef": self.hnsw_search_ef,
+            "hnsw:num_threads": self.hnsw_num_threads,
+        }
+        return {k: v for k, v in values.items() if v}
+
+    def __post_init__(self):
+        update_object_from_env(self, prefixes=["VECTOR_STORE_"])
+        self.backend = VectorBackend(self.backend)
+
+
+OPERATORS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$in": lambda a, b: a in b,
+    "$nin": lambda a, b: a not in b,
+}
+
+
+def matches(metadata: dict, where: dict) -> bool:
+    """Checks metadata against a Chroma-style `where` filter"""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, c) for c in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, c) for c in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if not all(OPERATORS[op](value, arg) for op, arg in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class VectorCollection:
+    """
+    One collection stored in `<path>/`:
+    `vectors.f16` (normalized embeddings, row per document, append-only),
+    `log.jsonl` (sidecar: line per added row with id / document / metadata,
+    lines listing deleted rows and lines replacing metadata of a row) and `manifest.json` (dimension, generation).
+
+    Compaction rewrites both files without the deleted rows and bumps the generation,
+    other processes then reload the collection; otherwise they only read new log lines.
+    Writers hold an exclusive file lock, readers a shared one while syncing.
+    """
+
+    def __init__(self, path: str, block_size: int = 16384):
+        self.path = path
+        self.block_size = block_size
+        self._lock = threading.RLock()
+        self._lock_mode = None
+        self._reset()
+
+    def _reset(self, generation: int = None):
+        self.generation = generation
+        self.dim = None
+        self.ids: list[str] = []
+        self.documents: list[str] = []
+        self.metadatas: list[dict] = []
+        self.rows: dict[str, int] = {}
+        self.deleted: set[int] = set()
+        self.vectors = None
+        self._log_offset = 0
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        """Re-entrant: nested calls reuse the held file lock, a shared one is not upgraded"""
+        with self._lock:
+            if self._lock_mode is not None:
+                if exclusive and self._lock_mode != fcntl.LOCK_EX:
+                    raise RuntimeError("Can't upgrade a shared collection lock")
+                yield
+                return
+            if fcntl is None or not os.path.isdir(self.path):
+                yield
+                return
+            with open(self._file(".lock"), "a") as lock_file:
+                mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+                fcntl.flock(lock_file, mode)
+                self._lock_mode = mode
+                try:
+                    yield
+                finally:
+                    self._lock_mode = None
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def exists(self) -> bool:
+        return os.path.exists(self._file("manifest.json"))
+
+    def __len__(self):
+        self.sync()
+        return len(self.ids) - len(self.deleted)
+
+    def sync(self):
+        with self._locked():
+            self._sync()
+
+    def _sync(self):
+        """Reads changes made since the last sync (by this or other processes)"""
+        if not self.exists():
+            self._reset()
+            return
+        with open(self._file("manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["generation"] != self.generation:
+            self._reset(manifest["generation"])
+        self.dim = manifest["dim"]
+        with open(self._file("log.jsonl"), "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        data = data[: data.rfind(b"\n") + 1]  # complete lines only
+        if not data:
+            return
+        self._log_offset += len(data)
+        for line in data.splitlines():
+            entry = json.loads(line)
+            if "updated" in entry:
+                self.metadatas[entry["updated"]] = entry["metadata"] or {}
+                continue
+            if "deleted" in entry:
+                for row in entry["deleted"]:
+                    self.deleted.add(row)
+                    if self.rows.get(self.ids[row]) == row:
+                        del self.rows[self.ids[row]]
+                continue
+            self.rows[entry["id"]] = len(self.ids)
+            self.ids.append(entry["id"])
+            self.documents.append(entry["document"])
+            self.metadatas.append(entry["metadata"] or {})
+        self.vectors = (
+            np.memmap(self._file("vectors.f16"), np.float16, "r", shape=(len(self.ids), self.dim))
+            if self.ids
+            else np.zeros((0, self.dim), np.float16)
+        )
+
+    def _append_log(self, entries: list[dict]):
+        with open(self._file("log.jsonl"), "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+
+    def _write_manifest(self, dim: int, generation: int):
+        tmp = self._file("manifest.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(dim=dim, generation=generation), f)
+        os.replace(tmp, self._file("manifest.json"))
+
+    def upsert(self, ids: list[str], documents: list[str], metadatas: list[dict], vectors):
+        vectors = normalize(np.asarray(vectors, dtype=np.float32)).astype(np.float16)
+        os.makedirs(self.path, exist_ok=True)
+        with self._locked(exclusive=True):
+            self._sync()
+            if self.dim is None:
+                self._write_manifest(vectors.shape[1], 0)
+                open(self._file("log.jsonl"), "w").close()
+                self._sync()
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} != {self.dim}")
+            replaced = [self.rows[i] for i in ids if i in self.rows]
+            with open(self._file("vectors.f16"), "r+b" if self.ids else "wb") as f:
+                # Drop rows of an interrupted write that are missing in the log
+                f.truncate(len(self.ids) * self.dim * 2)
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.tobytes())
+            entries = [dict(deleted=replaced)] if replaced else []
+            entries += [
+                dict(id=i, document=d, metadata=m) for i, d, m in zip(ids, documents, metadatas)
+            ]
+            self._append_log(entries)
+            self._sync()
+
+    def update_metadata(self, ids: list[str], metadatas: list[dict]):
+        """Replaces metadata of the documents, keeping their embeddings"""
+        with self._locked(exclusive=True):
+            self._sync()
+            entries = [
+                dict(updated=self.rows[i], metadata=m)
+                for i, m in zip(ids, metadatas)
+                if i in self.rows
+            ]
+            if entries:
+                self._append_log(entries)
+                self._sync()
+
+    def delete(self, ids: list[str] = None, where: dict = None) -> int:
+        """
+        Deletes documents by ids or metadata filter, resolved to rows under the write lock
+        (rows move on compaction by another process). Returns the number of deleted rows.
+        """
+        with self._locked(exclusive=True):
+            self._sync()
+            if ids is not None:
+                rows = [self.rows[i] for i in ids if i in self.rows]
+            else:
+                rows = self.live_rows(where)
+            if rows:
+                self._append_log([dict(deleted=rows)])
+                self._sync()
+            return len(rows)
+
+    def compact(self):
+        """Rewrites the collection files without the deleted rows"""
+        with self._locked(exclusive=True):
+            self._sync()
+            if not self.deleted:
+                return
+            live = [r for r in range(len(self.ids)) if r not in self.deleted]
+            with open(self._file("vectors.f16.tmp"), "wb") as f:
+                for start in range(0, len(live), self.block_size):
+                    f.write(np.ascontiguousarray(self.vectors[live[start: start + self.block_size]]))
+            with open(self._file("log.jsonl.tmp"), "w", encoding="utf-8") as f:
+                for r in live:
+                    entry = dict(id=self.ids[r], document=self.documents[r], metadata=self.metadatas[r])
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(self._file("vectors.f16.tmp"), self._file("vectors.f16"))
+            os.replace(self._file("log.jsonl.tmp"), self._file("log.jsonl"))
+            self._write_manifest(self.dim, self.generation + 1)
+            self._sync()
+
+    def live_rows(self, where: dict = None) -> list[int]:
+        return [
+            r
+            for r in range(len(self.ids))
+            if r not in self.deleted and (not where or matches(self.metadatas[r], where))
+        ]
+
+    def search(self, query: np.ndarray, n: int, where: dict = None) -> list[tuple[int, float]]:
+        """Exact top-n rows by cosine similarity: [(row, similarity), ...]"""
+        self.sync()
+        total = len(self.ids)
+        if not total or n <= 0:
+            return []
+        query = normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        mask = None
+        if where or self.deleted:
+            mask = np.zeros(total, dtype=bool)
+            mask[self.live_rows(where)] = True
+        best_rows, best_scores = [], []
+        for start in range(0, total, self.block_size):
+            end = min(start + self.block_size, total)
+            scores = np.asarray(self.vectors[start:end], dtype=np.float32) @ query
+            if mask is not None:
+                scores[~mask[start:end]] = -np.inf
+            top = np.argpartition(-scores, n - 1)[:n] if len(scores) > n else np.arange(len(scores))
+            best_rows.append(top + start)
+            best_scores.append(scores[top])
+        rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+        order = np.argsort(-scores, kind="stable")[:n]
+        return [(int(rows[i]), float(scores[i])) for i in order if scores[i] > -np.inf]
+
+
+@dataclass
+class NumpyEmbeddingDB(AbstractEmbeddingDB):
+    """
+    MicroCore embedding DB keeping collections as `VectorCollection` files.
+    Search is exact (blocked matrix-vector products), distances are cosine distances.
+    """
+
+    config: object
+    settings: VectorStoreConfig = None
+    embedding_function: object = None
+
+    def __post_init__(self):
+        self.settings = self.settings or VectorStoreConfig()
+        self.embedding_function = self.embedding_function or self.config.EMBEDDING_DB_FUNCTION
+        self._collections: dict[str, VectorCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, name: str) -> VectorCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = VectorCollection(
+                    os.path.join(self.settings.path, name), self.settings.block_size
+                )
+            return self._collections[name]
+
+    def _result(self, collection: VectorCollection, row: int, distance: float = None):
+        attrs = dict(metadata=collection.metadatas[row], id=collection.ids[row])
+        if distance is not None:
+            attrs["distance"] = distance
+        return SearchResult(collection.documents[row], attrs)
+
+    def search(
+        self,
+        collection: str,
+        query: str | list,
+        n_results: int = 5,
+        where: dict = None,
+        **kwargs,
+    ) -> list[str | SearchResult]:
+        if not self._collection(collection).exists():
+            return SearchResults([])
+        if isinstance(query, str):
+            query = [query]
+        # As with Chroma wrapper, results are returned for the first query
+        vector = self.embedding_function(query[:1])[0]
+        return self.search_by_vector(collection, vector, n_results, where)
+
+    def search_by_vector(
+        self, collection: str, vector: list[float], n_results: int = 5, where: dict = None
+    ) -> list[SearchResult]:
+        """Like `search`, with the query embedding computed by the caller"""
+        c = self._collection(collection)
+        if not c.exists():
+            return SearchResults([])
+        vector = np.asarray(vector, dtype=np.float32)
+        # Rows are resolved to documents under the same lock: compaction renumbers them
+        with c._locked():
+            found = c.search(vector, min(n_results, len(c)), where)
+            results = [self._result(c, row, 1 - score) for row, score in found]
+        return SearchResults(results)
+
+    def save_many(self, collection: str, items: list[tuple[str, dict] | str]):
+        unique = not self.config.EMBEDDING_DB_ALLOW_DUPLICATES
+        texts, ids, metadatas = [], [], []
+        for i in items:
+            text, metadata = (i, None) if isinstance(i, str) else (i[0], i[1] or None)
+            if unique and text in texts:
+                continue
+            texts.append(text)
+            metadatas.append(metadata)
+            ids.append(
+                hashlib.sha1(text.encode("utf-8")).hexdigest() if unique else str(uuid.uuid4())
+            )
+        if texts:
+            vectors = self.embedding_function(texts)
+            self._collection(collection).upsert(ids, texts, metadatas, vectors)
+
+    def clear(self, collection: str):
+        c = self._collection(collection)
+        with c._locked(exclusive=True):
+            shutil.rmtree(c.path, ignore_errors=True)
+            c._reset()
+
+    def count(self, collection: str) -> int:
+        return len(self._collection(collection))
+
+    def delete(self, collection: str, what: str | list[str] | dict):
+        c = self._collection(collection)
+        if not c.exists():
+            return
+        if isinstance(what, str):
+            what = [what]
+        elif not isinstance(what, (list, dict)):
+            raise ValueError("Invalid `what` argument")
+        with c._locked(exclusive=True):
+            if isinstance(what, list):
+                c.delete(ids=what)
+            else:
+                c.delete(where=what)
+            settings = self.settings
+            if (
+                len(c.deleted) >= settings.compact_min_rows
+                and len(c.deleted) > settings.compact_ratio * len(c.ids)
+            ):
+                c.compact()
+
+    def update_metadata(self, collection: str, ids: list[str], metadatas: list[dict]):
+        c = self._collection(collection)
+        if c.exists():
+            c.update_metadata(ids, metadatas)
+
+    def compact(self, collection: str):
+        self._collection(collection).compact()
+
+    def embeddings(self, collection: str) -> tuple[list[dict], np.ndarray]:
+        """Metadata and embeddings (float16, normalized) of all documents"""
+        c = self._collection(collection)
+        with c._locked():
+            c._sync()
+            rows = c.live_rows()
+            if not rows:
+                return [], np.zeros((0, c.dim or 0), np.float16)
+            return [c.metadatas[r] for r in rows], c.vectors if not c.deleted else c.vectors[rows]
+
+    def get(
+        self,
+        collection: str,
+        ids: list[str] | str = None,
+        limit: int = None,
+        offset: int = None,
+        where: dict = None,
+        **kwargs,
+    ) -> list[str | SearchResult] | str | SearchResult | None:
+        c = self._collection(collection)
+        with c._locked():
+            c._sync()
+            if ids is not None:
+                wanted = [ids] if isinstance(ids, str) else ids
+                rows = [c.rows[i] for i in wanted if i in c.rows]
+                if where:
+                    rows = [r for r in rows if matches(c.metadatas[r], where)]
+            else:
+                rows = c.live_rows(where)
+            rows = rows[offset or 0:]
+            if limit is not None:
+                rows = rows[:limit]
+            results = [self._result(c, r) for r in rows]
+        if isinstance(ids, str):
+            return results[0] if results else None
+        return SearchResults(results)
+
+    def get_all(self, collection: str) -> list[str | SearchResult]:
+        return self.get(collection)
+
+    def collection_exists(self, collection: str) -> bool:
+        return self._collection(collection).exists()
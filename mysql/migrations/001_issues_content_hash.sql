@@ -0,0 +1,3 @@
+USE ema;
+
+ALTER TABLE issues ADD COLUMN IF NOT EXISTS content_hash CHAR(40) AFTER all_content;
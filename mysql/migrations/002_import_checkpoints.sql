@@ -0,0 +1,7 @@
+USE ema;
+
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    name VARCHAR(64) PRIMARY KEY,
+    state MEDIUMTEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
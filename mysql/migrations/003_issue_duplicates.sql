@@ -0,0 +1,9 @@
+USE ema;
+
+CREATE TABLE IF NOT EXISTS issue_duplicates (
+    issue_id VARCHAR(50) NOT NULL,
+    duplicate_id VARCHAR(50) NOT NULL,
+    similarity FLOAT NOT NULL,
+    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (issue_id, duplicate_id)
+);
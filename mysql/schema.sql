@@ -42,10 +42,25 @@ CREATE TABLE issues (
     updated_at TIMESTAMP,
     canceled_at TIMESTAMP,
     all_content MEDIUMTEXT, -- title+description+comments + related users, etc; for full-text / similarity search
+    content_hash CHAR(40), -- technical: hash of the stored fields, used to skip no-op updates on import
     FULLTEXT(all_content)
 );
+
+CREATE TABLE issue_duplicates ( -- candidate duplicates by content similarity (ema find-duplicates)
+    issue_id VARCHAR(50) NOT NULL, -- human-readable id
+    duplicate_id VARCHAR(50) NOT NULL, -- human-readable id of the likely duplicate; pairs are stored in both directions
+    similarity FLOAT NOT NULL, -- cosine similarity of all_content embeddings, 0..1, higher is more likely a duplicate
+    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (issue_id, duplicate_id)
+);
 -- </AI>
 
 create table users (
     user VARCHAR(255) PRIMARY KEY
-)
\ No newline at end of file
+);
+
+create table import_checkpoints (
+    name VARCHAR(64) PRIMARY KEY,
+    state MEDIUMTEXT NOT NULL, -- JSON: partitions, cursors, high-water mark of an unfinished import
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
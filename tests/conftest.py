@@ -0,0 +1,36 @@
+import microcore as mc
+import pytest
+
+from ema.env import EmaEnv
+
+
+def letter_embeddings(texts: list[str]) -> list[list[float]]:
+    """Deterministic letter-frequency vectors"""
+    return [[t.count(c) + 0.01 for c in "abcdefgh"] for t in texts]
+
+
+@pytest.fixture
+def numpy_env(monkeypatch, tmp_path) -> list[list[str]]:
+    """
+    MicroCore environment using the numpy vector store and storage in `tmp_path`.
+    Returns the list of texts passed to each embedding call.
+    """
+    monkeypatch.setenv("VECTOR_STORE_BACKEND", "numpy")
+    monkeypatch.setenv("VECTOR_STORE_PATH", str(tmp_path / "vector_store"))
+    monkeypatch.setattr("microcore._env._env", None)
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return letter_embeddings(texts)
+
+    EmaEnv(
+        mc.Config(
+            USE_DOT_ENV=False,
+            VALIDATE_CONFIG=False,
+            USE_LOGGING=False,
+            STORAGE_PATH=str(tmp_path / "storage"),
+            EMBEDDING_DB_FUNCTION=embed,
+        )
+    )
+    return calls
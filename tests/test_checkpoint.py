@@ -0,0 +1,37 @@
+from ema.checkpoint import ImportCheckpoint
+from ema.linear_api import IssuePage
+
+
+def page(partition: str, cursor: str, updated: list[str], has_next_page=True) -> IssuePage:
+    return IssuePage(
+        [{"id": u, "updatedAt": u} for u in updated],
+        partition=partition,
+        cursor=cursor,
+        has_next_page=has_next_page,
+    )
+
+
+def test_cursor_moves_only_past_completed_pages_in_order():
+    cp = ImportCheckpoint("test", "1970-01-01", {"a": {}, "b": {}})
+    first = cp.register(page("a", "1", ["2024-01-01T00:00:00", "2024-01-03T00:00:00"]))
+    second = cp.register(page("a", "2", ["2024-01-05T00:00:00"], has_next_page=False))
+    cp.done(second)
+    assert "a" not in cp.cursors
+    assert cp.high_water_mark is None
+    cp.done(first)
+    assert "a" not in cp.cursors
+    cp.done(first)
+    assert cp.cursors["a"] == "2"
+    assert cp.finished == {"a"}
+    assert cp.remaining_partitions == {"b": {}}
+    assert cp.high_water_mark == "2024-01-05 00:00:00"
+
+
+def test_empty_page_and_state_round_trip():
+    cp = ImportCheckpoint("test", "2024-01-01", {"all": {}}, started_at="2024-02-01 00:00:00")
+    cp.register(page("all", "9", [], has_next_page=False))
+    state = cp.state()
+    assert state["cursors"] == {"all": "9"}
+    restored = ImportCheckpoint("test", **state)
+    assert restored.remaining_partitions == {}
+    assert restored.started_at == "2024-02-01 00:00:00"
@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+import click
+import pytest
+import typer
+
+HEAVY_MODULES = ("chromadb", "sentence_transformers", "torch", "slack_bolt", "sqlalchemy")
+STARTUP_TIME_BUDGET = 3.0
+"""Seconds from interpreter start to command dispatch"""
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.argv = ["ema", *sys.argv[1:]]
+from ema.cli import app
+app.prepare()
+print(json.dumps({
+    "time": time.perf_counter() - start,
+    "heavy": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("args", [["--help"], ["teams"], ["teams", "--refresh"]])
+def test_startup_import_budget(args):
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT, *args],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT, "LLM_API_TYPE": "none"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    assert stats["heavy"] == []
+    assert stats["time"] < STARTUP_TIME_BUDGET
+
+
+def test_lazy_commands_are_listed():
+    from ema.cli import app
+    from ema.cli_app import command_index
+
+    index = command_index()
+    assert index["index-issues"]["module"] == "ema.commands.import_issues"
+    assert index["import-issues"]["hidden"]
+    assert index["send-issue-reviews"]["module"] == "ema.commands.issue_review"
+    assert index["slack"]["help"] == "CLI command to start the Slack bot."
+
+    group = typer.main.get_command(app)
+    ctx = click.Context(group)
+    assert {"teams", "index-issues", "webhook"} <= set(group.list_commands(ctx))
+    assert group.get_command(ctx, "webhook-replay").help
@@ -0,0 +1,93 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+import ema.db as db
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = sa.create_engine("sqlite://")
+    monkeypatch.setattr(db, "db_engine", engine)
+    monkeypatch.setattr(db, "db_metadata", sa.MetaData())
+    with engine.begin() as conn:
+        conn.execute(sa.text("CREATE TABLE issues (uuid TEXT PRIMARY KEY, id TEXT, all_content TEXT)"))
+    return engine
+
+
+class RecordingUpserter(db.BulkUpserter):
+    """Writes with a plain INSERT (SQLite has no ON DUPLICATE KEY UPDATE), records batches"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    def _write(self, conn, rows):
+        self.batches.append(len(rows))
+        conn.execute(sa.insert(self.table), rows)
+
+
+def stored(engine) -> list[tuple]:
+    with engine.connect() as conn:
+        return conn.execute(sa.text("SELECT uuid, id, all_content FROM issues ORDER BY uuid")).all()
+
+
+def test_table_is_reflected_once(engine):
+    assert db.table("issues") is db.table("issues")
+    assert list(db.table("issues").c.keys()) == ["uuid", "id", "all_content"]
+
+
+def test_bulk_upserter_batches_and_flushes_on_exit(engine):
+    with RecordingUpserter("issues", batch_size=2, flush_interval=3600) as writer:
+        for i in range(5):
+            writer.add(dict(uuid=f"u{i}", id=f"I-{i}", all_content="text"))
+        assert writer.batches == [2, 2]
+        assert len(stored(engine)) == 4
+    assert writer.batches == [2, 2, 1]
+    assert writer.written == 5
+    assert len(stored(engine)) == 5
+
+
+def test_bulk_upserter_flush_interval(engine, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(db, "time", lambda: now[0])
+    checkpoints = []
+    writer = RecordingUpserter(
+        "issues", batch_size=100, flush_interval=5, on_flush=lambda conn: checkpoints.append(1)
+    )
+    now[0] += 1
+    writer.add(dict(uuid="a", id="A-1", all_content="text"))
+    assert writer.batches == []
+    now[0] += 5
+    writer.add(dict(uuid="b", id="B-1", all_content="text"))
+    assert writer.batches == [2] and checkpoints == [1]
+    writer.flush_if_due()
+    assert checkpoints == [1]
+    now[0] += 5
+    writer.flush_if_due()  # No rows, but on_flush still runs
+    assert writer.batches == [2] and checkpoints == [1, 1]
+
+
+def test_bulk_upserter_on_flush_shares_transaction(engine):
+    def fail(conn):
+        raise RuntimeError("checkpoint failed")
+
+    writer = RecordingUpserter("issues", on_flush=fail)
+    writer.rows.append(dict(uuid="a", id="A-1", all_content="text"))
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    assert stored(engine) == []
+    assert writer.written == 0
+
+
+def test_bulk_upserter_upserts(engine):
+    executed = []
+    writer = db.BulkUpserter("issues")
+    writer._write(
+        type("Conn", (), {"execute": lambda self, stmt: executed.append(stmt)})(),
+        [dict(uuid="a", id="A-1", all_content="new")],
+    )
+    sql = str(executed[0].compile(dialect=mysql.dialect()))
+    assert sql.startswith("INSERT INTO issues")
+    update_clause = sql.split("ON DUPLICATE KEY UPDATE")[1]
+    assert all(column in update_clause for column in ("uuid", "id", "all_content"))
@@ -0,0 +1,91 @@
+import microcore as mc
+import numpy as np
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+import ema.db as db
+from ema.commands.duplicates import find_duplicates_command
+from ema.duplicates import (
+    DUPLICATES_INFO_FILE,
+    DuplicatesConfig,
+    find_duplicates,
+    issue_duplicates,
+    save_duplicates,
+    stored_counterparts,
+    top_k_similar,
+)
+
+
+def test_top_k_similar_matches_brute_force():
+    rng = np.random.default_rng(0)
+    corpus = rng.normal(size=(50, 8)).astype(np.float32)
+    rows = np.array([3, 17, 49])
+    found, scores = top_k_similar(corpus[rows], corpus, 4, rows, block_size=7)
+
+    normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    similarity = normalized[rows] @ normalized.T
+    similarity[np.arange(len(rows)), rows] = -np.inf
+    expected = np.argsort(-similarity, axis=1)[:, :4]
+    assert found.tolist() == expected.tolist()
+    assert np.allclose(scores, np.take_along_axis(similarity, expected, axis=1))
+
+
+def test_find_duplicates_pairs_above_threshold():
+    vectors = np.array([[1.0, 0.0, 0.0], [0.99, 0.05, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    ids = ["A-1", "A-2", "A-3", "A-4"]
+    config = DuplicatesConfig(threshold=0.9, top_k=2, block_size=2, query_block_size=1)
+    assert [p[:2] for p in find_duplicates(ids, vectors, [0, 1, 2, 3], config)] == [("A-1", "A-2")]
+    # Incremental check of the newer issue finds the same pair
+    pairs = find_duplicates(ids, vectors, [1], config)
+    assert [p[:2] for p in pairs] == [("A-1", "A-2")] and pairs[0][2] > 0.99
+    assert find_duplicates(ids, vectors, [3], config) == []
+
+
+@pytest.fixture
+def duplicates_db(monkeypatch):
+    engine = sa.create_engine("sqlite://")
+    monkeypatch.setattr(db, "db_engine", engine)
+    monkeypatch.setattr(db, "session_factory", sessionmaker(bind=engine), raising=False)
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "CREATE TABLE issue_duplicates (issue_id TEXT, duplicate_id TEXT, similarity REAL, "
+                "PRIMARY KEY (issue_id, duplicate_id))"
+            )
+        )
+
+
+def test_incremental_check_keeps_pairs_found_by_counterparts(duplicates_db):
+    # C's nearest issue is D, X's nearest is C: top-1 finds (X, C) only from X's side
+    ids = ["C", "D", "X"]
+    vectors = np.array([[1.0, 0.0], [0.999, -0.04], [0.95, 0.31]])
+    config = DuplicatesConfig(threshold=0.9, top_k=1)
+    save_duplicates(find_duplicates(ids, vectors, [0, 1, 2], config))
+    assert [d["duplicate_id"] for d in issue_duplicates("C")] == ["D", "X"]
+
+    checked = ["C"]
+    assert stored_counterparts(checked) == ["D", "X"]
+    rows = [ids.index(i) for i in checked + stored_counterparts(checked)]
+    save_duplicates(find_duplicates(ids, vectors, rows, config), checked)
+    assert [d["duplicate_id"] for d in issue_duplicates("C")] == ["D", "X"]
+    assert [d["duplicate_id"] for d in issue_duplicates("X")] == ["C"]
+
+
+def test_find_duplicates_command(numpy_env, duplicates_db):
+    mc.texts.save_many(
+        "issues",
+        [
+            ("aaaa bbbb", {"issue_id": "A-1", "updated_ts": 10}),
+            ("aaaa bbbb.", {"issue_id": "A-2", "updated_ts": 20}),
+            ("hhhh", {"issue_id": "A-3", "updated_ts": 30}),
+            ("no issue", {}),
+        ],
+    )
+    find_duplicates_command(full=True, threshold=0.99, top_k=2)
+    assert [d["duplicate_id"] for d in issue_duplicates("A-1")] == ["A-2"]
+    assert issue_duplicates("A-3") == []
+    assert mc.storage.read_json(DUPLICATES_INFO_FILE)["last_checked_ts"] == 30
+
+    find_duplicates_command(full=True, threshold=0, top_k=1)  # Explicit zero is not the default
+    assert [d["duplicate_id"] for d in issue_duplicates("A-3")] != []
@@ -0,0 +1,49 @@
+import numpy as np
+
+from ema.embedding_cache import EmbeddingCache
+
+
+def test_cache_persists_and_evicts_lru(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "org/model", capacity=3)
+    assert cache.get_many(["a"]) == [None]
+    cache.put_many(["a", "b", "c"], np.eye(3))
+    cache.get_many(["a"])  # "b" is the least recently used now
+    cache.put_many(["d"], [[1.0, 1.0, 1.0]])
+    cache.flush()
+
+    reopened = EmbeddingCache(str(tmp_path), "org/model")
+    a, b, d = reopened.get_many(["a", "b", "d"])
+    assert b is None
+    assert a.tolist() == [1.0, 0.0, 0.0]
+    assert d.tolist() == [1.0, 1.0, 1.0]
+    assert len(reopened) == 3
+    assert (reopened.hits, reopened.misses) == (2, 1)
+
+
+def test_cache_keeps_capacity_on_large_batch(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", capacity=2)
+    cache.put_many(["a", "b", "c"], np.ones((3, 4)))
+    assert len(cache) == 2
+    cache.put_many(["x", "y"], np.zeros((2, 4)))
+    assert cache.get_many(["x", "y"])[1].tolist() == [0.0] * 4
+    assert cache.get_many(["a", "b"]) == [None, None]
+
+
+def test_cache_is_shared_between_instances(tmp_path):
+    """Instances stand for processes sharing the files"""
+    first = EmbeddingCache(str(tmp_path), "model", capacity=2)
+    second = EmbeddingCache(str(tmp_path), "model", capacity=2)
+    first.put_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    assert second.get_many(["a"])[0].tolist() == [1.0, 0.0]  # Opens the files created by `first`
+
+    # `second` evicts "a" and reuses its slot for "c", `first` must not return it for "a"
+    second.get_many(["b"])
+    second.put_many(["c"], [[1.0, 1.0]])
+    assert first.get_many(["a", "b"])[0] is None
+    first.put_many(["a"], [[2.0, 2.0]])  # Reloads the slots: "b" is evicted, "c" is kept
+    assert first.get_many(["b", "c"])[1].tolist() == [1.0, 1.0]
+    second.put_many(["d"], [[3.0, 3.0]])  # Evicts "a", used by `first` before "c"
+    c, d = second.get_many(["c", "d"])
+    assert (c.tolist(), d.tolist()) == ([1.0, 1.0], [3.0, 3.0])
+    assert first.get_many(["a"]) == [None]
+    assert len(second) == 2
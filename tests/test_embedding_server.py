@@ -0,0 +1,82 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from ema.embedding_server import EmbeddingServer, RemoteEmbeddingFunction
+
+
+def fake_embed(texts: list[str]) -> np.ndarray:
+    return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_server_micro_batches_concurrent_requests(tmp_path):
+    socket_path = str(tmp_path / "emb.sock")
+    server = EmbeddingServer(socket_path, fake_embed, max_batch=100, max_wait=0.05)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        fn = RemoteEmbeddingFunction(socket_path, fallback=lambda: None)
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda i: fn(["x" * i, "y"]), range(1, 17)))
+        assert results == [[[float(i), 1.0], [1.0, 1.0]] for i in range(1, 17)]
+        assert server.batcher.batches < 16
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not os.path.exists(socket_path)
+
+
+def test_falls_back_to_in_process_when_server_is_down(tmp_path):
+    created = []
+
+    def fallback():
+        created.append(1)
+        return lambda texts: fake_embed(texts).tolist()
+
+    fn = RemoteEmbeddingFunction(str(tmp_path / "missing.sock"), fallback=fallback)
+    assert fn(["ab"]) == [[2.0, 1.0]]
+    assert fn(["abc"]) == [[3.0, 1.0]]
+    assert created == [1]
+
+
+def test_server_refuses_to_replace_running_server(tmp_path):
+    socket_path = str(tmp_path / "emb.sock")
+    server = EmbeddingServer(socket_path, fake_embed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(OSError):
+            EmbeddingServer(socket_path, fake_embed)
+        assert RemoteEmbeddingFunction(socket_path, fallback=lambda: None)(["ab"]) == [[2.0, 1.0]]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_server_replaces_stale_socket(tmp_path):
+    socket_path = str(tmp_path / "emb.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    server = EmbeddingServer(socket_path, fake_embed)
+    server.server_close()
+
+
+def test_falls_back_on_server_error(tmp_path):
+    def failing_embed(texts: list[str]) -> np.ndarray:
+        raise ValueError("out of memory")
+
+    socket_path = str(tmp_path / "emb.sock")
+    server = EmbeddingServer(socket_path, failing_embed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        fn = RemoteEmbeddingFunction(
+            socket_path, fallback=lambda: lambda texts: fake_embed(texts).tolist()
+        )
+        assert fn(["abc"]) == [[3.0, 1.0]]
+        assert getattr(fn.client._local, "sock", None) is None
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+
+from ema.embeddings import EmbeddingBackend, EmbeddingConfig, cosine_drift  # noqa: E402
+
+
+def test_cosine_drift():
+    baseline = np.array([[1.0, 0.0], [0.0, 2.0]])
+    assert cosine_drift(baseline, baseline * 3)["max_drift"] == pytest.approx(0)
+    drift = cosine_drift(baseline, np.array([[1.0, 0.0], [1.0, 1.0]]))
+    assert drift["min_cosine"] == pytest.approx(2 ** -0.5)
+    assert drift["mean_cosine"] == pytest.approx((1 + 2 ** -0.5) / 2)
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "int8")
+    monkeypatch.setenv("EMBEDDING_THREADS", "4")
+    config = EmbeddingConfig()
+    assert config.backend == EmbeddingBackend.INT8
+    assert config.threads == 4
+
+
+def test_cached_embedding_function_embeds_only_misses(tmp_path):
+    from ema.embedding_cache import EmbeddingCache
+    from ema.embeddings import CachedEmbeddingFunction
+
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    fn = CachedEmbeddingFunction(embed, EmbeddingCache(str(tmp_path), "fake"))
+    assert fn(["a", "bb"]) == [[1.0, 1.0], [2.0, 1.0]]
+    assert fn(["bb", "ccc"]) == [[2.0, 1.0], [3.0, 1.0]]
+    assert calls == [["a", "bb"], ["ccc"]]
@@ -0,0 +1,186 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import microcore as mc
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+import ema.commands.import_issues as import_issues
+import ema.db as db
+import ema.env as env
+from ema.checkpoint import ImportCheckpoint
+from ema.commands.import_issues import estimate_issue_qty, historical_assignees, hours_since
+from ema.indexing import INDEX_INFO_FILE, row_hash
+from ema.linear_api import IssuePage
+
+NOW = datetime(2024, 1, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def test_hours_since_treats_naive_time_as_utc():
+    assert hours_since("2024-01-02 10:00:00", NOW) == 2
+    assert hours_since("2024-01-02T10:00:00+02:00", NOW) == 4
+
+
+def test_estimate_issue_qty():
+    info = {"total_issues": 500, "updates_per_hour": 10}
+    assert estimate_issue_qty(info, "1970-01-01", full=True, now=NOW) == 500
+    assert estimate_issue_qty({}, "1970-01-01", full=True, now=NOW) == 0
+    assert estimate_issue_qty(info, "2024-01-02 09:00:00", full=False, now=NOW) == 30
+    assert estimate_issue_qty(info, "2024-01-02 11:59:00", full=False, now=NOW) == 1
+    assert estimate_issue_qty({"updates_per_hour": None}, "2024-01-01", full=False, now=NOW) == 0
+
+
+def user(name: str) -> dict:
+    return dict(displayName=name.lower(), name=name)
+
+
+MULTI_ASSIGNEE_TASK = dict(
+    assignee=user("Carol"),
+    history=dict(
+        nodes=[
+            dict(toAssignee=user("Bob"), fromAssignee=user("Alice")),
+            dict(toAssignee=user("Dave"), fromAssignee=user("Bob")),
+            dict(toAssignee=user("Carol"), fromAssignee=None),
+        ]
+    ),
+)
+
+
+def test_historical_assignees_are_sorted():
+    assert historical_assignees(MULTI_ASSIGNEE_TASK) == (
+        "@alice(Alice), @bob(Bob), @carol(Carol), @dave(Dave)"
+    )
+
+
+def test_row_hash_is_stable_across_processes():
+    """String hashing is randomized per process, the row hash must not depend on it"""
+    script = (
+        "from ema.commands.import_issues import historical_assignees\n"
+        "from ema.indexing import row_hash\n"
+        "from tests.test_import_issues import MULTI_ASSIGNEE_TASK as task\n"
+        "print(row_hash(dict(id='A-1', historical_assignees=historical_assignees(task))))"
+    )
+    hashes = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": str(seed)},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in range(3)
+    }
+    assert len(hashes) == 1
+
+
+def test_render_issue_recomputes_content_hash(monkeypatch):
+    monkeypatch.setattr(import_issues, "issue_view", lambda row: f"new view of {row['id']}")
+    stored = dict(uuid="u1", id="A-1", title="Title", all_content="old view", updated_at=None)
+    stored["content_hash"] = row_hash(stored)
+    rendered = import_issues.render_issue(stored)
+    assert rendered["all_content"] == "new view of A-1"
+    assert rendered["content_hash"] == row_hash({**stored, "all_content": "new view of A-1"})
+    assert rendered["content_hash"] != stored["content_hash"]
+
+
+class FakeLinearApi:
+    config = SimpleNamespace(parallelism=1)
+
+    def __init__(self, issues: list[dict]):
+        self.issues = issues
+
+    def issue_partitions(self, parallelism: int) -> dict:
+        return {"all": {}}
+
+    def iter_issues(self, **kwargs):
+        yield IssuePage(self.issues, partition="all")
+
+
+def issue_row(task: dict) -> dict:
+    row = dict(
+        uuid=task["id"],
+        id=task["identifier"],
+        title=task["title"],
+        all_content=task["title"],
+        team="Core",
+        state="Done",
+        updated_at="2024-02-01 00:00:00",
+    )
+    row["content_hash"] = row_hash(row)
+    return row
+
+
+@pytest.fixture
+def import_env(numpy_env, monkeypatch):
+    """SQLite issues table, fake Linear issues, no checkpoint persistence"""
+    engine = sa.create_engine("sqlite://")
+    monkeypatch.setattr(db, "db_engine", engine)
+    monkeypatch.setattr(db, "db_metadata", sa.MetaData())
+    monkeypatch.setattr(db, "session_factory", sessionmaker(bind=engine), raising=False)
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "CREATE TABLE issues (uuid TEXT PRIMARY KEY, id TEXT, title TEXT, all_content TEXT, "
+                "content_hash TEXT, team TEXT, state TEXT, updated_at TEXT)"
+            )
+        )
+    # SQLite has no ON DUPLICATE KEY UPDATE
+    monkeypatch.setattr(
+        db.BulkUpserter,
+        "_write",
+        lambda self, conn, rows: conn.execute(sa.insert(self.table).prefix_with("OR REPLACE"), rows),
+    )
+    monkeypatch.setattr(ImportCheckpoint, "save", lambda self, conn: None)
+    monkeypatch.setattr(ImportCheckpoint, "load", classmethod(lambda cls, name: None))
+    monkeypatch.setattr(ImportCheckpoint, "delete", staticmethod(lambda name: None))
+    monkeypatch.setattr(import_issues, "map_issue", issue_row)
+    tasks = [
+        dict(id=f"u{i}", identifier=f"A-{i}", title=f"title {i}", updatedAt="2024-02-01T00:00:00")
+        for i in range(3)
+    ]
+    monkeypatch.setattr(env, "linear_api", FakeLinearApi(tasks), raising=False)
+    mc.storage.write_json(INDEX_INFO_FILE, {"last_indexed": "2024-01-01 00:00:00"})
+    return tasks
+
+
+def run_index_issues():
+    import_issues.index_issues(
+        force=False,
+        resume=False,
+        exact_count=False,
+        parallel=1,
+        batch_size=10,
+        flush_interval=5.0,
+        embed_batch_size=10,
+        render_workers=1,
+        render_processes=False,
+        fast=False,
+    )
+
+
+def test_rerun_indexes_rows_stored_before_a_failed_embedding(import_env, monkeypatch):
+    def fail(texts):
+        raise RuntimeError("embedding failed")
+
+    store = env.vector_db().instance
+    embed, store.embedding_function = store.embedding_function, fail
+    with pytest.raises(RuntimeError):
+        run_index_issues()
+    assert db.sql("SELECT COUNT(*) AS qty FROM issues")[0]["qty"] == 3
+    assert mc.texts.count("issues") == 0
+
+    store.embedding_function = embed
+    run_index_issues()  # A normal run, rows are unchanged in the DB
+    assert sorted(d.metadata["issue_id"] for d in mc.texts.get("issues")) == ["A-0", "A-1", "A-2"]
+
+
+def test_process_task_indexes_unchanged_row_without_vector(import_env):
+    task = import_env[0]
+    with db.BulkUpserter("issues") as writer:
+        writer.add(issue_row(task))
+    import_issues.process_task(task)
+    assert [d.metadata["issue_id"] for d in mc.texts.get("issues")] == ["A-0"]
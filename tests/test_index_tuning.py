@@ -0,0 +1,32 @@
+import numpy as np
+
+from ema.index_tuning import exact_top_k, parameter_grid, recall_at_k, recommend, render_report
+from ema.vector_store import VectorStoreConfig
+
+
+def test_hnsw_metadata(monkeypatch):
+    assert VectorStoreConfig().hnsw_metadata() == {}
+    monkeypatch.setenv("VECTOR_STORE_HNSW_SPACE", "cosine")
+    monkeypatch.setenv("VECTOR_STORE_HNSW_SEARCH_EF", "50")
+    assert VectorStoreConfig().hnsw_metadata() == {"hnsw:space": "cosine", "hnsw:search_ef": 50}
+
+
+def test_exact_top_k_by_space():
+    vectors = np.array([[1.0, 0.0], [10.0, 1.0], [0.0, 1.0], [0.9, 0.1]])
+    query = np.array([[1.0, 0.08]])
+    assert exact_top_k(vectors, query, 2, "l2").tolist() == [[0, 3]]
+    assert exact_top_k(vectors, query, 2, "cosine").tolist() == [[1, 3]]
+    assert exact_top_k(vectors, query, 1, "ip").tolist() == [[1]]
+    assert recall_at_k([[3, 2]], exact_top_k(vectors, query, 2, "l2")) == 0.5
+
+
+def test_report_recommends_fastest_with_target_recall():
+    grid = parameter_grid("l2", [8, 16], [100], [10])
+    results = [
+        dict(grid[0], recall=0.9, p50_ms=1.0, p95_ms=2.0, build_s=1.0, index_mb=1.0, rss_mb=None),
+        dict(grid[1], recall=0.99, p50_ms=1.5, p95_ms=3.0, build_s=2.0, index_mb=2.0, rss_mb=5.0),
+    ]
+    assert recommend(results, 0.95) is results[1]
+    report = render_report(results, dict(vectors=4), 0.95)
+    assert "VECTOR_STORE_HNSW_M=16" in report
+    assert report.count("| l2 |") == 2
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import microcore as mc
+import pytest
+
+from ema.indexing import VectorIndexer, content_hash, row_hash
+from ema.retrieval import index_version
+
+
+class FakeTexts:
+    """In-memory stand-in for mc.texts supporting `issue_id: {$in: [...]}` filters"""
+
+    def __init__(self):
+        self.docs = []
+        self.save_calls = 0
+
+    def get(self, collection, where=None):
+        ids = where["issue_id"]["$in"]
+        return [d for d in self.docs if d.metadata["issue_id"] in ids]
+
+    def delete(self, collection, what):
+        ids = what["issue_id"]["$in"]
+        self.docs = [d for d in self.docs if d.metadata["issue_id"] not in ids]
+
+    def save_many(self, collection, items):
+        self.save_calls += 1
+        self.docs += [
+            SimpleNamespace(id=content_hash(text), text=text, metadata=metadata)
+            for text, metadata in items
+        ]
+
+
+@pytest.fixture(autouse=True)
+def storage(monkeypatch, tmp_path) -> dict:
+    """In-memory text files of mc.storage"""
+    files = {}
+    monkeypatch.setattr(mc.storage, "read", lambda name, default=None: files.get(name, default))
+    monkeypatch.setattr(
+        mc.storage, "write", lambda name, content, **kwargs: files.__setitem__(name, content)
+    )
+    monkeypatch.setattr(mc.storage, "read_json", lambda name, default=None: default)
+    monkeypatch.setattr(mc.storage, "abs_path", lambda name: str(tmp_path / name))
+    return files
+
+
+def test_vector_indexer_batches_and_skips_unchanged(monkeypatch):
+    texts = FakeTexts()
+    monkeypatch.setattr(mc, "texts", texts)
+
+    with VectorIndexer(batch_size=2) as indexer:
+        for i in range(5):
+            indexer.add(f"I-{i}", f"text {i}")
+    assert texts.save_calls == 3
+    assert indexer.saved == 5
+
+    with VectorIndexer(batch_size=10) as indexer:
+        indexer.add("I-0", "text 0")
+        indexer.add("I-1", "changed")
+    assert (indexer.saved, indexer.skipped) == (1, 1)
+    assert len(texts.docs) == 5
+    doc = next(d for d in texts.docs if d.metadata["issue_id"] == "I-1")
+    assert doc.metadata["content_hash"] == content_hash("changed")
+
+
+def test_vector_indexer_updates_metadata_without_embedding(numpy_env):
+    with VectorIndexer() as indexer:
+        indexer.add("I-1", "text", {"state": "Todo"})
+    with VectorIndexer() as indexer:
+        indexer.add("I-1", "text", {"state": "Done"})
+    assert (indexer.saved, indexer.updated, indexer.skipped) == (0, 1, 0)
+    assert numpy_env == [["text"]]
+    [doc] = mc.texts.get("issues")
+    assert doc.metadata["state"] == "Done"
+    assert doc.metadata["content_hash"] == content_hash("text")
+
+
+def test_vector_indexer_resaves_metadata_without_backend_support(monkeypatch):
+    texts = FakeTexts()
+    monkeypatch.setattr(mc, "texts", texts)
+    monkeypatch.setattr("ema.env.vector_db", lambda: texts)
+    with VectorIndexer() as indexer:
+        indexer.add("I-1", "text", {"state": "Todo"})
+    with VectorIndexer() as indexer:
+        indexer.add("I-1", "text", {"state": "Done"})
+    assert (indexer.saved, indexer.updated) == (1, 0)
+    assert [d.metadata["state"] for d in texts.docs] == ["Done"]
+
+
+def test_vector_index_writes_change_index_version(monkeypatch):
+    monkeypatch.setattr(mc, "texts", FakeTexts())
+    initial = index_version()
+    with VectorIndexer() as indexer:
+        indexer.add("I-1", "text")
+    changed = index_version()
+    assert changed != initial
+    with VectorIndexer() as indexer:
+        indexer.add("I-1", "text")  # Unchanged, nothing written
+    assert index_version() == changed
+
+
+def test_row_hash_ignores_updated_at():
+    row = {"uuid": "u", "title": "Title", "updated_at": "2025-01-01 00:00:00"}
+    assert row_hash(row) == row_hash({**row, "updated_at": "2025-02-01 00:00:00"})
+    assert row_hash(row) == row_hash({**row, "content_hash": "x"})
+    assert row_hash(row) != row_hash({**row, "title": "Changed"})
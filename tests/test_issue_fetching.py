@@ -0,0 +1,233 @@
+import re
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from ema.linear.loader import IssueLoader
+from ema.linear.paging import AdaptivePageSize
+from ema.linear.transport import LinearApiError, LinearResponse
+from ema.linear_api import ISSUE_CONNECTIONS, IssuePage, LinearApi, LinearConfig
+
+
+class FakeLinearApi(LinearApi):
+    """
+    Serves issues from memory, filtering by createdAt windows.
+    Reports complexity of `node_cost` per requested node, rejects pages above `max_complexity`.
+    """
+
+    def __init__(self, issues: list[dict], node_cost: int = None, max_complexity=10000, **config):
+        super().__init__(LinearConfig(**{"issues_page_size": 2, **config}))
+        self.data = issues
+        self.node_cost = node_cost
+        self.max_complexity = max_complexity
+        self.requests = 0
+        self.transport.post = self.post
+
+    def fetch_issue_connections(self, issues: list[dict]) -> list[dict]:
+        return issues
+
+    def post(self, query: str, variables: dict = None) -> LinearResponse:
+        self.requests += 1
+        first = variables["first"]
+        if self.node_cost and first * self.node_cost > self.max_complexity:
+            raise LinearApiError("Query too complex", 400, [{"message": "Query too complex"}])
+        created = (variables.get("teamFilter") or {}).get("createdAt")
+        items = [
+            i
+            for i in self.data
+            if not created
+            or (created.get("gte", "") <= i["createdAt"] < created.get("lt", "9999"))
+        ]
+        offset = int(variables.get("cursor") or 0)
+        page = items[offset: offset + first]
+        data = {
+            "issues": {
+                "nodes": page,
+                "pageInfo": {
+                    "hasNextPage": offset + first < len(items),
+                    "endCursor": str(offset + first),
+                },
+            }
+        }
+        return LinearResponse(data, self.node_cost and first * self.node_cost)
+
+
+def make_issues(qty: int) -> list[dict]:
+    return [
+        {"id": f"id-{i}", "createdAt": datetime(2020 + i % 5, 1 + i % 12, 1).isoformat()}
+        for i in range(qty)
+    ]
+
+
+def test_fetch_all_issues_serial():
+    issues = make_issues(7)
+    api = FakeLinearApi(issues)
+    assert api.fetch_all_issues() == issues
+    assert api.requests == 4
+
+
+def test_iter_issues_is_lazy():
+    api = FakeLinearApi(make_issues(10))
+    issues = api.iter_issues()
+    assert api.requests == 0
+    next(issues)
+    next(issues)
+    assert api.requests == 1
+    assert len(next(api.iter_issues(pages=True))) == 2
+
+
+def test_fetch_all_issues_partitioned():
+    issues = make_issues(25)
+    api = FakeLinearApi(issues, backfill_start="2019-06-01")
+    seen = []
+    assert api.fetch_all_issues(callback=seen.append, parallel=3) is None
+    assert sorted(i["id"] for i in seen) == sorted(i["id"] for i in issues)
+
+
+def test_iter_issues_resumes_from_cursors():
+    issues = make_issues(25)
+    api = FakeLinearApi(issues, backfill_start="2019-06-01")
+    partitions = api.issue_partitions(parallel=3)
+    first = next(iter(partitions))
+    pages = list(api.iter_issues(pages=True, parallel=3, partitions=partitions))
+    first_page = next(p for p in pages if p.partition == first)
+    resumed = list(
+        api.iter_issues(parallel=3, partitions=partitions, cursors={first: first_page.cursor})
+    )
+    assert len(first_page) and len(resumed) == len(issues) - len(first_page)
+    assert all(isinstance(p, IssuePage) for p in pages)
+
+
+def test_time_windows_cover_range():
+    api = FakeLinearApi([], backfill_start="2019-01-01", windows_per_worker=2)
+    windows = api.time_windows(parallel=3)
+    assert len(windows) == 6
+    assert windows[0][0] == datetime(2019, 1, 1, tzinfo=timezone.utc)
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+    assert windows[-1][1] > datetime.now(timezone.utc)
+
+
+def test_partitions_are_open_ended():
+    issues = make_issues(25)
+    # Created before backfill_start
+    api = FakeLinearApi(issues, backfill_start="2022-01-01")
+    partitions = list(api.issue_partitions(parallel=3).values())
+    assert "gte" not in partitions[0]["createdAt"]
+    assert "lt" not in partitions[-1]["createdAt"]
+    seen = []
+    api.fetch_all_issues(callback=seen.append, parallel=3)
+    assert sorted(i["id"] for i in seen) == sorted(i["id"] for i in issues)
+
+
+class FakeConnectionsApi(LinearApi):
+    """Serves nested connections of `qty` nodes each, paginating by `detail_page_size`"""
+
+    def __init__(self, qty: int, deleted: tuple = ()):
+        super().__init__(LinearConfig(detail_batch_size=2, detail_page_size=3))
+        self.qty = qty
+        self.deleted = deleted
+        self.requests = 0
+        self.transport.post = lambda query, variables=None: LinearResponse(
+            self.request(query, variables)
+        )
+
+    def connection(self, offset: int, first: int) -> dict:
+        return {
+            "nodes": [{"n": i} for i in range(offset, min(offset + first, self.qty))],
+            "pageInfo": {"hasNextPage": offset + first < self.qty, "endCursor": str(offset + first)},
+        }
+
+    def request(self, query: str, variables: dict = None) -> dict:
+        self.requests += 1
+        if variables:
+            name = query.split("{")[2].split("(")[0].strip()
+            return {"issue": {name: self.connection(int(variables["cursor"]), variables["first"])}}
+        return {
+            alias: (
+                None
+                if issue_id in self.deleted
+                else {name: self.connection(0, 3) for name in ISSUE_CONNECTIONS}
+            )
+            for alias, issue_id in re.findall(r'(i\d+): issue\(id: "([^"]+)"\)', query)
+        }
+
+
+def test_fetch_issue_connections():
+    api = FakeConnectionsApi(qty=5)
+    issues = api.fetch_issue_connections([{"id": "a"}, {"id": "b"}, {"id": "c"}])
+    # 2 batched requests + 1 follow-up page per connection of each issue
+    assert api.requests == 2 + 3 * len(ISSUE_CONNECTIONS)
+    for issue in issues:
+        for name in ISSUE_CONNECTIONS:
+            assert [n["n"] for n in issue[name]["nodes"]] == list(range(5))
+
+
+def test_fetch_issue_connections_skips_deleted_issues():
+    api = FakeConnectionsApi(qty=2, deleted=("b",))
+    issues = api.fetch_issue_connections([{"id": "a"}, {"id": "b"}, {"id": "c"}])
+    assert [i["id"] for i in issues] == ["a", "c"]
+    assert all(len(i[name]["nodes"]) == 2 for i in issues for name in ISSUE_CONNECTIONS)
+
+
+def test_page_size_grows_for_light_queries():
+    api = FakeLinearApi(make_issues(100), node_cost=10, page_target_complexity=500)
+    pages = list(api.iter_issues(pages=True))
+    assert [len(p) for p in pages] == [2, 50, 48]
+
+
+def test_page_size_shrinks_when_too_complex():
+    api = FakeLinearApi(
+        make_issues(30), node_cost=100, max_complexity=1000, issues_page_size=40
+    )
+    pages = list(api.iter_issues(pages=True))
+    assert sum(len(p) for p in pages) == 30
+    assert max(len(p) for p in pages) <= 10
+
+
+def test_adaptive_page_size():
+    size = AdaptivePageSize(50, target_complexity=1000, max_size=250)
+    size.record(50, 50)
+    assert size.size == 250
+    size.record(250, 25000)
+    assert size.size < 50
+    assert size.shrink(40)
+    assert size.size == size.max_size
+    assert not AdaptivePageSize(1, 1000).shrink(1)
+
+
+def test_issues_by_ids_chunked():
+    issues = make_issues(7)
+    api = FakeLinearApi(issues, ids_chunk_size=3)
+    requested = []
+
+    def paginate_issues(criteria):
+        requested.append(criteria["id"]["in"])
+        yield [i for i in issues if i["id"] in criteria["id"]["in"]]
+
+    api.paginate_issues = paginate_issues
+    ids = ["id-5", "id-1", "missing", "id-5", "id-2", "id-0"]
+    assert [i["id"] for i in api.issues_by_ids(ids)] == ["id-5", "id-1", "id-2", "id-0"]
+    assert requested == [["id-5", "id-1", "missing"], ["id-2", "id-0"]]
+
+
+def test_issue_loader_coalesces_lookups():
+    issues = make_issues(5)
+    api = FakeLinearApi(issues)
+    calls = []
+    api.issues_by_ids = lambda ids: calls.append(ids) or [i for i in issues if i["id"] in ids]
+    loader = IssueLoader(api, window=0.05)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda i=i: results.update({i: loader.get(f"id-{i}")}))
+        for i in [0, 1, 2, 1]
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["id-0", "id-1", "id-2"]
+    assert results[1]["id"] == "id-1"
+    with pytest.raises(KeyError):
+        loader.get("missing")
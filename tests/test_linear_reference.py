@@ -0,0 +1,92 @@
+import pytest
+
+from ema.linear.reference import REFERENCE_FIELDS, ReferenceCache
+from ema.linear_api import LinearApi, LinearConfig, Team
+
+
+class FakeLinearApi(LinearApi):
+    def __init__(self, teams: list[dict], reference: dict[str, list[dict]] = None):
+        super().__init__(LinearConfig(reference_cache_file=""))
+        self.data = teams
+        self.reference_data = reference or {}
+        self.requests = 0
+
+    def paginate(self, connection: str, fields: str, first: int = 50):
+        self.requests += 1
+        yield self.data if connection == "teams" else self.reference_data[connection]
+
+
+TEAMS = [
+    {"id": "uuid-1", "name": "Backend", "key": "BE"},
+    {"id": "uuid-2", "name": "Frontend", "key": "FE"},
+]
+
+
+def test_find_team_uses_cache():
+    api = FakeLinearApi(TEAMS)
+    assert api.find_team("backend") == Team(**TEAMS[0])
+    assert api.find_team("Backend") == Team(**TEAMS[0])
+    assert api.find_team("FE") == Team(**TEAMS[1])
+    assert api.find_team("uuid-2") == Team(**TEAMS[1])
+    assert api.teams() == [Team(**t) for t in TEAMS]
+    assert api.requests == 1
+
+
+def test_ttl_and_invalidation():
+    api = FakeLinearApi(TEAMS)
+    cache = ReferenceCache(api, ttl=0)
+    cache.get("teams")
+    cache.get("teams")
+    assert api.requests == 2
+
+    cache = ReferenceCache(api, ttl=3600)
+    cache.get("teams")
+    cache.invalidate("teams")
+    cache.get("teams")
+    assert api.requests == 4
+
+
+def test_miss_refresh_is_rate_limited(monkeypatch):
+    api = FakeLinearApi(TEAMS)
+    now = [1000.0]
+    monkeypatch.setattr("ema.linear.reference.time", lambda: now[0])
+    cache = ReferenceCache(api, miss_refresh_interval=60)
+    assert cache.find("teams", "BE")["id"] == "uuid-1"
+    now[0] += 10
+    assert cache.find("teams", "unknown") is None
+    assert api.requests == 2
+    now[0] += 10
+    assert cache.find("teams", "unknown") is None
+    assert api.requests == 2
+    api.data = TEAMS + [{"id": "uuid-3", "name": "Mobile", "key": "MO"}]
+    now[0] += 60
+    assert cache.find("teams", "MO")["id"] == "uuid-3"
+    assert api.requests == 3
+
+
+REFERENCE = {
+    "workflowStates": [
+        {"id": "st-1", "name": "Done", "type": "completed", "team": {"id": "uuid-1"}},
+        {"id": "st-2", "name": "Done", "type": "completed", "team": {"id": "uuid-2"}},
+    ],
+    "users": [{"id": "us-1", "name": "Jane Roe", "displayName": "jane", "active": True}],
+    "projects": [{"id": "pr-1", "name": "Search", "url": "https://linear.app/p/search"}],
+}
+
+
+def test_find_state_user_project_use_cache():
+    api = FakeLinearApi(TEAMS, REFERENCE)
+    assert api.find_state("done", team="FE")["id"] == "st-2"
+    assert api.find_state("Done", team="Backend")["id"] == "st-1"
+    assert api.find_user("Jane")["id"] == "us-1"
+    assert api.find_user("jane roe")["id"] == "us-1"
+    assert api.find_project("search")["id"] == "pr-1"
+    assert api.find_project("pr-1")["id"] == "pr-1"
+    # teams, workflowStates, users, projects: one fetch each
+    assert api.requests == 4
+    with pytest.raises(ValueError):
+        api.find_user("nobody")
+
+
+def test_user_emails_are_not_fetched():
+    assert "email" not in REFERENCE_FIELDS["users"]
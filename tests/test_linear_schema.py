@@ -0,0 +1,65 @@
+import microcore as mc
+
+from ema.linear.transport import LinearApiError, LinearResponse
+from ema.linear_api import SCHEMA_FILE, LinearApi, LinearConfig, schema_version
+
+TYPES = [
+    {"name": "Issue", "kind": "OBJECT", "fields": [], "inputFields": None, "enumValues": None},
+    {"name": "__Type", "kind": "OBJECT", "fields": [], "inputFields": None, "enumValues": None},
+    {"name": "Team", "kind": "OBJECT", "fields": [], "inputFields": None, "enumValues": None},
+]
+
+
+class FakeLinearApi(LinearApi):
+    def __init__(self, full_introspection: bool):
+        super().__init__(LinearConfig(schema_batch_size=1))
+        self.full_introspection = full_introspection
+        self.requests = 0
+        self.transport.post = self.post
+
+    def post(self, query: str, variables: dict = None) -> LinearResponse:
+        self.requests += 1
+        if "fields" in query and "__type(" not in query:
+            if not self.full_introspection:
+                raise LinearApiError("Query too complex", status_code=400)
+            return LinearResponse({"__schema": {"types": TYPES}})
+        if "__type(" in query:
+            name = query.split('name: "')[1].split('"')[0]
+            return LinearResponse({"t0": next(t for t in TYPES if t["name"] == name)})
+        return LinearResponse({"__schema": {"types": TYPES}})
+
+
+def test_fetch_schema_single_request():
+    api = FakeLinearApi(full_introspection=True)
+    assert list(api.fetch_schema()["types"]) == ["Issue", "Team"]
+    assert api.requests == 1
+
+
+def test_fetch_schema_batched_fallback():
+    api = FakeLinearApi(full_introspection=False)
+    assert list(api.fetch_schema()["types"]) == ["Issue", "Team"]
+    assert api.requests == 4
+
+
+def test_schema_version():
+    a = {"types": {"Issue": TYPES[0], "Team": TYPES[2]}}
+    b = {"types": {"Team": TYPES[2], "Issue": TYPES[0]}}
+    assert schema_version(a) == schema_version(b)
+    assert schema_version(a) != schema_version({"types": {"Issue": TYPES[0]}})
+
+
+def test_schema_cache_keeps_version_out_of_schema(monkeypatch):
+    files = {}
+    monkeypatch.setattr(mc.storage, "read_json", lambda name, default=None: files.get(name, default))
+    monkeypatch.setattr(
+        mc.storage, "write_json", lambda name, data, **kwargs: files.__setitem__(name, data)
+    )
+    api = FakeLinearApi(full_introspection=True)
+    schema = api.schema()
+    assert list(schema) == ["types"]
+    assert files[SCHEMA_FILE]["schema"] == schema
+    assert files[SCHEMA_FILE]["version"] == schema_version(schema)
+    assert api.schema() == schema
+    assert api.requests == 1
+    assert api.schema(refresh=True) == schema
+    assert api.requests == 2
@@ -0,0 +1,76 @@
+from time import time
+
+import pytest
+import requests
+
+from ema.linear.transport import LinearApiError, LinearTransport, RateLimitState
+
+
+class FakeResponse(requests.Response):
+    def __init__(self, status_code: int, payload: dict, headers: dict = None):
+        super().__init__()
+        self.status_code = status_code
+        self._content = requests.compat.json.dumps(payload).encode()
+        self.headers.update(headers or {})
+
+
+def make_transport(responses: list) -> LinearTransport:
+    transport = LinearTransport("https://linear.test/graphql", {}, backoff_base=0, max_retries=2)
+    calls = iter(responses)
+
+    def post(*args, **kwargs):
+        response = next(calls)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    transport.session.post = post
+    return transport
+
+
+def test_retries_transient_errors():
+    transport = make_transport(
+        [
+            requests.ConnectionError("reset"),
+            FakeResponse(502, {}),
+            FakeResponse(200, {"data": {"ok": True}}, {"X-Complexity": "12"}),
+        ]
+    )
+    response = transport.post("{ ok }")
+    assert response.data == {"ok": True}
+    assert response.complexity == 12
+
+
+def test_raises_instead_of_exit():
+    errors = [{"message": "Syntax error", "extensions": {"code": "GRAPHQL_PARSE_FAILED"}}]
+    transport = make_transport([FakeResponse(400, {"errors": errors})])
+    with pytest.raises(LinearApiError) as e:
+        transport.post("{ broken")
+    assert e.value.status_code == 400
+    assert e.value.gql_errors == errors
+    assert not e.value.is_rate_limited
+
+
+def test_rate_limited_is_retried():
+    errors = [{"message": "Rate limit exceeded", "extensions": {"code": "RATELIMITED"}}]
+    transport = make_transport(
+        [FakeResponse(400, {"errors": errors}), FakeResponse(200, {"data": {"ok": 1}})]
+    )
+    assert transport.post("{ ok }").data == {"ok": 1}
+
+
+def test_pacing_delay():
+    now = time()
+    state = RateLimitState()
+    state.update(
+        {
+            "X-RateLimit-Requests-Limit": "1500",
+            "X-RateLimit-Requests-Remaining": "1000",
+            "X-RateLimit-Requests-Reset": str(int((now + 60) * 1000)),
+        }
+    )
+    assert state.pacing_delay(0.1, now) == 0
+    state.requests_remaining = 10
+    assert state.pacing_delay(0.1, now) == pytest.approx(6, abs=0.1)
+    state.requests_remaining = 0
+    assert state.pacing_delay(0.1, now) == pytest.approx(60, abs=0.1)
@@ -0,0 +1,74 @@
+import threading
+from time import sleep
+
+from ema.linear.webhooks import (
+    STICKY_ACTIONS,
+    CoalescingQueue,
+    WebhookServer,
+    affected_issue,
+    replay_events,
+    sign,
+    verify_signature,
+)
+
+
+def test_verify_signature():
+    body = b'{"type": "Issue"}'
+    assert verify_signature(body, sign(body, "secret"), "secret")
+    assert not verify_signature(body, sign(body, "other"), "secret")
+    assert not verify_signature(body, "", "secret")
+
+
+def test_affected_issue():
+    assert affected_issue({"type": "Issue", "action": "update", "data": {"id": "a"}}) == (
+        "a",
+        "upsert",
+    )
+    assert affected_issue({"type": "Issue", "action": "remove", "data": {"id": "a"}}) == (
+        "a",
+        "remove",
+    )
+    assert affected_issue({"type": "Comment", "data": {"issueId": "b"}}) == ("b", "upsert")
+    assert affected_issue({"type": "Project", "data": {"id": "c"}}) is None
+
+
+def test_coalescing_queue():
+    queue = CoalescingQueue(delay=0.05, max_delay=1)
+    for _ in range(5):
+        queue.put("a", "upsert")
+    queue.put("b", "upsert")
+    queue.put("a", "remove")
+    assert queue.get_ready(timeout=0) == {}
+    assert queue.get_ready(timeout=1) == {"a": "remove", "b": "upsert"}
+    assert len(queue) == 0
+
+
+def test_coalescing_queue_keeps_sticky_removal():
+    queue = CoalescingQueue(delay=0.01, sticky=STICKY_ACTIONS)
+    queue.put("a", "remove")
+    queue.put("a", "upsert")  # e.g. a late Comment event of the removed issue
+    queue.put("b", "upsert")
+    assert queue.get_ready(timeout=1) == {"a": "remove", "b": "upsert"}
+    queue.put("a", "upsert")
+    assert queue.get_ready(timeout=1) == {"a": "upsert"}
+
+
+def test_replay_to_server():
+    queue = CoalescingQueue(delay=0)
+    server = WebhookServer(("127.0.0.1", 0), "secret", queue)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        events = [
+            {"type": "Issue", "action": "update", "data": {"id": "a"}},
+            {"type": "Comment", "action": "create", "data": {"issueId": "a"}},
+            {"type": "Issue", "action": "create", "data": {"id": "b"}},
+        ]
+        assert replay_events(events, url, "secret") == [200, 200, 200]
+        assert replay_events(events[:1], url, "wrong") == [401]
+        sleep(0.01)
+        assert queue.get_ready(timeout=1) == {"a": "upsert", "b": "upsert"}
+    finally:
+        server.shutdown()
+        server.server_close()
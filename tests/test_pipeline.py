@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from rich.progress import Progress
+
+from ema.pipeline import Pipeline, Stage
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+_initialized = False
+
+
+def init_worker():
+    global _initialized
+    _initialized = True
+
+
+def worker_state(x: int) -> tuple[int, bool]:
+    return os.getpid(), _initialized
+
+
+def test_pipeline_runs_all_stages():
+    collected = []
+    pipeline = Pipeline(
+        [
+            Stage("square", square, workers=2, processes=True, queue_size=3),
+            Stage("skip odd", lambda x: x if x % 2 == 0 else None, workers=3, queue_size=2),
+            Stage("collect", collected.append),
+        ],
+        progress=Progress(disable=True),
+    )
+    counts = pipeline.run(range(50))
+    assert sorted(collected) == [x * x for x in range(50) if x % 2 == 0]
+    assert counts == {"Source": 50, "square": 50, "skip odd": 50, "collect": 25}
+
+
+def test_pipeline_propagates_errors():
+    def fail(x):
+        if x == 7:
+            raise ValueError("boom")
+        return x
+
+    with pytest.raises(ValueError, match="boom"):
+        Pipeline([Stage("fail", fail, workers=2), Stage("sink", lambda x: None)]).run(range(1000))
+
+
+def test_pipeline_propagates_source_errors():
+    def source():
+        yield 1
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError, match="source failed"):
+        Pipeline([Stage("sink", lambda x: None)]).run(source())
+
+
+def test_pipeline_process_workers_are_initialized():
+    collected = []
+    Pipeline(
+        [
+            Stage("state", worker_state, workers=2, processes=True, initializer=init_worker),
+            Stage("collect", collected.append),
+        ]
+    ).run(range(10))
+    assert all(initialized for _, initialized in collected)
+    assert os.getpid() not in {pid for pid, _ in collected}
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+
+import microcore as mc
+
+from ema.indexing import vector_metadata
+from ema.retrieval import HybridRetriever, RetrievalConfig, RetrievalFilters, reciprocal_rank_fusion
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["A-1", "A-2", "A-3"], ["A-3", "A-1"]], k=60)
+    assert fused == ["A-1", "A-3", "A-2"]
+
+
+def test_filters():
+    assert RetrievalFilters().where() is None
+    assert RetrievalFilters().sql() == ("", {})
+    assert RetrievalFilters(team="Core").where() == {"team": "Core"}
+
+    filters = RetrievalFilters(team="Core", state="Done", since="2024-01-01T00:00:00+00:00")
+    conditions, params = filters.sql()
+    assert conditions == " AND team = :team AND state = :state AND updated_at >= :since"
+    assert params["since"] == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert filters.where() == {
+        "$and": [
+            {"team": "Core"},
+            {"state": "Done"},
+            {"updated_ts": {"$gte": 1704067200}},
+        ]
+    }
+    assert RetrievalFilters(since="2024-01-01").where() == {"updated_ts": {"$gte": 1704067200}}
+
+
+def test_vector_metadata():
+    row = dict(team="Core", state=None, updated_at="2024-01-01T00:00:00+00:00")
+    assert vector_metadata(row) == {"team": "Core", "state": "", "updated_ts": 1704067200}
+    assert vector_metadata({})["updated_ts"] == 0
+    # Naive values are UTC, whatever the local time zone
+    assert vector_metadata(dict(updated_at="2024-01-01 00:00:00"))["updated_ts"] == 1704067200
+    assert vector_metadata(dict(updated_at=datetime(2024, 1, 1)))["updated_ts"] == 1704067200
+
+
+def test_mentioned_issues_go_first(monkeypatch):
+    retriever = HybridRetriever(RetrievalConfig(limit=3))
+    monkeypatch.setattr(retriever, "vector_ids", lambda *args: ["A-1", "A-2"])
+    monkeypatch.setattr(retriever, "fulltext_ids", lambda *args: ["A-2", "A-3"])
+    monkeypatch.setattr(retriever, "mentioned_ids", lambda *args: ["B-7"])
+    assert retriever.search_ids("what about B-7?") == ["B-7", "A-2", "A-1"]
+
+
+def test_search_results_cached_until_import(monkeypatch):
+    version = [(1, "2024-01-01")]
+    monkeypatch.setattr("ema.retrieval.index_version", lambda: version[0])
+    retriever = HybridRetriever(RetrievalConfig(cache_size=2))
+    calls = []
+    monkeypatch.setattr(retriever, "search_ids", lambda q, *args: calls.append(q) or [q])
+    monkeypatch.setattr(retriever, "documents", lambda ids: ids)
+
+    assert retriever.search("Open bugs?") == ["Open bugs?"]
+    assert retriever.search("  open   BUGS? ") == ["Open bugs?"]
+    assert len(calls) == 1
+    assert retriever.cache.stats()["hit_rate"] == 0.5
+
+    version[0] = (2, "2024-01-02")
+    retriever.search("open bugs?")
+    assert len(calls) == 2
+    retriever.search("a")
+    retriever.search("b")  # evicts "open bugs?"
+    retriever.search("open bugs?")
+    assert len(calls) == 5
+
+
+def test_question_embedding_cached_across_index_updates(numpy_env, monkeypatch):
+    version = [(1, "2024-01-01")]
+    monkeypatch.setattr("ema.retrieval.index_version", lambda: version[0])
+    mc.texts.save_many("issues", [("abc", {"issue_id": "A-1"}), ("fgh", {"issue_id": "A-2"})])
+    retriever = HybridRetriever(RetrievalConfig())
+    monkeypatch.setattr(retriever, "fulltext_ids", lambda *args: [])
+    monkeypatch.setattr(retriever, "mentioned_ids", lambda *args: [])
+    monkeypatch.setattr(retriever, "documents", lambda ids: ids)
+    numpy_env.clear()
+
+    assert retriever.search("aab cab") == ["A-1", "A-2"]
+    version[0] = (2, "2024-01-02")  # Found ids are dropped, the question embedding is kept
+    assert retriever.search(" aab  cab ") == ["A-1", "A-2"]
+    assert numpy_env == [["aab cab"]]
+    assert retriever.cache.stats()["hits"] == 0
+    assert retriever.embedding_cache.stats()["hits"] == 1
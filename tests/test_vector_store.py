@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from ema.vector_store import NumpyEmbeddingDB, VectorStoreConfig, matches
+
+
+def fake_embeddings(texts):
+    """Deterministic letter-frequency vectors"""
+    return [[t.count(c) + 0.01 for c in "abcdefgh"] for t in texts]
+
+
+def make_db(path, **kwargs) -> NumpyEmbeddingDB:
+    config = SimpleNamespace(EMBEDDING_DB_FUNCTION=fake_embeddings, EMBEDDING_DB_ALLOW_DUPLICATES=False)
+    settings = VectorStoreConfig(path=str(path), block_size=2, **kwargs)
+    return NumpyEmbeddingDB(config, settings)
+
+
+def test_matches():
+    metadata = {"team": "Core", "updated_ts": 10}
+    assert matches(metadata, {"team": "Core"})
+    assert matches(metadata, {"$and": [{"team": "Core"}, {"updated_ts": {"$gte": 10}}]})
+    assert not matches(metadata, {"team": {"$in": ["Web"]}})
+    assert matches(metadata, {"$or": [{"team": "Web"}, {"updated_ts": {"$lt": 11}}]})
+
+
+def test_search_delete_compact(tmp_path):
+    db = make_db(tmp_path, compact_min_rows=100)
+    db.save_many(
+        "issues",
+        [
+            ("aaaa", {"issue_id": "I-1", "team": "Core"}),
+            ("bbbb", {"issue_id": "I-2", "team": "Web"}),
+            ("aabb", {"issue_id": "I-3", "team": "Web"}),
+            ("hhhh", {"issue_id": "I-4", "team": "Core"}),
+            ("aaab", {"issue_id": "I-5", "team": "Core"}),
+        ],
+    )
+    assert db.count("issues") == 5
+    found = db.search("issues", "aaaa", 3)
+    assert [d.metadata["issue_id"] for d in found] == ["I-1", "I-5", "I-3"]
+    assert found[0] == "aaaa" and abs(found[0].distance) < 1e-3
+    found = db.search("issues", "aaaa", 2, where={"team": "Web"})
+    assert [d.metadata["issue_id"] for d in found] == ["I-3", "I-2"]
+
+    db.delete("issues", {"issue_id": {"$in": ["I-1", "I-5"]}})
+    assert [d.metadata["issue_id"] for d in db.search("issues", "aaaa", 1)] == ["I-3"]
+    db.save_many("issues", [("aaaa", {"issue_id": "I-1", "team": "Core"})])
+
+    # Another process (a fresh instance) sees the changes, also after compaction
+    other = make_db(tmp_path)
+    assert other.count("issues") == 4
+    db.compact("issues")
+    assert len(db._collection("issues").ids) == 4
+    assert other.count("issues") == 4
+    assert [d.metadata["issue_id"] for d in other.search("issues", "aaaa", 2)] == ["I-1", "I-3"]
+    assert other.get("issues", where={"team": "Core"}, limit=1)[0].metadata["issue_id"] == "I-4"
+
+    db.clear("issues")
+    assert not other.collection_exists("issues")
+    assert other.search("issues", "aaaa") == []
+
+
+def test_vectors_stored_as_float16(tmp_path):
+    db = make_db(tmp_path)
+    db.save_many("docs", ["abc", "abc", "def"])
+    collection = db._collection("docs")
+    assert collection.vectors.dtype == np.float16
+    assert collection.vectors.shape == (2, 8)
+
+
+def test_embeddings_of_live_documents(tmp_path):
+    db = make_db(tmp_path)
+    db.save_many("issues", [("aaaa", {"issue_id": "I-1"}), ("bbbb", {"issue_id": "I-2"})])
+    metadatas, vectors = db.embeddings("issues")
+    assert [m["issue_id"] for m in metadatas] == ["I-1", "I-2"]
+    db.delete("issues", {"issue_id": "I-1"})
+    metadatas, vectors = db.embeddings("issues")
+    assert [m["issue_id"] for m in metadatas] == ["I-2"] and vectors.shape == (1, 8)
+
+
+def test_update_metadata_keeps_embeddings(tmp_path):
+    db = make_db(tmp_path)
+    db.save_many(
+        "issues", [("aaaa", {"issue_id": "I-1", "state": "Todo"}), ("bbbb", {"issue_id": "I-2"})]
+    )
+    doc_id = db.get("issues", where={"issue_id": "I-1"})[0].id
+    _, before = db.embeddings("issues")
+    db.update_metadata("issues", [doc_id, "missing"], [{"issue_id": "I-1", "state": "Done"}, {}])
+    metadatas, after = db.embeddings("issues")
+    assert metadatas[0] == {"issue_id": "I-1", "state": "Done"}
+    assert np.array_equal(np.asarray(before), np.asarray(after))
+
+    other = make_db(tmp_path)
+    assert other.get("issues", where={"state": "Done"})[0].metadata["issue_id"] == "I-1"
+    db.delete("issues", {"issue_id": "I-2"})
+    db.compact("issues")
+    assert other.get("issues", doc_id).metadata["state"] == "Done"
+
+
+def test_delete_after_compaction_by_another_process(tmp_path):
+    db, other = make_db(tmp_path), make_db(tmp_path)
+    db.save_many("issues", [(t, {"issue_id": t}) for t in ("aaaa", "bbbb", "cccc")])
+    assert other.count("issues") == 3  # `other` knows the rows before compaction
+    db.delete("issues", {"issue_id": "aaaa"})
+    db.compact("issues")  # Renumbers the rows of "bbbb" and "cccc"
+    other.delete("issues", {"issue_id": "cccc"})
+    assert [d.metadata["issue_id"] for d in db.get("issues")] == ["bbbb"]
+    with db._collection("issues")._locked():
+        with db._collection("issues")._locked():  # Nested locks reuse the held file lock
+            assert db.count("issues") == 1